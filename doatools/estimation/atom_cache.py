@@ -0,0 +1,162 @@
+import os
+import hashlib
+import tempfile
+import numpy as np
+
+def _update_hash(h, obj):
+    """Feeds an object into the hash in a type-aware manner."""
+    if obj is None or isinstance(obj, (bool, int, float, complex, str)):
+        h.update(repr((type(obj).__name__, obj)).encode())
+    elif isinstance(obj, np.ndarray):
+        h.update(repr(('ndarray', obj.dtype.str, obj.shape)).encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, np.generic):
+        _update_hash(h, obj.item())
+    elif isinstance(obj, (list, tuple)):
+        h.update(repr((type(obj).__name__, len(obj))).encode())
+        for x in obj:
+            _update_hash(h, x)
+    elif callable(obj):
+        # Custom spatial responses. The bytecode and constants are used so that
+        # redefining the function changes the key.
+        h.update(repr(('callable', getattr(obj, '__module__', None),
+                       getattr(obj, '__qualname__', None))).encode())
+        code = getattr(obj, '__code__', None)
+        if code is not None:
+            h.update(code.co_code)
+            h.update(repr(code.co_consts).encode())
+    else:
+        raise ValueError(
+            'Cannot compute the cache key for objects of the type {0}.'
+            .format(type(obj).__name__)
+        )
+
+def compute_atom_cache_key(array, wavelength, search_grid, extra=()):
+    """Computes the key of an atom matrix.
+
+    The key is a SHA-256 hash of the following items:
+
+    * the element locations of the array;
+    * the types and parameters of the known perturbations of the array (only
+      known perturbations are used when creating atom matrices);
+    * the type and parameters of the array element;
+    * the wavelength;
+    * the type, units, and axes of the search grid;
+    * additional items specified by ``extra``.
+
+    Args:
+        array (~doatools.model.arrays.ArrayDesign): Array design.
+        wavelength (float): Wavelength of the carrier wave.
+        search_grid (~doatools.estimation.grid.SearchGrid): Search grid.
+        extra (tuple): Additional items to be included, such as the type of
+            the atom matrix. Can contain scalars, strings, and numpy arrays.
+
+    Returns:
+        str: A hexadecimal string.
+    """
+    h = hashlib.sha256()
+    _update_hash(h, array.element_locations)
+    perturbations = sorted(
+        ((type(p).__name__, p.params) for p in array.perturbations if p.is_known),
+        key=lambda x: x[0]
+    )
+    _update_hash(h, perturbations)
+    element = array.element
+    _update_hash(h, type(element).__name__)
+    _update_hash(h, sorted(vars(element).items(), key=lambda x: x[0]))
+    _update_hash(h, float(wavelength))
+    _update_hash(h, type(search_grid).__name__)
+    _update_hash(h, search_grid.units)
+    _update_hash(h, search_grid.axes)
+    _update_hash(h, tuple(extra))
+    return h.hexdigest()
+
+class AtomMatrixCache:
+    """Creates a content-addressed on-disk cache of atom matrices.
+
+    Each atom matrix is stored as a ``.npy`` file named by its key (see
+    :meth:`compute_atom_cache_key`) under ``cache_dir``. Cached atom matrices
+    are memory-mapped in read-only mode when loaded so that multiple processes
+    can share the same atom matrix without copying. New entries are written to
+    a temporary file first and then renamed, so that concurrent writers never
+    expose partially written files.
+
+    Args:
+        cache_dir (str): The directory storing the cached atom matrices. Will
+            be created if it does not exist.
+        mmap (bool): If set to ``True``, the cached atom matrices will be
+            memory-mapped. Otherwise they will be loaded into memory. Default
+            value is ``True``.
+    """
+
+    def __init__(self, cache_dir, mmap=True):
+        self._cache_dir = cache_dir
+        self._mmap_mode = 'r' if mmap else None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @property
+    def cache_dir(self):
+        """Retrieves the cache directory."""
+        return self._cache_dir
+
+    def get_path(self, key):
+        """Retrieves the path of the file associated with the given key."""
+        return os.path.join(self._cache_dir, key + '.npy')
+
+    def get(self, key):
+        """Loads the atom matrix associated with the given key.
+
+        Args:
+            key (str): The key.
+
+        Returns:
+            ~numpy.ndarray: The cached atom matrix, or ``None`` if not found.
+        """
+        path = self.get_path(key)
+        if not os.path.isfile(path):
+            return None
+        # Use a plain ndarray view of the memory map so that downstream
+        # consumers (e.g., cvxpy) treat it as a regular array. No data are
+        # copied.
+        return np.asarray(np.load(path, mmap_mode=self._mmap_mode))
+
+    def put(self, key, A):
+        """Stores the atom matrix with the given key.
+
+        Args:
+            key (str): The key.
+            A (~numpy.ndarray): The atom matrix.
+        """
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self._cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, A)
+            os.replace(tmp_path, self.get_path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def get_or_compute(self, key, f):
+        """Loads the atom matrix associated with the given key, or computes and
+        stores it if not found.
+
+        Args:
+            key (str): The key.
+            f: A callable object that accepts no parameters and returns the
+                atom matrix.
+
+        Returns:
+            ~numpy.ndarray: The atom matrix. Memory-mapped if ``mmap`` is
+            ``True``.
+        """
+        A = self.get(key)
+        if A is None:
+            self.put(key, f())
+            A = self.get(key)
+        return A
+
+    def clear(self):
+        """Removes all cached atom matrices."""
+        for name in os.listdir(self._cache_dir):
+            if name.endswith('.npy'):
+                os.remove(os.path.join(self._cache_dir, name))
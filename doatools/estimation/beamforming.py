@@ -1,5 +1,6 @@
 import numpy as np
-from .core import SpectrumBasedEstimatorBase, ensure_covariance_size
+from .core import SpectrumBasedEstimatorBase, ensure_covariance_size, \
+                  ensure_covariance_batch_size
 
 def f_bartlett(A, R):
     r"""Computes the spectrum output of the Bartlett beamformer.
@@ -16,6 +17,23 @@ def f_bartlett(A, R):
     """
     return np.sum(A.conj() * (R @ A), axis=0).real
 
+def f_bartlett_batch(A, Rs):
+    r"""Computes the spectrum outputs of the Bartlett beamformer for a stack of
+    covariance matrices.
+
+    Args:
+        A: m x k steering matrix of candidate direction-of-arrivals, where
+            m is the number of sensors and k is the number of candidate
+            direction-of-arrivals.
+        Rs: b x m x m stack of covariance matrices.
+
+    Returns:
+        A b x k matrix whose i-th row is the spectrum output for ``Rs[i]``.
+    """
+    b, m, _ = Rs.shape
+    RA = (Rs.reshape((b * m, m)) @ A).reshape((b, m, -1))
+    return np.sum(A.conj() * RA, axis=1).real
+
 def f_mvdr(A, R):
     r"""Compute the spectrum output of the Bartlett beamformer.
 
@@ -31,6 +49,25 @@ def f_mvdr(A, R):
     """
     return 1.0 / np.sum(A.conj() * np.linalg.lstsq(R, A, None)[0], axis=0).real
 
+def f_mvdr_batch(A, Rs):
+    r"""Computes the spectrum outputs of the MVDR beamformer for a stack of
+    covariance matrices.
+
+    Unlike :meth:`f_mvdr`, the covariance matrices must be nonsingular.
+
+    Args:
+        A: m x k steering matrix of candidate direction-of-arrivals, where
+            m is the number of sensors and k is the number of candidate
+            direction-of-arrivals.
+        Rs: b x m x m stack of covariance matrices.
+
+    Returns:
+        A b x k matrix whose i-th row is the spectrum output for ``Rs[i]``.
+    """
+    # Solving against A directly avoids forming the inverses.
+    RA = np.linalg.solve(Rs, A[np.newaxis])
+    return 1.0 / np.sum(A.conj() * RA, axis=1).real
+
 class BartlettBeamformer(SpectrumBasedEstimatorBase):
     """Creates a Barlett-beamformer based estimator.
 
@@ -94,7 +131,47 @@ class BartlettBeamformer(SpectrumBasedEstimatorBase):
               ``True``.
         """
         ensure_covariance_size(R, self._array)
-        return self._estimate(lambda A: f_bartlett(A, R), k, **kwargs)
+        f_sp_grid = None
+        if self._spectrum_evaluator is not None:
+            f_sp_grid = lambda: self._spectrum_evaluator.eval_quadratic_forms(R)
+        return self._estimate(lambda A: f_bartlett(A, R), k,
+                              f_sp_grid=f_sp_grid, **kwargs)
+
+    def estimate_batch(self, Rs, k, return_spectrum=False):
+        """Estimates the source locations from a stack of covariance matrices.
+
+        This is equivalent to calling :meth:`estimate` for each covariance
+        matrix, but the spectrum evaluations and the peak finding are performed
+        over the whole batch at once. Grid refinement is not supported.
+
+        Args:
+            Rs (~numpy.ndarray): A B x M x M stack of covariance matrices,
+                where M must match the size of the array design used when
+                creating this estimator.
+            k (int): Expected number of sources.
+            return_spectrum (bool): Set to ``True`` to also output the spectra
+                for visualization. Default value if ``False``.
+
+        Returns:
+            A tuple with the following elements.
+
+            * resolved (:class:`~numpy.ndarray`): A boolean vector of length B
+              indicating whether the desired number of sources are found for
+              each covariance matrix.
+            * estimates (:class:`~numpy.ndarray`): A B x k (1D search grids) or
+              B x k x d (d-D search grids) array of the estimated source
+              locations, using the same unit as the search grid. Rows
+              corresponding to unresolved inputs are filled with NaN.
+            * spectrum (:class:`~numpy.ndarray`): An numpy array of shape
+              ``(B,) + search_grid.shape``. Only present if
+              ``return_spectrum`` is ``True``.
+        """
+        ensure_covariance_batch_size(Rs, self._array)
+        f_sp_grid = None
+        if self._spectrum_evaluator is not None:
+            f_sp_grid = lambda: self._spectrum_evaluator.eval_quadratic_forms(Rs)
+        return self._estimate_batch(lambda A: f_bartlett_batch(A, Rs), k,
+                                    return_spectrum, f_sp_grid)
 
 class MVDRBeamformer(SpectrumBasedEstimatorBase):
     """Creates a MVDR-beamformer based estimator.
@@ -158,4 +235,49 @@ class MVDRBeamformer(SpectrumBasedEstimatorBase):
               ``True``.
         """
         ensure_covariance_size(R, self._array)
-        return self._estimate(lambda A: f_mvdr(A, R), k, **kwargs)
+        f_sp_grid = None
+        if self._spectrum_evaluator is not None:
+            # Consistent with the least squares solution used in f_mvdr.
+            f_sp_grid = lambda: 1.0 / self._spectrum_evaluator.eval_quadratic_forms(
+                np.linalg.pinv(R)
+            )
+        return self._estimate(lambda A: f_mvdr(A, R), k,
+                              f_sp_grid=f_sp_grid, **kwargs)
+
+    def estimate_batch(self, Rs, k, return_spectrum=False):
+        """Estimates the source locations from a stack of covariance matrices.
+
+        This is equivalent to calling :meth:`estimate` for each covariance
+        matrix, but the spectrum evaluations and the peak finding are performed
+        over the whole batch at once. Grid refinement is not supported.
+
+        Args:
+            Rs (~numpy.ndarray): A B x M x M stack of covariance matrices,
+                where M must match the size of the array design used when
+                creating this estimator.
+            k (int): Expected number of sources.
+            return_spectrum (bool): Set to ``True`` to also output the spectra
+                for visualization. Default value if ``False``.
+
+        Returns:
+            A tuple with the following elements.
+
+            * resolved (:class:`~numpy.ndarray`): A boolean vector of length B
+              indicating whether the desired number of sources are found for
+              each covariance matrix.
+            * estimates (:class:`~numpy.ndarray`): A B x k (1D search grids) or
+              B x k x d (d-D search grids) array of the estimated source
+              locations, using the same unit as the search grid. Rows
+              corresponding to unresolved inputs are filled with NaN.
+            * spectrum (:class:`~numpy.ndarray`): An numpy array of shape
+              ``(B,) + search_grid.shape``. Only present if
+              ``return_spectrum`` is ``True``.
+        """
+        ensure_covariance_batch_size(Rs, self._array)
+        f_sp_grid = None
+        if self._spectrum_evaluator is not None:
+            f_sp_grid = lambda: 1.0 / self._spectrum_evaluator.eval_quadratic_forms(
+                np.linalg.inv(Rs)
+            )
+        return self._estimate_batch(lambda A: f_mvdr_batch(A, Rs), k,
+                                    return_spectrum, f_sp_grid)
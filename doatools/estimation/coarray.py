@@ -1,15 +1,19 @@
 import numpy as np
 from ..model.arrays import UniformLinearArray, GridBasedArrayDesign
 from ..model.coarray import WeightFunction1D
-from .core import ensure_covariance_size
-from ..utils.math import vec
+from .core import ensure_covariance_size, ensure_covariance_batch_size
 
 class CoarrayACMBuilder1D:
     """Creates a coarray-based augmented covariance matrix builder.
     
     Based on the specified sensor array, creates a callable object that can
     transform sample covariance matrices obtained from the physical array model
-    into augmented covariance matrices under the difference coarray model
+    into augmented covariance matrices under the difference coarray model.
+
+    The redundancy averaging matrix and the gather indices used to form the
+    augmented covariance matrices are computed once during the construction,
+    so that each transformation only involves a sparse matrix product and an
+    indexing operation.
 
     Args:
         array (~doatools.model.arrays.ArrayDesign): A 1D grid-based sensor
@@ -24,6 +28,19 @@ class CoarrayACMBuilder1D:
             raise ValueError('Expecting a 1D grid-based array.')
         self._array = array
         self._w = WeightFunction1D(array)
+        m = array.size
+        mv = self._w.get_central_ula_size(True)
+        # Sparse redundancy averaging matrix that maps the row-major vectorized
+        # covariance matrix to the virtual observations of the central ULA.
+        # vec(R) stacks the columns so the columns are permuted accordingly.
+        perm = np.arange(m * m).reshape((m, m)).flatten('F')
+        self._F = self._w.get_coarray_selection_matrix(sparse=True)[:, perm]
+        # Spatial smoothing: Ra = H H^* / mv, where H[i, j] = z[i + j] is the
+        # Hankel matrix formed by the observations of the subarrays.
+        # Direct augmentation: Ra[i, j] = z[i - j + mv - 1] (Toeplitz).
+        i, j = np.ogrid[:mv, :mv]
+        self._hankel_indices = i + j
+        self._toeplitz_indices = i - j + mv - 1
 
     def __call__(self, R, method='ss'):
         """A shortcut to :meth:`transform`."""
@@ -81,23 +98,34 @@ class CoarrayACMBuilder1D:
             pp. 4167-4181, Aug. 2010.
         """
         ensure_covariance_size(R, self._array)
+        return self.transform_batch(R[np.newaxis], method)[0]
+
+    def transform_batch(self, Rs, method='ss'):
+        """Transforms a stack of sample covariance matrices.
+
+        Args:
+            Rs (~numpy.ndarray): A B x M x M stack of sample covariance
+                matrices.
+            method (str): ``'ss'`` for spatial-smoothing based transformation,
+                and ``'da'`` for direct-augmentation based transformation.
+                See :meth:`transform` for details.
+
+        Returns:
+            ~numpy.ndarray: A B x Mv x Mv stack of augmented covariance
+            matrices.
+        """
+        ensure_covariance_batch_size(Rs, self._array)
         if method not in ['ss', 'da']:
             raise ValueError('Method can only be one of the following: ss, da.')
-        mc = self._w.get_central_ula_size()
-        mv = (mc + 1) // 2
-        z = np.zeros((mc,), dtype=np.complex_)
-        r = vec(R)
-        for i in range(mc):
-            diff = i - mv + 1
-            z[i] = np.mean(r[self._w.indices_of(diff)])
-        Ra = np.zeros((mv, mv), dtype=np.complex_)
+        m = self._array.size
+        # (F @ R_flat^T)^T, where each row of R_flat is row-major vectorized.
+        Z = np.asarray(
+            self._F.dot(Rs.reshape((-1, m * m)).T).T, dtype=np.complex_
+        )
         if method == 'ss':
             # Spatial smoothing
-            for i in range(mv):
-                Ra += np.outer(z[i:i+mv], z[i:i+mv].conj())
-            Ra /= mv
+            H = Z[:, self._hankel_indices]
+            return (H @ H.conj()) / H.shape[1]
         else:
             # Direct augmentation
-            for i in range(mv):
-                Ra[:,-(i+1)] = z[i:i+mv]
-        return Ra
+            return Z[:, self._toeplitz_indices]
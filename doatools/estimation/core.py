@@ -1,8 +1,21 @@
 from collections import namedtuple
 from abc import ABC, abstractmethod
 import numpy as np
+from scipy.linalg import eigh
+from scipy.sparse.linalg import eigsh
 from scipy.signal import find_peaks
-from scipy.ndimage import maximum_filter
+from scipy.ndimage import maximum_filter, binary_erosion
+from .grid import refine_axes_at
+from .fast_spectrum import ULAFFTSpectrumEvaluator, SeparableSpectrumEvaluator
+from .atom_cache import AtomMatrixCache, compute_atom_cache_key
+from .subspace_tracking import SubspaceTracker
+
+# Size of the atom matrix tiles used in the chunked evaluation mode.
+ATOM_TILE_BYTES = 16 * 1024**2
+
+# Minimum array size for which only the signal eigenpairs are computed by
+# default.
+PARTIAL_EIGH_MIN_SIZE = 64
 
 # Helper functions for validating inputs.
 def ensure_covariance_size(R, array):
@@ -17,6 +30,32 @@ def ensure_covariance_size(R, array):
             .format((m, m), R.shape)
         )
 
+def ensure_covariance_batch_size(Rs, array):
+    """Ensures the size of a stack of covariance matrices matches the given
+    array design."""
+    m = array.size
+    if Rs.ndim != 3:
+        raise ValueError('Expecting a B x M x M stack of matrices.')
+    if Rs.shape[1] != m or Rs.shape[2] != m:
+        raise ValueError(
+            'The shape of the covariance matrices does not match the array '
+            'size. Expected shape is {0}. Got {1}'
+            .format((m, m), Rs.shape[1:])
+        )
+
+def ensure_covariance_or_tracker_size(R, array):
+    """Ensures the size of R matches the given array design, where R can be
+    either a covariance matrix or a
+    :class:`~doatools.estimation.subspace_tracking.SubspaceTracker`."""
+    if isinstance(R, SubspaceTracker):
+        if R.size != array.size:
+            raise ValueError(
+                'The size of the subspace tracker does not match the array '
+                'size. Expected {0}. Got {1}.'.format(array.size, R.size)
+            )
+    else:
+        ensure_covariance_size(R, array)
+
 def ensure_n_resolvable_sources(k, max_k):
     """Checks if the number of expected sources exceeds the maximum resolvable sources."""
     if k > max_k:
@@ -34,22 +73,127 @@ def find_peaks_simple(x):
         y = maximum_filter(x, 3)
         return np.where(x == y)
 
+def find_peaks_simple_batch(x):
+    """Batched version of :meth:`find_peaks_simple`.
+
+    Args:
+        x: An ndarray whose first dimension is the batch dimension. Each
+            ``x[i]`` is processed in the same way as :meth:`find_peaks_simple`.
+
+    Returns:
+        A boolean ndarray of the same shape as ``x``, where ``True`` marks the
+        peak locations.
+    """
+    if x.ndim == 2:
+        mask = np.zeros(x.shape, dtype=np.bool_)
+        c = x[:, 1:-1]
+        rising = c > x[:, :-2]
+        mask[:, 1:-1] = rising & (c > x[:, 2:])
+        # scipy's peak finder reports the middle of a flat peak. Such plateaus
+        # are rare for spectra so we delegate these rows to scipy.
+        for i in np.nonzero(np.any(rising & (c == x[:, 2:]), axis=1))[0]:
+            mask[i] = False
+            mask[i, find_peaks(x[i])[0]] = True
+        return mask
+    else:
+        # The batch dimension is excluded from the maximum filter.
+        y = maximum_filter(x, (1,) + (3,) * (x.ndim - 1))
+        return x == y
+
 def get_noise_subspace(R, k):
     """
     Gets the noise eigenvectors.
 
     Args:
-        R: Covariance matrix.
+        R: Covariance matrix. A B x M x M stack of covariance matrices is also
+            accepted, in which case a stack of noise subspaces is returned.
         k: Number of sources.
     """
     _, E = np.linalg.eigh(R)
     # Note: eigenvalues are sorted in ascending order.
-    return E[:,:-k]
+    return E[..., :-k]
+
+def get_signal_subspace(R, k, method='auto'):
+    """
+    Gets the signal eigenvectors, i.e., the eigenvectors associated with the
+    k largest eigenvalues, without computing the full eigendecomposition
+    when possible.
+
+    Args:
+        R: Covariance matrix. A B x M x M stack of covariance matrices is also
+            accepted, in which case a stack of signal subspaces is returned.
+            Can also be a
+            :class:`~doatools.estimation.subspace_tracking.SubspaceTracker`,
+            in which case its current signal subspace is returned and
+            ``method`` is ignored.
+        k: Number of sources.
+        method: Method used to compute the signal eigenvectors. Can be one of
+            the following:
+
+            * ``'full'``: full eigendecomposition with :func:`numpy.linalg.eigh`.
+            * ``'partial'``: only the k largest eigenpairs are computed with
+              :func:`scipy.linalg.eigh` (``subset_by_index``).
+            * ``'lanczos'``: Lanczos iterations with
+              :func:`scipy.sparse.linalg.eigsh`.
+            * ``'randomized'``: randomized subspace iterations. Suitable for
+              large arrays with a clear gap between the signal and noise
+              eigenvalues.
+            * ``'auto'``: ``'partial'`` for arrays with at least
+              :data:`PARTIAL_EIGH_MIN_SIZE` sensors and ``'full'``
+              otherwise.
+
+            Default value is ``'auto'``.
+
+    Returns:
+        An M x k matrix (or a B x M x k stack) of the signal eigenvectors. The
+        columns are ordered by their eigenvalues in ascending order.
+    """
+    if isinstance(R, SubspaceTracker):
+        return R.get_signal_subspace(k)
+    m = R.shape[-1]
+    if k < 1 or k > m:
+        raise ValueError('k must be between 1 and {0}.'.format(m))
+    if method == 'auto':
+        method = 'partial' if m >= PARTIAL_EIGH_MIN_SIZE and k < m else 'full'
+    if method == 'full':
+        _, E = np.linalg.eigh(R)
+        return E[..., -k:]
+    if method == 'partial':
+        f = lambda X: eigh(X, subset_by_index=[m - k, m - 1])[1]
+    elif method == 'lanczos':
+        if k >= m:
+            raise ValueError('The Lanczos method requires k < M.')
+        f = lambda X: _lanczos_signal_subspace(X, k)
+    elif method == 'randomized':
+        f = lambda X: _randomized_signal_subspace(X, k)
+    else:
+        raise ValueError('Unknown method "{0}".'.format(method))
+    if R.ndim == 2:
+        return f(R)
+    return np.stack([f(X) for X in R])
+
+def _lanczos_signal_subspace(R, k):
+    w, E = eigsh(R, k=k, which='LA')
+    return E[:, np.argsort(w)]
+
+def _randomized_signal_subspace(R, k, n_oversamples=10, n_iter=4):
+    m = R.shape[0]
+    l = min(m, k + n_oversamples)
+    # A fixed seed makes the estimates reproducible.
+    rng = np.random.RandomState(0)
+    Q, _ = np.linalg.qr(R @ rng.randn(m, l))
+    for _ in range(n_iter):
+        Q, _ = np.linalg.qr(R @ Q)
+    # Rayleigh-Ritz projection.
+    _, V = np.linalg.eigh(Q.conj().T @ R @ Q)
+    return Q @ V[:, -k:]
 
 class SpectrumBasedEstimatorBase(ABC):
 
     def __init__(self, array, wavelength, search_grid,
-                 peak_finder=find_peaks_simple, enable_caching=True):
+                 peak_finder=find_peaks_simple, enable_caching=True,
+                 coarse_decimation=None, enable_fft=True,
+                 enable_separable=True, max_atom_bytes=None, atom_cache=None):
         """Base class for a spectrum-based estimator.
 
         Args:
@@ -66,6 +210,54 @@ class SpectrumBasedEstimatorBase(ABC):
                 and the search grid are supposed to remain unchanged, caching
                 the steering matrix will save a lot of computations for dense
                 grids in Monte Carlo simulations. Default value is True.
+            coarse_decimation: If specified, enables the coarse-to-fine search
+                mode. Can be an integer or a tuple of integers (one for each
+                axis of the search grid) specifying the decimation factors used
+                to create the coarse grid. The spectrum is first evaluated on
+                the coarse grid. Only the dense grid points within one coarse
+                cell of the 2k largest coarse peaks (k being the number of
+                sources) are then evaluated. The results are identical to those
+                of the full search as long as the peaks are separated by more
+                than one coarse cell. If not enough peaks can be located, the
+                full search grid will be used. Only applicable when the
+                spectrum at each grid point depends only on the corresponding
+                atom. Default value is None (full search).
+            enable_fft: If set to True, the spectrum over the search grid will
+                be evaluated with FFTs whenever possible, without creating the
+                atom matrix. Currently this applies to uniform linear arrays
+                with search grids that are uniformly spaced in the sine domain
+                such that wavelength / (d0 * grid spacing) is an integer. See
+                :class:`~doatools.estimation.fast_spectrum.ULAFFTSpectrumEvaluator`
+                for details. Default value is True.
+            enable_separable: If set to True, the spectrum over the search grid
+                will be evaluated by exploiting the separable structure of the
+                steering vectors whenever possible, without creating the atom
+                matrix. Currently this applies to multi-dimensional grid-based
+                arrays such as uniform rectangular arrays with far-field search
+                grids. See
+                :class:`~doatools.estimation.fast_spectrum.SeparableSpectrumEvaluator`
+                for details. Default value is True.
+            max_atom_bytes: If specified, limits the memory (in bytes) used by
+                the atom matrix. If the full atom matrix does not fit within
+                this budget, the spectrum will be evaluated in a chunked mode:
+                the atom matrix is created tile by tile (each tile consists of
+                the atoms of consecutive grid points and uses at most
+                min(`ATOM_TILE_BYTES`, max_atom_bytes / 4) bytes), and the
+                spectrum values of each tile
+                are written into a preallocated spectrum buffer. If caching is
+                enabled, the leading tiles are cached as long as the cached
+                tiles together with a working tile fit within the budget. The
+                remaining tiles are recomputed on every evaluation. Only
+                applicable when the spectrum at each grid point depends only on
+                the corresponding atom. Default value is None (no limit).
+            atom_cache: An instance of
+                :class:`~doatools.estimation.atom_cache.AtomMatrixCache` or
+                the path to a cache directory. If specified, the atom matrix
+                for the search grid will be loaded from this on-disk cache
+                (memory-mapped by default), or computed and stored into this
+                cache if not found. Processes sharing the same cache directory
+                will share the same atom matrix. Not used in the chunked mode.
+                Default value is None.
         """
         self._array = array
         self._wavelength = wavelength
@@ -73,6 +265,52 @@ class SpectrumBasedEstimatorBase(ABC):
         self._peak_finder = peak_finder
         self._enable_caching = enable_caching
         self._atom_matrix = None
+        if max_atom_bytes is not None and max_atom_bytes <= 0:
+            raise ValueError('max_atom_bytes must be positive.')
+        self._max_atom_bytes = max_atom_bytes
+        self._atom_column_bytes = None
+        self._atom_tiles = None
+        if isinstance(atom_cache, str):
+            atom_cache = AtomMatrixCache(atom_cache)
+        self._atom_cache = atom_cache
+        if coarse_decimation is not None:
+            if np.isscalar(coarse_decimation):
+                coarse_decimation = (coarse_decimation,) * search_grid.ndim
+            coarse_decimation = tuple(int(f) for f in coarse_decimation)
+            if len(coarse_decimation) != search_grid.ndim:
+                raise ValueError(
+                    'Expecting {0} decimation factors. Got {1}.'
+                    .format(search_grid.ndim, len(coarse_decimation))
+                )
+            if any(f < 1 for f in coarse_decimation):
+                raise ValueError('Decimation factors must be positive.')
+        self._coarse_decimation = coarse_decimation
+        self._coarse_indices = None
+        self._coarse_atom_matrix = None
+        # Evaluators that compute the spectrum over the search grid without
+        # the atom matrix. They are created on first use because some
+        # subclasses never use them.
+        self._enable_fft = enable_fft
+        self._enable_separable = enable_separable
+        self._evaluator = None
+        self._evaluator_created = False
+
+    @property
+    def _spectrum_evaluator(self):
+        """Retrieves the evaluator that computes the spectrum over the search
+        grid without the atom matrix, or ``None`` if not applicable. The
+        evaluator is created on first access."""
+        if not self._evaluator_created:
+            if self._enable_fft:
+                self._evaluator = ULAFFTSpectrumEvaluator.create(
+                    self._array, self._wavelength, self._search_grid
+                )
+            if self._evaluator is None and self._enable_separable:
+                self._evaluator = SeparableSpectrumEvaluator.create(
+                    self._array, self._wavelength, self._search_grid
+                )
+            self._evaluator_created = True
+        return self._evaluator
     
     def _compute_atom_matrix(self, grid):
         """Computes the atom matrix for spectrum computation.
@@ -91,8 +329,20 @@ class SpectrumBasedEstimatorBase(ABC):
             grid: The search grid used to generate the atom matrix.
         """
         # Default implementation: steering matrix.
+        return self._compute_atom_matrix_at(grid.source_placement)
+
+    def _compute_atom_matrix_at(self, sources):
+        """Computes the atom matrix for the given source placement.
+
+        Used by the grid refinement process where the refined grids of all
+        estimates are stacked into a single source placement. The default
+        implementation creates the steering matrix.
+
+        Args:
+            sources: The source placement used to generate the atom matrix.
+        """
         return self._array.steering_matrix(
-            grid.source_placement, self._wavelength,
+            sources, self._wavelength,
             perturbations='known'
         )
 
@@ -112,13 +362,189 @@ class SpectrumBasedEstimatorBase(ABC):
         # Check cached version of the default search grid if possible.
         if self._atom_matrix is not None:
             return self._atom_matrix
-        A = self._compute_atom_matrix(self._search_grid)
+        if self._atom_cache is not None:
+            A = self._atom_cache.get_or_compute(
+                self._get_atom_cache_key(),
+                lambda: self._compute_atom_matrix(self._search_grid)
+            )
+        else:
+            A = self._compute_atom_matrix(self._search_grid)
         if self._enable_caching:
             self._atom_matrix = A
         return A
 
+    def _get_atom_cache_key_extra(self):
+        """Retrieves the additional items that identify the atom matrix when
+        computing the key for the on-disk cache.
+
+        By default, the qualified name of the implementation of
+        `_compute_atom_matrix` is used so that estimators sharing the same
+        atom matrix (e.g., the steering matrix) share the same cache entry.
+        Subclasses whose atom matrices depend on additional parameters should
+        extend this tuple.
+        """
+        return (type(self)._compute_atom_matrix.__qualname__,)
+
+    def _get_atom_cache_key(self):
+        """Computes the key of the atom matrix for the on-disk cache."""
+        return compute_atom_cache_key(
+            self._array, self._wavelength, self._search_grid,
+            self._get_atom_cache_key_extra()
+        )
+
+    def _is_chunked(self):
+        """Checks if the full atom matrix exceeds the memory budget."""
+        if self._max_atom_bytes is None:
+            return False
+        if self._atom_column_bytes is None:
+            A = self._compute_atom_matrix_at(self._search_grid.source_placement[:1])
+            self._atom_column_bytes = A.nbytes
+        return self._atom_column_bytes * self._search_grid.size > self._max_atom_bytes
+
+    def _get_atom_tiles(self):
+        """Retrieves the tiles of the atom matrix used in the chunked mode.
+
+        Returns:
+            A list of `(slice, A)` pairs, where `slice` specifies the range of
+            the flattened grid indices covered by the tile and `A` is the
+            cached tile or None if the tile is not cached.
+        """
+        if self._atom_tiles is not None:
+            return self._atom_tiles
+        max_tile_bytes = min(ATOM_TILE_BYTES, self._max_atom_bytes // 4)
+        n_cols = max(1, max_tile_bytes // self._atom_column_bytes)
+        tile_bytes = n_cols * self._atom_column_bytes
+        # Leave room for a working tile.
+        n_cached = 0
+        if self._enable_caching:
+            n_cached = max(0, (self._max_atom_bytes - tile_bytes) // tile_bytes)
+        tiles = []
+        sources = self._search_grid.source_placement
+        for i, start in enumerate(range(0, self._search_grid.size, n_cols)):
+            sl = slice(start, start + n_cols)
+            A = self._compute_atom_matrix_at(sources[sl]) if i < n_cached else None
+            tiles.append((sl, A))
+        self._atom_tiles = tiles
+        return tiles
+
+    def _get_atom_columns(self, indices):
+        """Retrieves the atoms of the specified grid points.
+
+        Args:
+            indices: A 1D array of the flattened indices of the grid points.
+        """
+        if self._is_chunked():
+            return self._compute_atom_matrix_at(
+                self._search_grid.source_placement[indices]
+            )
+        return self._get_atom_matrix()[:, indices]
+
+    def _eval_spectrum(self, f_sp):
+        """Evaluates the spectrum over the default search grid.
+
+        In the chunked mode, the atom matrix is streamed through `f_sp` tile by
+        tile.
+
+        Args:
+            f_sp: A callable object that accepts the atom matrix as the
+                parameter and returns the computed spectrum values along the
+                last axis.
+
+        Returns:
+            ndarray: The spectrum with the grid points along the last axis,
+            which is not reshaped.
+        """
+        if not self._is_chunked():
+            return f_sp(self._get_atom_matrix())
+        sources = self._search_grid.source_placement
+        sp = None
+        for sl, A in self._get_atom_tiles():
+            if A is None:
+                A = self._compute_atom_matrix_at(sources[sl])
+            sp_tile = f_sp(A)
+            if sp is None:
+                sp = np.empty(sp_tile.shape[:-1] + (self._search_grid.size,),
+                              dtype=sp_tile.dtype)
+            sp[..., sl] = sp_tile
+        return sp
+
+    def _get_coarse_indices(self):
+        """Retrieves the flattened indices of the coarse grid points within the
+        default search grid, and the shape of the coarse grid."""
+        if self._coarse_indices is None:
+            shape = self._search_grid.shape
+            sub_indices = [np.arange(0, n, f)
+                           for n, f in zip(shape, self._coarse_decimation)]
+            indices = np.ravel_multi_index(
+                np.meshgrid(*sub_indices, indexing='ij'), shape
+            )
+            self._coarse_indices = indices.flatten(), indices.shape
+        return self._coarse_indices
+
+    def _get_coarse_atom_matrix(self):
+        """Retrieves the atom matrix of the coarse grid."""
+        if self._coarse_atom_matrix is not None:
+            return self._coarse_atom_matrix
+        indices, _ = self._get_coarse_indices()
+        A = self._get_atom_columns(indices)
+        if self._enable_caching and (self._max_atom_bytes is None or
+                                     A.nbytes <= self._max_atom_bytes):
+            self._coarse_atom_matrix = A
+        return A
+
+    def _search_coarse_to_fine(self, f_sp, k):
+        """Evaluates the spectrum and locates the peaks using the coarse-to-fine
+        search strategy.
+
+        Args:
+            f_sp: A callable object that accepts the atom matrix as the
+                parameter and return a 1D numpy array representing the computed
+                spectrum.
+            k (int): Expected number of sources.
+
+        Returns:
+            sp (ndarray): The spectrum with the same shape as the search grid.
+                Grid points that are not evaluated are set to NaN.
+            peak_indices (tuple): A tuple of indices arrays representing the
+                peak locations on the search grid.
+        """
+        shape = self._search_grid.shape
+        # Coarse level.
+        coarse_indices, coarse_shape = self._get_coarse_indices()
+        sp_coarse = f_sp(self._get_coarse_atom_matrix()).reshape(coarse_shape)
+        coarse_peaks = self._peak_finder(sp_coarse)
+        n_peaks = len(coarse_peaks[0])
+        if n_peaks >= k:
+            # Keep more candidates than needed to guard against the cases
+            # where the coarse grid misses the true peaks.
+            top_indices = np.argsort(sp_coarse[coarse_peaks])[-2*k:]
+            mask = np.zeros(shape, dtype=np.bool_)
+            for i in top_indices:
+                region = []
+                for j, f in enumerate(self._coarse_decimation):
+                    c = coarse_peaks[j][i] * f
+                    region.append(slice(max(0, c - f), c + f + 1))
+                mask[tuple(region)] = True
+            # Fine level.
+            indices = np.flatnonzero(mask)
+            sp = np.full((self._search_grid.size,), np.nan)
+            sp[indices] = f_sp(self._get_atom_columns(indices))
+            sp = sp.reshape(shape)
+            peak_indices = self._peak_finder(np.where(mask, sp, -np.inf))
+            # Peaks located next to unevaluated grid points are not reliable.
+            interior = binary_erosion(
+                mask, np.ones((3,) * len(shape), dtype=np.bool_),
+                border_value=1
+            )
+            valid = interior[peak_indices]
+            if np.count_nonzero(valid) >= k:
+                return sp, tuple(axis[valid] for axis in peak_indices)
+        # Fallback to the full search.
+        sp = self._eval_spectrum(f_sp).reshape(shape)
+        return sp, self._peak_finder(sp)
+
     def _estimate(self, f_sp, k, return_spectrum=False, refine_estimates=False,
-                  refinement_density=10, refinement_iters=3):
+                  refinement_density=10, refinement_iters=3, f_sp_grid=None):
         """
         A generic implementation of the estimation process: compute the spectrum
         -> identify the peaks -> locate the largest peaks as estimates.
@@ -141,6 +567,12 @@ class SpectrumBasedEstimatorBase(ABC):
             refinement_iters: Number of refinement iterations. More iterations
                 generally lead to better results, at the cost of increased
                 computational complexity. Default value is 3.
+            f_sp_grid: An optional callable object that accepts no parameters
+                and returns the spectrum evaluated over the search grid without
+                using the atom matrix (e.g., via FFTs). If specified, it will
+                be used in place of the full search. It is ignored in the
+                coarse-to-fine search mode. `f_sp` is still used for grid
+                refinement.
         
         Returns:
             resolved (bool): A boolean indicating if the desired number of
@@ -154,13 +586,21 @@ class SpectrumBasedEstimatorBase(ABC):
                 estimated DOAs. Will be `None` if resolved is False.
             spectrum (ndarray): A numpy array of the same shape of the
                 specified search grid, consisting of values evaluated at the
-                grid points. Only present if `return_spectrum` is True.
+                grid points. Only present if `return_spectrum` is True. In the
+                coarse-to-fine search mode, grid points that are not evaluated
+                are set to NaN.
         """
-        sp = f_sp(self._get_atom_matrix())
-        # Restores the shape of the spectrum.
-        sp = sp.reshape(self._search_grid.shape)
-        # Find peak locations.
-        peak_indices = self._peak_finder(sp)
+        if self._coarse_decimation is not None:
+            sp, peak_indices = self._search_coarse_to_fine(f_sp, k)
+        elif f_sp_grid is not None:
+            sp = f_sp_grid().reshape(self._search_grid.shape)
+            peak_indices = self._peak_finder(sp)
+        else:
+            sp = self._eval_spectrum(f_sp)
+            # Restores the shape of the spectrum.
+            sp = sp.reshape(self._search_grid.shape)
+            # Find peak locations.
+            peak_indices = self._peak_finder(sp)
         # The peak finder returns a tuple whose length is at least one. Hence
         # we can get the number of peaks by checking the length of the first
         # element in the tuple.
@@ -196,7 +636,61 @@ class SpectrumBasedEstimatorBase(ABC):
                 return True, estimates, sp
             else:
                 return True, estimates
-        
+
+    def _estimate_batch(self, f_sp, k, return_spectrum=False, f_sp_grid=None):
+        """
+        Batched version of :meth:`_estimate`.
+
+        Args:
+            f_sp: A callable object that accepts the atom matrix as the
+                parameter and return a B x G numpy array, where B is the batch
+                size and G is the size of the search grid. Each row represents
+                the spectrum computed for a single input.
+            k (int): Expected number of sources.
+            return_spectrum: Set to True to also output the spectra.
+            f_sp_grid: An optional callable object that accepts no parameters
+                and returns the B x G spectra without using the atom matrix.
+                If specified, `f_sp` will not be called.
+
+        Returns:
+            resolved (ndarray): A boolean vector of length B. ``resolved[i]``
+                indicates whether the desired number of sources are found for
+                the i-th input.
+            estimates (ndarray): A B x k (1D search grids) or B x k x d (d-D
+                search grids) array of estimated source locations, using the
+                same unit as the search grid. The rows corresponding to
+                unresolved inputs are filled with NaN.
+            spectra (ndarray): A numpy array of shape (B,) + grid shape. Only
+                present if `return_spectrum` is True.
+        """
+        grid_shape = self._search_grid.shape
+        if f_sp_grid is not None:
+            sp = f_sp_grid()
+        else:
+            sp = self._eval_spectrum(f_sp)
+        n_batch = sp.shape[0]
+        sp = sp.reshape((n_batch,) + grid_shape)
+        if self._peak_finder is find_peaks_simple:
+            peak_mask = find_peaks_simple_batch(sp)
+        else:
+            peak_mask = np.zeros(sp.shape, dtype=np.bool_)
+            for i in range(n_batch):
+                peak_mask[(i,) + tuple(self._peak_finder(sp[i]))] = True
+        peak_mask = peak_mask.reshape((n_batch, -1))
+        resolved = np.sum(peak_mask, axis=1) >= k
+        # Identify the k largest peaks for every input at once. Non-peak
+        # locations are excluded by assigning -inf.
+        masked_sp = np.where(peak_mask, sp.reshape((n_batch, -1)), -np.inf)
+        flattened_indices = np.argsort(masked_sp, axis=1)[:, -k:]
+        flattened_indices.sort(axis=1)
+        locations = self._search_grid.source_placement.locations
+        estimates = locations[flattened_indices]
+        estimates[~resolved] = np.nan
+        if return_spectrum:
+            return resolved, estimates, sp
+        else:
+            return resolved, estimates
+
     def _refine_estimates(self, f_sp, est0, peak_indices, density=10, n_iters=3):
         """Refines the estimates.
         
@@ -205,6 +699,9 @@ class SpectrumBasedEstimatorBase(ABC):
         will be located to update the i-th estimate. This process is repeated
         several times.
 
+        The refined grids of all the estimates are stacked together so that
+        the spectrum function is evaluated only once per iteration.
+
         Args:
             f_sp: A callable object that accepts the steering matrix as the
                 parameter and return a 1D numpy array representing the computed
@@ -217,19 +714,31 @@ class SpectrumBasedEstimatorBase(ABC):
         """
         # We modify the estimated locations **in-place** here.
         locations = est0.locations
-        # Create initial refined grids.
-        subgrids = self._search_grid.create_refined_grids_at(*peak_indices, density=density)
+        grid = self._search_grid
+        # Create the axes of the initial refined grids.
+        axes_list = [grid.create_refined_axes_at(coord, density, 1)
+                     for coord in zip(*peak_indices)]
+        k = len(axes_list)
         for r in range(n_iters):
-            for i in range(len(subgrids)):
-                g = subgrids[i]
-                # Refine the i-th estimate.
-                A = self._get_atom_matrix(g)
-                sp = f_sp(A)
-                i_max = sp.argmax() # argmax for the flattened spectrum.
-                # Update the initial estimates in-place.
-                locations[i] = g.source_placement[i_max]
-                if r == n_iters - 1:
-                    continue
-                # Continue to create finer grids.
-                peak_coord = np.unravel_index(i_max, g.shape)
-                subgrids[i] = g.create_refined_grid_at(peak_coord, density=density)
+            shapes = [tuple(len(ax) for ax in axes) for axes in axes_list]
+            sizes = np.array([np.prod(shape) for shape in shapes])
+            offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+            # Evaluate the spectrum over all refined grids at once.
+            sources = grid.create_stacked_source_placement(axes_list)
+            sp = f_sp(self._compute_atom_matrix_at(sources))
+            # Find the argmax within each segment. Segments may have different
+            # lengths near the boundaries of the search grid so we pad them.
+            sp_padded = np.full((k, sizes.max()), -np.inf)
+            col_indices = np.arange(sizes.max())
+            valid = col_indices < sizes[:, np.newaxis]
+            sp_padded[valid] = sp
+            i_max = sp_padded.argmax(axis=1)
+            # Update the initial estimates in-place.
+            locations[:] = sources.locations[offsets + i_max]
+            if r == n_iters - 1:
+                continue
+            # Continue to create finer grids.
+            for i in range(k):
+                peak_coord = np.unravel_index(i_max[i], shapes[i])
+                axes_list[i] = refine_axes_at(axes_list[i], peak_coord,
+                                              density, 1)
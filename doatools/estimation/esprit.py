@@ -1,6 +1,7 @@
 import numpy as np
-from ..model.sources import FarField1DSourcePlacement
-from .core import ensure_n_resolvable_sources
+from ..model.sources import FarField1DSourcePlacement, FarField2DSourcePlacement
+from .core import ensure_n_resolvable_sources, get_signal_subspace
+from .subspace_tracking import SubspaceTracker
 
 def get_default_row_weights(m):
     """Gets the default row weights for the ESPRIT estimator.
@@ -24,6 +25,9 @@ class Esprit1D:
     
     Args:
         wavelength (float): Wavelength of the carrier wave.
+        subspace_method (str): Method used to compute the signal subspace.
+            See :meth:`~doatools.estimation.core.get_signal_subspace`.
+            Default value is ``'auto'``.
 
     References:
         [1] R. Roy and T. Kailath, "ESPRIT-estimation of signal parameters via
@@ -32,18 +36,27 @@ class Esprit1D:
         Jul. 1989.
         
         [2] H. L. Van Trees, Optimum array processing. New York: Wiley, 2002.
+
+        [3] M. Haardt and J. A. Nossek, "Unitary ESPRIT: how to obtain
+        increased estimation accuracy with a reduced computational burden,"
+        IEEE Transactions on Signal Processing, vol. 43, no. 5,
+        pp. 1232-1242, May 1995.
     """
 
-    def __init__(self, wavelength):
+    def __init__(self, wavelength, subspace_method='auto'):
         self._wavelength = wavelength
+        self._subspace_method = subspace_method
 
     def estimate(self, R, k, d0=None, displacement=1, formulation='ls',
-                 row_weights='default', unit='rad'):
+                 row_weights='default', unit='rad', unitary=False):
         r"""Estimate the direction-of-arrivals (DOAs) using ESPRIT.
 
         Args:
             R (~numpy.ndarray): Covariance matrix input. This covariance matrix
-                must be obtained using a uniform linear array.
+                must be obtained using a uniform linear array. Can also be a
+                :class:`~doatools.estimation.subspace_tracking.SubspaceTracker`
+                fed with the snapshots of a uniform linear array, which is not
+                supported in the unitary mode.
             
             k (int): Expected number of sources.
 
@@ -81,6 +94,15 @@ class Esprit1D:
                 :class:`~doatools.model.sources.FarField1DSourcePlacement` for
                 more details on valid units.
 
+            unitary (bool): Set to ``True`` to use unitary ESPRIT [3], which
+                transforms the forward-backward averaged covariance matrix into
+                a real symmetric matrix with a unitary transform so that the
+                subspace decomposition and the estimation of the rotation
+                matrix are carried out in real arithmetic. Forward-backward
+                averaging doubles the effective number of snapshots and
+                decorrelates pairs of coherent sources. Custom row weights must
+                be symmetric in this mode. Default value is ``False``.
+
         Returns:
             A tuple with the following elements.
 
@@ -94,52 +116,312 @@ class Esprit1D:
               recording the estimated source locations. Will be ``None`` if
               resolved is ``False``.
         """
-        m = R.shape[0]
+        if isinstance(R, SubspaceTracker):
+            if unitary:
+                raise ValueError('Subspace trackers are not supported in the unitary mode.')
+        elif R.ndim != 2 or R.shape[0] != R.shape[1]:
+            raise ValueError('R should be a square matrix.')
+        if d0 is None:
+            d0 = self._wavelength / 2.0
+        Rs = R if isinstance(R, SubspaceTracker) else R[np.newaxis]
+        z = self._estimate_z(Rs, k, displacement, formulation, row_weights,
+                             unitary)
+        return True, FarField1DSourcePlacement.from_z(z[0], self._wavelength, d0 * displacement, unit)
+
+    def estimate_batch(self, Rs, k, d0=None, displacement=1, formulation='ls',
+                       row_weights='default', unit='rad', unitary=False):
+        """Estimates the direction-of-arrivals (DOAs) from a stack of
+        covariance matrices using ESPRIT.
+
+        This is equivalent to calling :meth:`estimate` for each covariance
+        matrix, but the eigendecompositions, the estimation of the rotation
+        matrices, and the final eigenvalue computations are all performed over
+        the whole batch at once.
+
+        Args:
+            Rs (~numpy.ndarray): A B x M x M stack of covariance matrices
+                obtained using a uniform linear array.
+            k (int): Expected number of sources.
+            d0 (float): Inter-element spacing of the uniform linear array. See
+                :meth:`estimate`.
+            displacement (int): See :meth:`estimate`.
+            formulation (str): See :meth:`estimate`.
+            row_weights (str or ~numpy.ndarray): See :meth:`estimate`.
+            unit (str): Unit of the estimates. Default value is ``'rad'``.
+            unitary (bool): See :meth:`estimate`.
+
+        Returns:
+            A tuple with the following elements.
+
+            * resolved (:class:`~numpy.ndarray`): A boolean vector of length B
+              indicating whether all the ``k`` estimates are finite for each
+              covariance matrix.
+            * estimates (:class:`~numpy.ndarray`): A B x k array of the
+              estimated source locations sorted in ascending order. Rows
+              corresponding to unresolved inputs are filled with NaN.
+        """
+        if Rs.ndim != 3 or Rs.shape[1] != Rs.shape[2]:
+            raise ValueError('Expecting a B x M x M stack of matrices.')
+        if unit not in ['rad', 'deg', 'sin']:
+            raise ValueError("Unit must be one of 'rad', 'deg', or 'sin'.")
+        if d0 is None:
+            d0 = self._wavelength / 2.0
+        z = self._estimate_z(Rs, k, displacement, formulation, row_weights,
+                             unitary)
+        # Same conversion as FarField1DSourcePlacement.from_z.
+        sin_vals = np.angle(z) / (2 * np.pi * d0 * displacement / self._wavelength)
+        if unit == 'sin':
+            locations = sin_vals
+        else:
+            with np.errstate(invalid='ignore'):
+                locations = np.arcsin(sin_vals)
+            if unit == 'deg':
+                locations = np.rad2deg(locations)
+        locations.sort(axis=1)
+        resolved = np.all(np.isfinite(locations), axis=1)
+        locations[~resolved] = np.nan
+        return resolved, locations
+
+    def _estimate_z(self, Rs, k, displacement, formulation, row_weights,
+                    unitary):
+        """Estimates the phase shifts between the two subarrays.
+
+        Args:
+            Rs: A B x M x M stack of covariance matrices, or a subspace
+                tracker (in which case B = 1).
+
+        Returns:
+            A B x k complex matrix whose i-th row consists of the eigenvalues
+            of the i-th estimated rotation matrix.
+        """
+        m = Rs.size if isinstance(Rs, SubspaceTracker) else Rs.shape[1]
         if displacement < 1:
             raise ValueError('Displacement must be a non-negative integer.')
         m_reduced = m - displacement
         ensure_n_resolvable_sources(k, m_reduced)
+        if formulation not in ['ls', 'tls']:
+            raise ValueError("Formulation must be either 'ls' or 'tls'.")
+        row_weights = _get_row_weights(row_weights, m_reduced)
+        if not unitary:
+            # Extract the signal subspace.
+            Es = get_signal_subspace(Rs, k, self._subspace_method)
+            if Es.ndim == 2:
+                Es = Es[np.newaxis]
+            # Separation
+            Es1 = Es[:, :-displacement, :]
+            Es2 = Es[:, displacement:, :]
+            # Apply row weights.
+            if row_weights is not None:
+                Es1 = Es1 * row_weights[:, np.newaxis]
+                Es2 = Es2 * row_weights[:, np.newaxis]
+            return np.linalg.eigvals(_estimate_rotation(Es1, Es2, formulation))
+        if row_weights is not None and not np.allclose(row_weights, row_weights[::-1]):
+            raise ValueError('Row weights must be symmetric in the unitary mode.')
+        # Transform the forward-backward averaged covariance matrices into
+        # real symmetric matrices: Re(Q^H R Q) = Q^H (R + J R^* J) Q / 2.
+        Q = _get_unitary_matrix(m)
+        Es = get_signal_subspace((Q.conj().T @ Rs @ Q).real, k, self._subspace_method)
+        # Real-valued selection matrices: K1 = Re(S), K2 = Im(S). They satisfy
+        # tan(mu/2) K1 d(mu) = K2 d(mu) for the transformed steering vectors
+        # d(mu).
+        S = _get_unitary_selection_matrix(m, displacement, row_weights)
+        Y = _estimate_rotation(S.real @ Es, S.imag @ Es, formulation)
+        return _tan_to_z(np.linalg.eigvals(Y).real)
+
+class Esprit2D:
+    r"""Creates a 2D ESPRIT estimator for uniform rectangular arrays.
+
+    The shift-invariance along both grid axes of a
+    :class:`~doatools.model.arrays.UniformRectangularArray` is exploited to
+    obtain two rotation matrices :math:`\mathbf{\Phi}_x` and
+    :math:`\mathbf{\Phi}_y` from the same signal subspace. Both rotation
+    matrices share the same eigenvectors, which are estimated from the
+    eigendecomposition of :math:`\mathbf{\Phi}_x + j\mathbf{\Phi}_y`. The
+    phase shifts along the two axes are then obtained from the diagonals of
+    the jointly diagonalized rotation matrices, so that they are automatically
+    paired without any spectrum search.
+
+    Because the URA lies in the xy-plane, the sign of the elevation angles
+    cannot be determined. The estimated elevation angles are always
+    non-negative.
+
+    Args:
+        wavelength (float): Wavelength of the carrier wave.
+        subspace_method (str): Method used to compute the signal subspace.
+            See :meth:`~doatools.estimation.core.get_signal_subspace`.
+            Default value is ``'auto'``.
+
+    References:
+        [1] M. D. Zoltowski, M. Haardt and C. P. Mathews, "Closed-form 2-D
+        angle estimation with rectangular arrays in element space or beamspace
+        via unitary ESPRIT," IEEE Transactions on Signal Processing, vol. 44,
+        no. 2, pp. 316-328, Feb. 1996.
+
+        [2] H. L. Van Trees, Optimum array processing. New York: Wiley, 2002.
+    """
+
+    def __init__(self, wavelength, subspace_method='auto'):
+        self._wavelength = wavelength
+        self._subspace_method = subspace_method
+
+    def estimate(self, R, k, shape, d0=None, formulation='ls', unit='rad',
+                 unitary=False):
+        r"""Estimates the azimuth and elevation angles using 2D ESPRIT.
+
+        Args:
+            R (~numpy.ndarray): Covariance matrix input. This covariance matrix
+                must be obtained using a uniform rectangular array whose
+                elements are ordered in the same way as
+                :class:`~doatools.model.arrays.UniformRectangularArray`.
+            k (int): Expected number of sources.
+            shape (tuple): A two-element tuple ``(m, n)`` specifying the number
+                of elements along the x-axis and the y-axis, respectively.
+            d0 (float or list-like): Inter-element spacing(s) of the uniform
+                rectangular array. Can be either a scalar or a two-element
+                list-like object. If not specified, it will be set to one
+                half of the ``wavelength`` used when creating this estimator.
+                Default value is ``None``.
+            formulation (str): Method used to estimate the rotation matrices.
+                Either ``'tls'`` (Total Lease Squares) or ``'ls'``
+                (Least Squares). Default value is ``'ls'``.
+            unit (str): Unit of the estimates. Can be ``'rad'`` or ``'deg'``.
+                Default value is ``'rad'``.
+            unitary (bool): Set to ``True`` to use 2D unitary ESPRIT [1], where
+                the subspace decomposition and the estimation of the rotation
+                matrices are carried out in real arithmetic. See
+                :meth:`Esprit1D.estimate`. Default value is ``False``.
+
+        Returns:
+            A tuple with the following elements.
+
+            * resolved (:class:`bool`): ``True`` only if the estimated phase
+              shifts are finite. This flag does **not** guarantee that the
+              estimated source locations are correct. If resolved is False,
+              ``estimates`` will be ``None``.
+            * estimates (:class:`~doatools.model.sources.FarField2DSourcePlacement`):
+              A :class:`~doatools.model.sources.FarField2DSourcePlacement`
+              recording the estimated source locations sorted by the azimuth
+              angles. Will be ``None`` if resolved is ``False``.
+        """
+        if len(shape) != 2:
+            raise ValueError('Expecting a two-element shape.')
+        m, n = shape
+        if R.ndim != 2 or R.shape[0] != m * n or R.shape[1] != m * n:
+            raise ValueError(
+                'Expecting a {0}x{0} covariance matrix.'.format(m * n)
+            )
+        if m < 2 or n < 2:
+            raise ValueError('At least two elements are required along each axis.')
+        ensure_n_resolvable_sources(k, min((m - 1) * n, m * (n - 1)))
+        if formulation not in ['ls', 'tls']:
+            raise ValueError("Formulation must be either 'ls' or 'tls'.")
+        if unit not in ['rad', 'deg']:
+            raise ValueError("Unit must be either 'rad' or 'deg'.")
         if d0 is None:
             d0 = self._wavelength / 2.0
-        if isinstance(row_weights, str):
-            if row_weights == 'none':
-                row_weights = None
-            elif row_weights == 'default':
-                row_weights = get_default_row_weights(m_reduced)
-            else:
-                raise ValueError("When specified using a string, row weights must be either 'none' or 'default'.")
-        elif isinstance(row_weights, np.ndarray):
-            if row_weights.ndim != 1 or row_weights.size != m_reduced:
-                raise ValueError('Row weights must be a vector of length {0}.'.format(m_reduced))
-        else:
-            raise ValueError("Row weights must be 'default', 'none', or a compatible numpy vector.")
-        # Extract the signal subspace.
-        _, E = np.linalg.eigh(R)
-        Es = E[:, -k:]
-        # Separation
-        Es1 = Es[:-displacement, :]
-        Es2 = Es[displacement:, :]
-        # Apply row weights.
-        if row_weights is not None:
-            Es1 *= row_weights[:, np.newaxis]
-            Es2 *= row_weights[:, np.newaxis]
-        # Estimate the rotation matrix.
-        if formulation == 'tls':
-            # Total least-squares
-            C = np.hstack((Es1, Es2))
-            C = C.conj().T @ C
-            _, V = np.linalg.eigh(C)
-            V = np.fliplr(V) # Now in descending order
-            V12 = V[:k, k:]
-            V22 = V[k:, k:]
-            # Phi = -V12 V22^{-1}
-            Phi = -np.linalg.solve(V22.T, V12.T).T
-        elif formulation == 'ls':
-            # Least-squares
-            Es1_H = Es1.conj().T
-            Phi = np.linalg.solve(Es1_H @ Es1, Es1_H @ Es2)
+        d0 = np.broadcast_to(np.asarray(d0, dtype=np.float_), (2,))
+        if unitary:
+            # The array manifold of the URA is the Kronecker product of those
+            # of two ULAs so the unitary transform and the selection matrices
+            # can be constructed with Kronecker products.
+            Q = np.kron(_get_unitary_matrix(m), _get_unitary_matrix(n))
+            Es = get_signal_subspace((Q.conj().T @ R @ Q).real, k, self._subspace_method)
+            Sx = np.kron(_get_unitary_selection_matrix(m, 1), np.eye(n))
+            Sy = np.kron(np.eye(m), _get_unitary_selection_matrix(n, 1))
+            Yx = _estimate_rotation(Sx.real @ Es, Sx.imag @ Es, formulation)
+            Yy = _estimate_rotation(Sy.real @ Es, Sy.imag @ Es, formulation)
+            # For real Yx and Yy, the eigenvalues of Yx + j Yy are given by
+            # tan(mu_x/2) + j tan(mu_y/2) [1].
+            w = np.linalg.eigvals(Yx + 1j * Yy)
+            zx = _tan_to_z(w.real)
+            zy = _tan_to_z(w.imag)
         else:
-            raise ValueError("Formulation must be either 'ls' or 'tls'.")
-        # Recover the DOAs.
-        z = np.linalg.eigvals(Phi)
-        return True, FarField1DSourcePlacement.from_z(z, self._wavelength, d0 * displacement, unit)
+            Es = get_signal_subspace(R, k, self._subspace_method).reshape((m, n, k))
+            Phi_x = _estimate_rotation(Es[:-1, :, :].reshape((-1, k)),
+                                       Es[1:, :, :].reshape((-1, k)),
+                                       formulation)
+            Phi_y = _estimate_rotation(Es[:, :-1, :].reshape((-1, k)),
+                                       Es[:, 1:, :].reshape((-1, k)),
+                                       formulation)
+            # Joint diagonalization with the eigenvectors of a linear
+            # combination of the two rotation matrices.
+            _, T = np.linalg.eig(Phi_x + 1j * Phi_y)
+            try:
+                T_inv = np.linalg.inv(T)
+            except np.linalg.LinAlgError:
+                return False, None
+            zx = np.einsum('ij,ji->i', T_inv, Phi_x @ T)
+            zy = np.einsum('ij,ji->i', T_inv, Phi_y @ T)
+        if not np.all(np.isfinite(zx)) or not np.all(np.isfinite(zy)):
+            return False, None
+        # Direction cosines
+        u = np.angle(zx) / (2 * np.pi * d0[0] / self._wavelength)
+        v = np.angle(zy) / (2 * np.pi * d0[1] / self._wavelength)
+        az = np.arctan2(v, u)
+        # Noise may push the estimates slightly outside the visible region.
+        el = np.arccos(np.minimum(np.hypot(u, v), 1.0))
+        locations = np.column_stack((az, el))
+        locations = locations[np.argsort(az)]
+        if unit == 'deg':
+            locations = np.rad2deg(locations)
+        return True, FarField2DSourcePlacement(locations, unit)
+
+def _get_row_weights(row_weights, m):
+    """Validates the row weights and converts them into a vector (or ``None``
+    if row weighting is disabled)."""
+    if isinstance(row_weights, str):
+        if row_weights == 'none':
+            return None
+        if row_weights == 'default':
+            return get_default_row_weights(m)
+        raise ValueError("When specified using a string, row weights must be either 'none' or 'default'.")
+    if isinstance(row_weights, np.ndarray):
+        if row_weights.ndim != 1 or row_weights.size != m:
+            raise ValueError('Row weights must be a vector of length {0}.'.format(m))
+        return row_weights
+    raise ValueError("Row weights must be 'default', 'none', or a compatible numpy vector.")
+
+def _get_unitary_matrix(m):
+    r"""Creates the m x m sparse unitary left :math:`\Pi`-real matrix used to
+    transform centro-Hermitian matrices into real ones."""
+    n = m // 2
+    I = np.eye(n)
+    J = np.fliplr(I)
+    Q = np.zeros((m, m), dtype=np.complex_)
+    Q[:n, :n] = I
+    Q[:n, m - n:] = 1j * I
+    Q[m - n:, :n] = J
+    Q[m - n:, m - n:] = -1j * J
+    if m % 2 == 1:
+        Q[n, n] = np.sqrt(2)
+    return Q / np.sqrt(2)
+
+def _get_unitary_selection_matrix(m, displacement, row_weights=None):
+    """Computes S = Q_r^H W J_2 Q, whose real and imaginary parts are the real
+    valued selection matrices used in unitary ESPRIT."""
+    S = _get_unitary_matrix(m)[displacement:, :]
+    if row_weights is not None:
+        S = S * row_weights[:, np.newaxis]
+    return _get_unitary_matrix(m - displacement).conj().T @ S
+
+def _tan_to_z(w):
+    """Converts tan(mu/2) to the phase shifts exp(j mu)."""
+    return (1 + 1j * w) / (1 - 1j * w)
+
+def _estimate_rotation(Es1, Es2, formulation):
+    """Estimates the rotation matrices Phi such that Es1 Phi = Es2 for a stack
+    of subarray signal subspaces."""
+    k = Es1.shape[-1]
+    if formulation == 'tls':
+        # Total least-squares
+        C = np.concatenate((Es1, Es2), axis=-1)
+        C = C.conj().swapaxes(-1, -2) @ C
+        _, V = np.linalg.eigh(C)
+        V = V[..., ::-1] # Now in descending order
+        V12 = V[..., :k, k:]
+        V22 = V[..., k:, k:]
+        # Phi = -V12 V22^{-1}
+        return -np.linalg.solve(V22.swapaxes(-1, -2), V12.swapaxes(-1, -2)).swapaxes(-1, -2)
+    # Least-squares
+    Es1_H = Es1.conj().swapaxes(-1, -2)
+    return np.linalg.solve(Es1_H @ Es1, Es1_H @ Es2)
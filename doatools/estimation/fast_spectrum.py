@@ -0,0 +1,356 @@
+import numpy as np
+from ..model.arrays import UniformLinearArray, GridBasedArrayDesign
+from .grid import FarField1DSearchGrid
+
+class ULAFFTSpectrumEvaluator:
+    r"""Evaluates spectra over a sine-uniform grid with FFTs.
+
+    Consider an :math:`M`-element uniform linear array with inter-element
+    spacing :math:`d_0` and a 1D far-field search grid whose grid points are
+    uniformly spaced in the sine domain:
+    :math:`u_g = u_0 + g\Delta u, g = 0, 1, \ldots, G - 1`. The :math:`m`-th
+    element of the steering vector at :math:`u_g` is given by
+
+    .. math::
+
+        a_m(u_g) = e^{j c m u_0} e^{j 2\pi m g / N},
+
+    where :math:`c = 2\pi d_0 / \lambda` and :math:`N = \lambda/(d_0\Delta u)`.
+    When :math:`N` is an integer, the inner products between any vector and
+    all steering vectors on the grid can be computed with a single
+    :math:`N`-point FFT, without creating the steering matrix.
+
+    Use :meth:`create` to create an instance, which checks if the array design
+    and the search grid satisfy the requirements above.
+
+    Args:
+        m (int): Number of sensors.
+        n_fft (int): Size of the FFT, :math:`N`.
+        c (float): :math:`2\pi d_0 / \lambda`.
+        u0 (float): The first grid point in the sine domain.
+        n_grid (int): Number of grid points, :math:`G`.
+    """
+
+    def __init__(self, m, n_fft, c, u0, n_grid):
+        self._m = m
+        self._n_fft = n_fft
+        self._n_grid = n_grid
+        # Linear phase term that shifts the first grid point to zero.
+        self._phase = np.exp(-1j * c * u0 * np.arange(m))
+        # Phase terms for the difference coarray, used by quadratic forms.
+        self._phase_diff = np.exp(1j * c * u0 * np.arange(-m + 1, m))
+        self._diff_indices = (
+            np.arange(m)[np.newaxis, :] - np.arange(m)[:, np.newaxis] + m - 1
+        ).flatten()
+        # Grid points beyond N wrap around because the DFT is periodic.
+        self._grid_indices = np.arange(n_grid) % n_fft
+
+    @staticmethod
+    def create(array, wavelength, search_grid, rtol=1e-8):
+        r"""Creates an FFT spectrum evaluator if applicable.
+
+        The following requirements must be satisfied:
+
+        1. ``array`` is a
+           :class:`~doatools.model.arrays.UniformLinearArray` of isotropic
+           scalar sensors without known perturbations.
+        2. ``search_grid`` is a
+           :class:`~doatools.estimation.grid.FarField1DSearchGrid` using the
+           ``'sin'`` unit whose grid points are uniformly spaced.
+        3. :math:`\lambda/(d_0\Delta u)` is an integer, where :math:`\Delta u`
+           is the grid spacing.
+
+        Args:
+            array (~doatools.model.arrays.ArrayDesign): Array design.
+            wavelength (float): Wavelength of the carrier wave.
+            search_grid (~doatools.estimation.grid.SearchGrid): Search grid.
+            rtol (float): Relative tolerance used when checking the uniformity
+                of the grid and the FFT size. Default value is 1e-8.
+
+        Returns:
+            A :class:`ULAFFTSpectrumEvaluator` instance, or ``None`` if the
+            requirements are not satisfied.
+        """
+        if not isinstance(array, UniformLinearArray):
+            return None
+        if not array.element.is_isotropic or not array.element.is_scalar:
+            return None
+        if any(p.is_known for p in array.perturbations):
+            return None
+        if not isinstance(search_grid, FarField1DSearchGrid):
+            return None
+        if search_grid.units[0] != 'sin':
+            return None
+        u = search_grid.axes[0]
+        if u.ndim != 1 or u.size < 2:
+            return None
+        du = u[1] - u[0]
+        if du <= 0 or not np.allclose(np.diff(u), du, rtol=rtol, atol=0.0):
+            return None
+        d0 = array.d0[0]
+        n_fft = wavelength / (d0 * du)
+        n_fft_int = int(np.round(n_fft))
+        if n_fft_int < 1 or abs(n_fft - n_fft_int) > rtol * n_fft:
+            return None
+        c = 2 * np.pi * d0 / wavelength
+        return ULAFFTSpectrumEvaluator(array.size, n_fft_int, c, u[0], u.size)
+
+    def _fold(self, x, axis):
+        """Folds ``x`` along the given axis such that its length does not
+        exceed the FFT size.
+
+        This is exact because the DFT kernel is periodic with period N.
+        """
+        n = x.shape[axis]
+        if n <= self._n_fft:
+            return x
+        n_pad = -n % self._n_fft
+        x = np.moveaxis(x, axis, -1)
+        pad_width = [(0, 0)] * (x.ndim - 1) + [(0, n_pad)]
+        x = np.pad(x, pad_width, 'constant')
+        x = x.reshape(x.shape[:-1] + (-1, self._n_fft)).sum(axis=-2)
+        return np.moveaxis(x, -1, axis)
+
+    def eval_norms(self, E):
+        r"""Evaluates :math:`\|\mathbf{E}^H \mathbf{a}(u_g)\|_2^2` for all grid
+        points.
+
+        Args:
+            E (~numpy.ndarray): An M x d matrix, or a stack of M x d matrices
+                of shape (..., M, d).
+
+        Returns:
+            ~numpy.ndarray: An array of shape (..., G).
+        """
+        X = self._fold(E * self._phase[:, np.newaxis], -2)
+        V = np.fft.fft(X, self._n_fft, axis=-2)
+        V = V[..., self._grid_indices, :]
+        return np.sum(V.real**2 + V.imag**2, axis=-1)
+
+    def eval_quadratic_forms(self, R):
+        r"""Evaluates :math:`\mathbf{a}^H(u_g)\mathbf{R}\mathbf{a}(u_g)` for all
+        grid points.
+
+        The quadratic form only depends on the sums along the diagonals of
+        :math:`\mathbf{R}`, which are transformed with a single FFT.
+
+        Args:
+            R (~numpy.ndarray): An M x M matrix, or a stack of M x M matrices
+                of shape (..., M, M).
+
+        Returns:
+            ~numpy.ndarray: A real array of shape (..., G).
+        """
+        m = self._m
+        batch_shape = R.shape[:-2]
+        R = R.reshape((-1, m * m))
+        n_batch = R.shape[0]
+        # Sum along the diagonals. The l-th diagonal (l = q - p) of the i-th
+        # matrix is stored at r[i, l + m - 1].
+        indices = (self._diff_indices[np.newaxis, :] +
+                   (2 * m - 1) * np.arange(n_batch)[:, np.newaxis]).flatten()
+        n_bins = n_batch * (2 * m - 1)
+        r = np.bincount(indices, R.real.flatten(), n_bins) + \
+            1j * np.bincount(indices, R.imag.flatten(), n_bins)
+        r = r.reshape((n_batch, 2 * m - 1)) * self._phase_diff
+        # Place the negative differences at the end. The length is a multiple
+        # of N so that folding preserves the circular ordering.
+        n = -(-(2 * m - 1) // self._n_fft) * self._n_fft
+        x = np.zeros((n_batch, n), dtype=np.complex_)
+        x[:, :m] = r[:, m - 1:]
+        x[:, n - m + 1:] = r[:, :m - 1]
+        x = self._fold(x, -1)
+        sp = np.fft.ifft(x, self._n_fft, axis=-1).real * self._n_fft
+        sp = sp[:, self._grid_indices]
+        return sp.reshape(batch_shape + (self._n_grid,))
+
+class SeparableSpectrumEvaluator:
+    r"""Evaluates spectra over a search grid for grid-based arrays using the
+    separable structure of the steering vectors.
+
+    Consider a :math:`d`-dimensional grid-based array
+    (:math:`d \geq 2`) of isotropic scalar sensors and far-field sources. Let
+    :math:`\phi_i(\mathbf{\theta})` denote the phase delay associated with the
+    :math:`i`-th basis vector of the grid. The steering vector element of the
+    sensor with the grid index :math:`(n_1, \ldots, n_d)` is given by
+
+    .. math::
+
+        a_{n_1, \ldots, n_d}(\mathbf{\theta})
+        = \prod_{i=1}^d e^{j n_i \phi_i(\mathbf{\theta})}.
+
+    Only the per-axis exponentials, whose total size is proportional to the
+    sum of the grid dimensions, are computed and cached. The inner products
+    between any vector and the steering vectors are computed block by block,
+    where each block of steering vectors is formed from the per-axis
+    exponentials with multiplications only. Quadratic forms
+    :math:`\mathbf{a}^H\mathbf{R}\mathbf{a}` only depend on the sums of the
+    elements of :math:`\mathbf{R}` sharing the same index difference (lag).
+    These sums are contracted with the per-axis exponentials of the lags one
+    axis at a time, which requires much fewer operations than the direct
+    evaluation. The full atom matrix is never created.
+
+    Use :meth:`create` to create an instance.
+
+    Args:
+        indices (~numpy.ndarray): An M x d matrix of the grid indices of the
+            sensors.
+        phases (~numpy.ndarray): A d x G matrix of the phase delays associated
+            with the basis vectors of the array grid, where G is the size of
+            the search grid.
+        block_size (int): Number of search grid points processed at once,
+            which bounds the size of the intermediate results. Default value
+            is 4096.
+    """
+
+    def __init__(self, indices, phases, block_size=4096):
+        indices = indices - indices.min(axis=0)
+        self._m = indices.shape[0]
+        self._shape = tuple(indices.max(axis=0) + 1)
+        self._phases = phases
+        self._n_grid = phases.shape[1]
+        self._block_size = block_size
+        self._flat_indices = np.ravel_multi_index(indices.T, self._shape)
+        # diffs[p, q] = indices[q] - indices[p] (shifted to be non-negative).
+        self._lag_shape = tuple(2 * n - 1 for n in self._shape)
+        diffs = indices[np.newaxis, :, :] - indices[:, np.newaxis, :] + \
+            (np.array(self._shape) - 1)
+        self._lag_indices = np.ravel_multi_index(
+            diffs.reshape((-1, indices.shape[1])).T, self._lag_shape
+        )
+        self._factors = None
+        self._lag_factors = None
+
+    @staticmethod
+    def create(array, wavelength, search_grid, block_size=4096):
+        """Creates a separable spectrum evaluator if applicable.
+
+        The following requirements must be satisfied:
+
+        1. ``array`` is a multi-dimensional
+           :class:`~doatools.model.arrays.GridBasedArrayDesign` of isotropic
+           scalar sensors without known perturbations, which occupies at least
+           half of the grid points within its bounding box (e.g., a uniform
+           rectangular array).
+        2. The sources in ``search_grid`` are far-field sources.
+
+        Args:
+            array (~doatools.model.arrays.ArrayDesign): Array design.
+            wavelength (float): Wavelength of the carrier wave.
+            search_grid (~doatools.estimation.grid.SearchGrid): Search grid.
+            block_size (int): Number of search grid points processed at once.
+                Default value is 4096.
+
+        Returns:
+            A :class:`SeparableSpectrumEvaluator` instance, or ``None`` if the
+            requirements are not satisfied.
+        """
+        if not isinstance(array, GridBasedArrayDesign):
+            return None
+        if array.bases.shape[0] < 2:
+            return None
+        if not array.element.is_isotropic or not array.element.is_scalar:
+            return None
+        if any(p.is_known for p in array.perturbations):
+            return None
+        sources = search_grid.source_placement
+        if not sources.is_far_field:
+            return None
+        indices = array.element_indices
+        n_points = np.prod(indices.max(axis=0) - indices.min(axis=0) + 1)
+        if n_points > 2 * array.size:
+            return None
+        phases = sources.phase_delay_matrix(array.bases, wavelength)
+        return SeparableSpectrumEvaluator(indices, phases, block_size)
+
+    def _get_factors(self):
+        if self._factors is None:
+            self._factors = [np.exp(1j * np.outer(np.arange(n), phi))
+                             for n, phi in zip(self._shape, self._phases)]
+        return self._factors
+
+    def _get_lag_factors(self):
+        if self._lag_factors is None:
+            self._lag_factors = [np.exp(1j * np.outer(np.arange(-n + 1, n), phi))
+                                 for n, phi in zip(self._shape, self._phases)]
+        return self._lag_factors
+
+    def _atom_block(self, sl):
+        """Creates the columns of the atom matrix within the given slice of the
+        search grid from the cached per-axis exponentials."""
+        factors = self._get_factors()
+        A = factors[0][:, sl]
+        for F in factors[1:]:
+            F = F[:, sl]
+            A = (A[:, np.newaxis, :] * F[np.newaxis, :, :]).reshape((-1, F.shape[1]))
+        return A[self._flat_indices]
+
+    def _contract(self, X, factors):
+        """Computes
+        ``Y[b, g] = sum(X[b, i_1, ..., i_d] * F_1[i_1, g] * ... * F_d[i_d, g])``.
+        """
+        n_batch, n = X.shape[0], X.shape[1]
+        Y = np.empty((n_batch, self._n_grid), dtype=np.complex_)
+        # The first contraction is a matrix multiplication.
+        X = np.ascontiguousarray(X.reshape((n_batch, n, -1)).transpose(0, 2, 1))
+        for start in range(0, self._n_grid, self._block_size):
+            sl = slice(start, start + self._block_size)
+            Z = X @ factors[0][:, sl]
+            for F in factors[1:]:
+                Z = Z.reshape((n_batch, F.shape[0], -1, Z.shape[-1]))
+                Z = np.einsum('bijg,ig->bjg', Z, F[:, sl])
+            Y[:, sl] = Z[:, 0, :]
+        return Y
+
+    def eval_norms(self, E):
+        r"""Evaluates :math:`\|\mathbf{E}^H \mathbf{a}(\mathbf{\theta}_g)\|_2^2`
+        for all grid points.
+
+        The steering vectors are created block by block from the cached
+        per-axis exponentials, which requires no additional exponential
+        evaluations.
+
+        Args:
+            E (~numpy.ndarray): An M x d matrix, or a stack of M x d matrices
+                of shape (..., M, d).
+
+        Returns:
+            ~numpy.ndarray: An array of shape (..., G).
+        """
+        batch_shape = E.shape[:-2]
+        d = E.shape[-1]
+        E = E.reshape((-1, self._m, d))
+        n_batch = E.shape[0]
+        EH = E.conj().transpose(0, 2, 1).reshape((n_batch * d, self._m))
+        sp = np.empty((n_batch, self._n_grid))
+        for start in range(0, self._n_grid, self._block_size):
+            sl = slice(start, start + self._block_size)
+            V = (EH @ self._atom_block(sl)).reshape((n_batch, d, -1))
+            sp[:, sl] = np.sum(V.real**2 + V.imag**2, axis=1)
+        return sp.reshape(batch_shape + (self._n_grid,))
+
+    def eval_quadratic_forms(self, R):
+        r"""Evaluates
+        :math:`\mathbf{a}^H(\mathbf{\theta}_g)\mathbf{R}\mathbf{a}(\mathbf{\theta}_g)`
+        for all grid points.
+
+        Args:
+            R (~numpy.ndarray): An M x M matrix, or a stack of M x M matrices
+                of shape (..., M, M).
+
+        Returns:
+            ~numpy.ndarray: A real array of shape (..., G).
+        """
+        m = self._m
+        batch_shape = R.shape[:-2]
+        R = R.reshape((-1, m * m))
+        n_batch = R.shape[0]
+        n_lags = np.prod(self._lag_shape)
+        indices = (self._lag_indices[np.newaxis, :] +
+                   n_lags * np.arange(n_batch)[:, np.newaxis]).flatten()
+        n_bins = n_batch * n_lags
+        r = np.bincount(indices, R.real.flatten(), n_bins) + \
+            1j * np.bincount(indices, R.imag.flatten(), n_bins)
+        r = r.reshape((n_batch,) + self._lag_shape)
+        sp = self._contract(r, self._get_lag_factors()).real
+        return sp.reshape(batch_shape + (self._n_grid,))
@@ -1,9 +1,40 @@
 
 from abc import ABC, abstractmethod
+import copy
 import numpy as np
 from ..model.sources import FarField1DSourcePlacement, FarField2DSourcePlacement, NearField2DSourcePlacement
 from ..utils.math import cartesian
 
+def refine_axes_at(axes, coord, density, span):
+    """Creates a new set of axes by subdividing the grids around the input
+    coordinate into finer grids.
+
+    See :meth:`SearchGrid.create_refined_axes_at` for more details.
+
+    Args:
+        axes: A tuple of 1D ndarrays representing the original axes.
+        coord: A tuple of integers representing a single coordinate within
+            the grid generated by ``axes``.
+        density (int): Controls number of new intervals between two adjacent
+            points in the original grid.
+        span (int): Controls how many adjacent intervals in the original grid
+            will be considered around the point specified by ``coord`` when
+            performing the refinement.
+    
+    Returns:
+        A tuple of ndarrays representing the refined axes.
+    """
+    refined_axes = []
+    for j, ax in enumerate(axes):
+        # Lower bound and upper bound indices.
+        i_lb = max(0, coord[j] - span)
+        i_ub = min(len(ax) - 1, coord[j] + span)
+        # Convert to actual values.
+        lb = ax[i_lb]
+        ub = ax[i_ub]
+        refined_axes.append(np.linspace(lb, ub, (i_ub - i_lb) * density + 1))
+    return tuple(refined_axes)
+
 class SearchGrid(ABC):
     """Base class for all search grids. Provides standard implementation.
     
@@ -156,16 +187,7 @@ class SearchGrid(ABC):
                 'Incorrect number of coordinate elements. Expecting {0}. Got {1}.'
                 .format(self.ndim, len(coord))
             )
-        axes = []
-        for j in range(self.ndim):
-            # Lower bound and upper bound indices.
-            i_lb = max(0, coord[j] - span)
-            i_ub = min(self._shape[j] - 1, coord[j] + span)
-            # Convert to actual values.
-            lb = self._axes[j][i_lb]
-            ub = self._axes[j][i_ub]
-            axes.append(np.linspace(lb, ub, (i_ub - i_lb) * density + 1))
-        return tuple(axes)
+        return refine_axes_at(self._axes, coord, density, span)
 
     def create_refined_grids_at(self, *coords, **kwargs):
         """Creates multiple new search grids around the given coordinates.
@@ -187,6 +209,32 @@ class SearchGrid(ABC):
             A list of refined grids.
         """
         return [self.create_refined_grid_at(coord, **kwargs) for coord in zip(*coords)]
+
+    def create_stacked_source_placement(self, axes_list):
+        """Creates a single source placement from multiple sets of axes.
+
+        The source locations generated from each set of axes (ordered in the
+        same way as :attr:`source_placement`) are stacked in the order given by
+        ``axes_list``. This is useful when evaluating the spectrum over several
+        refined grids at once.
+
+        Args:
+            axes_list: A list of tuples of 1D ndarrays. Each tuple represents
+                the axes of a grid compatible with this search grid.
+
+        Returns:
+            A :class:`~doatools.model.sources.SourcePlacement` instance of the
+            same type as :attr:`source_placement`.
+        """
+        if self.ndim == 1:
+            locations = np.concatenate([axes[0] for axes in axes_list])
+        else:
+            locations = np.vstack([cartesian(*axes) for axes in axes_list])
+        # Follows the same approach as SourcePlacement.__getitem__ to create a
+        # new instance of the same type.
+        sources = copy.copy(self.source_placement)
+        sources._locations = locations
+        return sources
     
     @abstractmethod
     def create_refined_grid_at(self, coord, density, span):
@@ -1,6 +1,8 @@
 import numpy as np
 from .core import SpectrumBasedEstimatorBase, get_noise_subspace, \
-                  ensure_covariance_size, ensure_n_resolvable_sources
+                  get_signal_subspace, ensure_covariance_or_tracker_size, \
+                  ensure_covariance_batch_size, ensure_n_resolvable_sources
+from .subspace_tracking import SubspaceTracker
 from ..utils.math import abs_squared
 
 class MinNorm(SpectrumBasedEstimatorBase):
@@ -36,7 +38,9 @@ class MinNorm(SpectrumBasedEstimatorBase):
         Args:
             R (~numpy.ndarray): Covariance matrix input. The size of R must
                 match that of the array design used when creating this
-                estimator.
+                estimator. Can also be a
+                :class:`~doatools.estimation.subspace_tracking.SubspaceTracker`
+                of the same size.
             k (int): Expected number of sources.
             return_spectrum (bool): Set to ``True`` to also output the spectrum
                 for visualization. Default value if ``False``.
@@ -68,14 +72,73 @@ class MinNorm(SpectrumBasedEstimatorBase):
               at the grid points. Only present if ``return_spectrum`` is
               ``True``.
         """
-        ensure_covariance_size(R, self._array)
+        ensure_covariance_or_tracker_size(R, self._array)
         ensure_n_resolvable_sources(k, self._array.size - 1)
-        # We compute the d vector from the noise subspace.
-        # d = En c^* / |c|^2
-        En = get_noise_subspace(R, k)
-        c = En[0, :]
-        w = c.conj() / (np.linalg.norm(c, 2)**2)
-        d = (En @ w).conj()
+        if isinstance(R, SubspaceTracker):
+            # En c^* = En En^H e_1 = e_1 - Es Es^H e_1 and
+            # |c|^2 = 1 - |Es^H e_1|^2 so the noise subspace is not needed.
+            Es = get_signal_subspace(R, k)
+            v = Es @ Es[0, :].conj()
+            v[0] -= 1.0
+            d = (-v / (1.0 - np.linalg.norm(Es[0, :], 2)**2)).conj()
+        else:
+            # We compute the d vector from the noise subspace.
+            # d = En c^* / |c|^2
+            En = get_noise_subspace(R, k)
+            c = En[0, :]
+            w = c.conj() / (np.linalg.norm(c, 2)**2)
+            d = (En @ w).conj()
         # Spectrum = 1/|d^H a(\theta)|^2
         f_sp = lambda A: np.reciprocal(abs_squared(d @ A))
-        return self._estimate(f_sp, k, **kwargs)
+        f_sp_grid = None
+        if self._spectrum_evaluator is not None:
+            # d^H a = (d^*)^H a
+            f_sp_grid = lambda: np.reciprocal(
+                self._spectrum_evaluator.eval_norms(d.conj()[:, np.newaxis])
+            )
+        return self._estimate(f_sp, k, f_sp_grid=f_sp_grid, **kwargs)
+
+    def estimate_batch(self, Rs, k, return_spectrum=False):
+        """Estimates the source locations from a stack of covariance matrices.
+
+        This is equivalent to calling :meth:`estimate` for each covariance
+        matrix, but the eigendecompositions, the spectrum evaluations, and the
+        peak finding are all performed over the whole batch at once. Grid
+        refinement is not supported.
+
+        Args:
+            Rs (~numpy.ndarray): A B x M x M stack of covariance matrices,
+                where M must match the size of the array design used when
+                creating this estimator.
+            k (int): Expected number of sources.
+            return_spectrum (bool): Set to ``True`` to also output the spectra
+                for visualization. Default value if ``False``.
+
+        Returns:
+            A tuple with the following elements.
+
+            * resolved (:class:`~numpy.ndarray`): A boolean vector of length B
+              indicating whether the desired number of sources are found for
+              each covariance matrix.
+            * estimates (:class:`~numpy.ndarray`): A B x k (1D search grids) or
+              B x k x d (d-D search grids) array of the estimated source
+              locations, using the same unit as the search grid. Rows
+              corresponding to unresolved inputs are filled with NaN.
+            * spectrum (:class:`~numpy.ndarray`): An numpy array of shape
+              ``(B,) + search_grid.shape``. Only present if
+              ``return_spectrum`` is ``True``.
+        """
+        ensure_covariance_batch_size(Rs, self._array)
+        ensure_n_resolvable_sources(k, self._array.size - 1)
+        En = get_noise_subspace(Rs, k)
+        # Stack of d vectors, one per row.
+        c = En[:, 0, :]
+        w = c.conj() / (np.linalg.norm(c, 2, axis=1, keepdims=True)**2)
+        D = np.einsum('bij,bj->bi', En, w).conj()
+        f_sp = lambda A: np.reciprocal(abs_squared(D @ A))
+        f_sp_grid = None
+        if self._spectrum_evaluator is not None:
+            f_sp_grid = lambda: np.reciprocal(
+                self._spectrum_evaluator.eval_norms(D.conj()[..., np.newaxis])
+            )
+        return self._estimate_batch(f_sp, k, return_spectrum, f_sp_grid)
@@ -1,9 +1,13 @@
+import os
+import copy
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+from scipy.linalg import cho_factor, cho_solve
 from scipy.optimize import minimize
 from ..model.sources import FarField1DSourcePlacement
-from ..utils.math import projm, vec
-from .core import ensure_covariance_size, ensure_n_resolvable_sources
+from .core import ensure_covariance_size, ensure_covariance_batch_size, \
+                   ensure_n_resolvable_sources
 
 def f_nll_stouc(R, array, sources, wavelength, p, sigma):
     # log|S| + tr(S^{-1} R)
@@ -15,18 +19,161 @@ def f_nll_stouc(R, array, sources, wavelength, p, sigma):
         return np.Inf
     return logdet + np.trace(np.linalg.solve(S, R))
 
+class _ProjectionTerms:
+    r"""Evaluates the terms of the ML objective functions involving the
+    projection matrix of the steering matrix without forming any
+    :math:`M \times M` matrix.
+
+    Let :math:`\mathbf{G} = \mathbf{A}^H\mathbf{A}` and
+    :math:`\mathbf{T} = \mathbf{A}^H\mathbf{C}\mathbf{A}`, where
+    :math:`\mathbf{C}` is a Hermitian matrix given either directly or by a
+    factor :math:`\mathbf{L}` such that :math:`\mathbf{C} = \mathbf{L}\mathbf{L}^H`.
+    Then :math:`\mathbf{P}_{\mathbf{A}} = \mathbf{A}\mathbf{G}^\dagger\mathbf{A}^H`
+    and :math:`\mathrm{tr}(\mathbf{P}_{\mathbf{A}}\mathbf{C}) =
+    \mathrm{tr}(\mathbf{G}^\dagger\mathbf{T})`. :math:`\mathbf{G}^\dagger` is
+    obtained from the eigendecomposition of :math:`\mathbf{G}` so that the
+    evaluations require :math:`O(Mk^2 + k^3)` operations once
+    :math:`\mathbf{T}` is available, and remain well-defined when two sources
+    coincide.
+    """
+
+    def __init__(self, A, C=None, L=None):
+        A_H = A.conj().T
+        v, E = np.linalg.eigh(A_H @ A)
+        # Drop the numerically zero eigenvalues as pinv does.
+        keep = v > v[-1] * max(A.shape) * np.finfo(v.dtype).eps
+        self.rank = np.count_nonzero(keep)
+        # G^+ = S S^H and A S has orthonormal columns.
+        self._S = E[:, keep] / np.sqrt(v[keep])
+        if L is None:
+            self._CA = C @ A
+            self.T = A_H @ self._CA
+        else:
+            self._L = L
+            self._W = A_H @ L
+            self.T = self._W @ self._W.conj().T
+        # T_r = S^H T S, whose trace equals tr(P_A C).
+        self.T_r = self._S.conj().T @ self.T @ self._S
+
+    def solve(self, X):
+        """Evaluates G^+ X."""
+        return self._S @ (self._S.conj().T @ X)
+
+    def tr_pa(self):
+        """Evaluates tr(P_A C)."""
+        return np.real(np.trace(self.T_r))
+
+    def ac_d(self, D):
+        """Evaluates A^H C D."""
+        if hasattr(self, '_CA'):
+            return self._CA.conj().T @ D
+        return self._W @ (self._L.conj().T @ D)
+
+def _stack_gradient(gs):
+    """Arranges the derivatives with respect to each parameter of the source
+    locations in the same order as the source locations in ``x``.
+
+    If the i-th parameter of the j-th source only affects the j-th column of
+    A, the derivatives of tr(X A) and tr(A^H X) with respect to this parameter
+    can be obtained from the j-th diagonal elements of X dA_i, where dA_i is
+    the i-th derivative matrix.
+    """
+    return np.column_stack(gs).flatten()
+
+def _f_tr_ppa(A, DA, tr_c, C=None, L=None):
+    r"""Evaluates :math:`\mathrm{tr}(\mathbf{P}^\perp_{\mathbf{A}}\mathbf{C})`,
+    and also its gradient with respect to the source locations if ``DA`` is
+    not ``None``.
+
+    Because :math:`\mathrm{tr}(\mathbf{P}^\perp_{\mathbf{A}}\mathbf{C}) =
+    \mathrm{tr}(\mathbf{C}) - \mathrm{tr}(\mathbf{G}^{-1}\mathbf{T})`, the
+    derivative with respect to the i-th parameter of the j-th source is given
+    by the j-th diagonal element of :math:`-2\Re\,\mathbf{G}^{-1}
+    (\mathbf{A}^H\mathbf{C}\dot{\mathbf{A}}_i - \mathbf{T}\mathbf{G}^{-1}
+    \mathbf{A}^H\dot{\mathbf{A}}_i)`. See :class:`_ProjectionTerms`.
+    """
+    t = _ProjectionTerms(A, C, L)
+    f = tr_c - t.tr_pa()
+    if DA is None:
+        return f
+    A_H = A.conj().T
+    gs = [-2.0 * np.diag(t.solve(t.ac_d(D) - t.T @ t.solve(A_H @ D))).real
+          for D in DA]
+    return f, _stack_gradient(gs)
+
+def _f_aml(A, DA, R, m):
+    r"""Evaluates the AML objective function, and also its gradient if ``DA``
+    is not ``None``.
+
+    Let :math:`\mathbf{Q}` be an orthonormal basis of the column space of
+    :math:`\mathbf{A}`. Because the matrix inside the determinant equals
+    :math:`\mathbf{Q}(\mathbf{Q}^H\mathbf{R}\mathbf{Q})\mathbf{Q}^H +
+    s\mathbf{P}^\perp_{\mathbf{A}}`, where
+    :math:`s = \mathrm{tr}(\mathbf{P}^\perp_{\mathbf{A}}\mathbf{R})/(M-k)`,
+    the objective function is given by
+
+    .. math::
+
+        \log\det(\mathbf{Q}^H\mathbf{R}\mathbf{Q}) + (M-k)\log s.
+
+    If :math:`\mathbf{A}` has full column rank, the first term equals
+    :math:`\log\det\mathbf{T} - \log\det\mathbf{G}` (see
+    :class:`_ProjectionTerms`), whose derivative with respect to the i-th
+    parameter of the j-th source is given by the j-th diagonal element of
+    :math:`2\Re(\mathbf{T}^{-1}\mathbf{A}^H\mathbf{R}\dot{\mathbf{A}}_i -
+    \mathbf{G}^{-1}\mathbf{A}^H\dot{\mathbf{A}}_i)`.
+    """
+    k = A.shape[1]
+    inf = np.Inf if DA is None else (np.Inf, np.zeros((k * len(DA),)))
+    t = _ProjectionTerms(A, R)
+    s = (np.real(np.trace(R)) - t.tr_pa()) / (m - k)
+    if s <= 0:
+        return inf
+    try:
+        T_cho = cho_factor(t.T_r)
+    except np.linalg.LinAlgError:
+        return inf
+    f = 2.0 * np.sum(np.log(np.diag(T_cho[0]).real)) + \
+        (m - t.rank) * np.log(s)
+    if DA is None:
+        return f
+    A_H = A.conj().T
+    S = t._S
+    gs = []
+    for D in DA:
+        U = A_H @ D
+        V = t.ac_d(D)
+        # T^{-1} = S T_r^{-1} S^H
+        g = np.diag(S @ cho_solve(T_cho, S.conj().T @ V) - t.solve(U)).real - \
+            np.diag(t.solve(V - t.T @ t.solve(U))).real / s
+        gs.append(2.0 * g)
+    return f, _stack_gradient(gs)
+
 class CovarianceBasedMLEstimator(ABC):
     """Abstract base class for covariance based maximum-likelihood estimators.
     
     Args:
         array (~doatools.model.arrays.ArrayDesign): Sensor array design.
         wavelength (float): Wavelength of the carrier wave.
+        use_gradient (bool): Specifies whether the analytic gradient of the
+            negative log-likelihood function should be passed to the optimizer
+            when available. The gradient is available if the estimator
+            implements :meth:`_eval_nll_grad` and the derivatives of the
+            steering matrix can be computed for the given source type (e.g.,
+            1D far-field sources with isotropic scalar array elements).
+            Otherwise the gradient will be approximated by finite differences.
+            Default value is ``True``.
     """
 
-    def __init__(self, array, wavelength):
+    def __init__(self, array, wavelength, use_gradient=True):
         self._array = array
         self._wavelength = wavelength
+        self._use_gradient = use_gradient
         self._estimates = None
+        # Search grid and its steering matrix used by the alternating
+        # projection search.
+        self._ap_grid = None
+        self._ap_steering_matrix = None
 
     def get_last_estimates(self):
         """Retrieves the last estimates of source locations."""
@@ -73,6 +220,40 @@ class CovarianceBasedMLEstimator(ABC):
         """
         raise NotImplementedError()
 
+    def _eval_nll_grad(self, x, R, k):
+        """Evaluates the negative log-likelihood function and its gradient for
+        the given input.
+
+        The default implementation raises :class:`NotImplementedError`, in
+        which case the gradient is approximated by finite differences.
+
+        Args:
+            x (~numpy.ndarray): A vector consisting of the variables being
+                optimized. See :meth:`_eval_nll`.
+            R (~numpy.ndarray): The sample covariance matrix.
+            k (int): The number of sources.
+
+        Returns:
+            tuple: A tuple ``(f, g)``, where ``f`` is the value of the negative
+            log-likelihood function and ``g`` is a vector of the same size as
+            ``x`` storing the gradient.
+        """
+        raise NotImplementedError()
+
+    def _is_gradient_available(self, sources0):
+        """Checks if the analytic gradient can be used for the given initial
+        guess of source locations."""
+        if type(self)._eval_nll_grad is CovarianceBasedMLEstimator._eval_nll_grad:
+            return False
+        try:
+            self._array.steering_matrix(
+                sources0, self._wavelength, compute_derivatives=True,
+                perturbations='known'
+            )
+        except (ValueError, RuntimeError):
+            return False
+        return True
+
     def _prepare_opt_prob(self, sources0, R):
         """Prepares the optimization problem.
 
@@ -144,6 +325,21 @@ class CovarianceBasedMLEstimator(ABC):
             self._estimates, self._wavelength,
             perturbations='known'
         )
+
+    def _eval_steering_matrix_and_derivatives_from_x(self, x):
+        """Evaluates the steering matrix and its derivative matrices from
+        ``x``. See :meth:`_eval_steering_matrix_from_x`.
+
+        Returns:
+            tuple: A tuple ``(A, DA)``, where ``DA`` is a list of the derivative
+            matrices, one for each parameter of the source locations.
+        """
+        self._update_estimates_from_x(x)
+        A, *DA = self._array.steering_matrix(
+            self._estimates, self._wavelength, compute_derivatives=True,
+            perturbations='known'
+        )
+        return A, DA
     
     def estimate(self, R, sources0, **kwargs):
         r"""Solves the ML problem for the given inputs.
@@ -190,9 +386,17 @@ class CovarianceBasedMLEstimator(ABC):
         # Subclasses should override this implementation if there exists faster
         # optimization approaches.
         obj_func, x0, bounds = self._prepare_opt_prob(sources0, R)
+        if self._use_gradient and self._is_gradient_available(sources0):
+            # Evaluate the objective function and its gradient together.
+            k = sources0.size
+            obj_func = lambda x : self._eval_nll_grad(x, R, k)
+            jac = True
+        else:
+            jac = None
         res = minimize(
             obj_func, x0,
             method='L-BFGS-B',
+            jac=jac,
             bounds=bounds,
             **kwargs
         )
@@ -202,6 +406,193 @@ class CovarianceBasedMLEstimator(ABC):
         else:
             return False, None
 
+    def estimate_many(self, Rs, sources0s, n_workers=1, **kwargs):
+        r"""Solves independent ML problems for a stack of covariance matrices.
+
+        This is equivalent to calling :meth:`estimate` for each covariance
+        matrix. Unlike :meth:`estimate`, this method does not modify the
+        state of this estimator, and can be safely called from multiple
+        threads. The problems are split into ``n_workers`` contiguous blocks.
+        Each block is solved by a private copy of this estimator, whose
+        working variables are reused across the problems in the block, and
+        the blocks are solved in a thread pool. Because the linear algebra
+        routines release the GIL, threads are effective for large arrays.
+
+        Args:
+            Rs (~numpy.ndarray): A B x M x M stack of sample covariance
+                matrices.
+            sources0s: The initial guesses of source locations. Either a
+                single :class:`~doatools.model.sources.SourcePlacement`
+                shared by all the problems, or a sequence of B
+                :class:`~doatools.model.sources.SourcePlacement` instances of
+                the same type and size.
+            n_workers (int): Number of worker threads. If ``None``, the number
+                of CPUs will be used. Default value is 1, which solves all the
+                problems in the calling thread.
+            **kwargs: Additional keyword arguments for the solver. See
+                :meth:`estimate`.
+
+        Returns:
+            A tuple with the following elements.
+
+            * resolved (:class:`~numpy.ndarray`): A boolean vector of length B
+              indicating whether the optimizer exited successfully for each
+              problem.
+            * estimates (:class:`~numpy.ndarray`): An array of shape
+              ``(B,) + sources0.locations.shape`` storing the estimated source
+              locations, using the same unit as the initial guesses. Rows
+              corresponding to unresolved problems are filled with NaN.
+        """
+        ensure_covariance_batch_size(Rs, self._array)
+        n = Rs.shape[0]
+        if isinstance(sources0s, (list, tuple)):
+            if len(sources0s) != n:
+                raise ValueError('The number of initial guesses must match the number of covariance matrices.')
+            shape = sources0s[0].locations.shape
+            if any(s.locations.shape != shape for s in sources0s):
+                raise ValueError('All initial guesses must have the same size.')
+        else:
+            shape = sources0s.locations.shape
+            sources0s = [sources0s] * n
+        resolved = np.zeros((n,), dtype=np.bool_)
+        estimates = np.full((n,) + shape, np.nan)
+
+        def solve_block(indices):
+            # Each block uses its own working variables.
+            estimator = copy.copy(self)
+            for i in indices:
+                r, est = estimator.estimate(Rs[i], sources0s[i], **kwargs)
+                if r:
+                    resolved[i] = True
+                    estimates[i] = est.locations
+
+        if n_workers is None:
+            n_workers = os.cpu_count() or 1
+        n_workers = max(min(n_workers, n), 1)
+        blocks = np.array_split(np.arange(n), n_workers)
+        if n_workers == 1:
+            solve_block(blocks[0])
+        else:
+            with ThreadPoolExecutor(n_workers) as executor:
+                # Propagate the exceptions raised by the workers.
+                for f in [executor.submit(solve_block, b) for b in blocks]:
+                    f.result()
+        return resolved, estimates
+
+    def _get_ap_matrix(self, R, k):
+        r"""Retrieves the matrix :math:`\mathbf{C}` such that the alternating
+        projection search maximizes
+        :math:`\mathrm{tr}(\mathbf{P}_{\mathbf{A}}\mathbf{C})`.
+
+        The default implementation returns the sample covariance matrix, which
+        corresponds to the CML criterion.
+        """
+        return R
+
+    def _get_ap_steering_matrix(self, search_grid):
+        """Retrieves the (cached) steering matrix of the search grid used by
+        the alternating projection search."""
+        if self._ap_grid is not search_grid:
+            self._ap_steering_matrix = self._array.steering_matrix(
+                search_grid.source_placement, self._wavelength,
+                perturbations='known'
+            )
+            self._ap_grid = search_grid
+        return self._ap_steering_matrix
+
+    def _ap_search(self, C, A, k, max_iter):
+        """Maximizes tr(P_A C) over the columns of A with alternating
+        projection and returns the sorted indices of the selected columns."""
+        CA = C @ A
+        norms = np.sum(A.real**2 + A.imag**2, axis=0)
+
+        def find_best(others):
+            # Let B consist of the other selected columns. Because
+            # P_[B a] = P_B + b b^H / (b^H b) with b = P^\perp_B a, we only
+            # need to maximize b^H C b / (b^H b), where P^\perp_B is evaluated
+            # with an orthonormal basis of B.
+            if len(others) > 0:
+                Q, _ = np.linalg.qr(A[:, others])
+                W = Q.conj().T @ A
+                B = A - Q @ W
+                CB = CA - (C @ Q) @ W
+            else:
+                B, CB = A, CA
+            num = np.einsum('ij,ij->j', B.conj(), CB).real
+            den = np.sum(B.real**2 + B.imag**2, axis=0)
+            # Exclude the columns lying (almost) in the span of B.
+            valid = den > 1e-10 * norms
+            crit = np.full(num.shape, -np.inf)
+            crit[valid] = num[valid] / den[valid]
+            return int(np.argmax(crit))
+
+        # Sequential initialization.
+        indices = []
+        for _ in range(k):
+            indices.append(find_best(indices))
+        # Update one source at a time while keeping the others fixed.
+        for _ in range(max_iter):
+            changed = False
+            for j in range(k):
+                i = find_best(indices[:j] + indices[j+1:])
+                if i != indices[j]:
+                    indices[j] = i
+                    changed = True
+            if not changed:
+                break
+        return np.sort(indices)
+
+    def estimate_global(self, R, k, search_grid, max_ap_iter=20, polish=True,
+                        **kwargs):
+        r"""Solves the ML problem without an initial guess by first running
+        an alternating projection search over the given grid.
+
+        The alternating projection (AP) search maximizes
+        :math:`\mathrm{tr}(\mathbf{P}_{\mathbf{A}}\mathbf{C})` over the grid
+        points, where :math:`\mathbf{C}` is the sample covariance matrix for
+        the CML and AML estimators, and the weighted signal subspace matrix
+        for the WSF estimator. The sources are first added one at a time, and
+        then each source location is updated in turn while the others are
+        fixed, until no location changes. Each update only involves rank-one
+        modifications of the projection matrix of the fixed sources, and the
+        steering matrix of the grid is cached across calls. The AP estimates
+        are then used as the initial guess of :meth:`estimate`.
+
+        Args:
+            R (~numpy.ndarray): The sample covariance matrix.
+            k (int): Expected number of sources.
+            search_grid (~doatools.estimation.grid.SearchGrid): The search grid
+                used by the AP search. Its source type determines the type of
+                the estimates.
+            max_ap_iter (int): Maximum number of AP sweeps after the
+                initialization. Default value is 20.
+            polish (bool): If set to ``True``, the AP estimates will be
+                refined with :meth:`estimate`. Otherwise the AP estimates are
+                returned directly. Default value is ``True``.
+            **kwargs: Additional keyword arguments for the solver. See
+                :meth:`estimate`.
+
+        Returns:
+            tuple: A tuple ``(resolved, estimates)``. See :meth:`estimate`.
+
+        References:
+            [1] I. Ziskind and M. Wax, "Maximum likelihood localization of
+            multiple sources by alternating projection," IEEE Transactions on
+            Acoustics, Speech, and Signal Processing, vol. 36, no. 10,
+            pp. 1553-1560, Oct. 1988.
+        """
+        ensure_n_resolvable_sources(k, self.get_max_resolvable_sources())
+        ensure_covariance_size(R, self._array)
+        if k > search_grid.size:
+            raise ValueError('The number of grid points must be at least k.')
+        A = self._get_ap_steering_matrix(search_grid)
+        indices = self._ap_search(self._get_ap_matrix(R, k), A, k, max_ap_iter)
+        sources0 = search_grid.source_placement[indices]
+        if not polish:
+            self._estimates = sources0
+            return True, self.get_last_estimates()
+        return self.estimate(R, sources0, **kwargs)
+
 class AMLEstimator(CovarianceBasedMLEstimator):
     r"""Asymptotic maximum-likelihood (AML) estimator.
     
@@ -240,22 +631,12 @@ class AMLEstimator(CovarianceBasedMLEstimator):
     def _eval_nll(self, x, R, k):
         # See 8.6.1 of the following:
         # * H. L. Van Trees, Optimum array processing. New York: Wiley, 2002.
-        m = self._array.size
         A = self._eval_steering_matrix_from_x(x)
-        # Projection matrix of A
-        PA = projm(A, True)
-        # Null projection matrix of A
-        PPA = np.eye(m) - PA
-        # Computing NLL
-        H = PA @ R @ PA + np.trace(PPA @ R) / (m - k) * PPA
-        # Force Hermitian
-        H += H.conj().T
-        H *= 0.5
-        sgn, nll_val = np.linalg.slogdet(H)
-        if sgn <= 0:
-            return np.Inf
-        else:
-            return nll_val
+        return _f_aml(A, None, R, self._array.size)
+
+    def _eval_nll_grad(self, x, R, k):
+        A, DA = self._eval_steering_matrix_and_derivatives_from_x(x)
+        return _f_aml(A, DA, R, self._array.size)
 
 class CMLEstimator(CovarianceBasedMLEstimator):
     r"""Conditional maximum-likelihood (CML) estimator.
@@ -301,8 +682,11 @@ class CMLEstimator(CovarianceBasedMLEstimator):
         # * H. L. Van Trees, Optimum array processing. New York: Wiley, 2002.
         # tr(P^\perp_A R)
         A = self._eval_steering_matrix_from_x(x)
-        PPA = np.eye(self._array.size) - projm(A, True)
-        return np.real(np.trace(PPA @ R))
+        return _f_tr_ppa(A, None, np.real(np.trace(R)), C=R)
+
+    def _eval_nll_grad(self, x, R, k):
+        A, DA = self._eval_steering_matrix_and_derivatives_from_x(x)
+        return _f_tr_ppa(A, DA, np.real(np.trace(R)), C=R)
 
 class WSFEstimator(CovarianceBasedMLEstimator):
     r"""Weighted subspace fitting (WSF) estimator.
@@ -334,8 +718,15 @@ class WSFEstimator(CovarianceBasedMLEstimator):
     """
 
     def _prepare_m(self, sources0, R):
-        """Prepare the M matrix used in the optimization."""
-        k = sources0.size
+        """Prepare the M matrix used in the optimization.
+
+        Only the factor L such that M = L L^H is stored because M has rank k.
+        """
+        self._L = self._compute_m_factor(R, sources0.size)
+        self._tr_m = np.sum(self._L.real**2 + self._L.imag**2)
+
+    def _compute_m_factor(self, R, k):
+        """Computes the factor L of the M matrix such that M = L L^H."""
         # Pre-calculate optimal weights
         v, E = np.linalg.eigh(R)
         # Signal subspace
@@ -346,8 +737,12 @@ class WSFEstimator(CovarianceBasedMLEstimator):
         # Asymptotically optimal weights
         vt = vs - sigma_est
         w = vt * vt / vs
-        # M = Es diag(w) Es^H
-        self._M = (Es * w) @ Es.conj().T
+        # M = Es diag(w) Es^H = L L^H
+        return Es * np.sqrt(w)
+
+    def _get_ap_matrix(self, R, k):
+        L = self._compute_m_factor(R, k)
+        return L @ L.conj().T
 
     def _prepare_opt_prob(self, sources0, R):
         self._prepare_m(sources0, R)
@@ -357,6 +752,9 @@ class WSFEstimator(CovarianceBasedMLEstimator):
         # See 8.5.3 of the following:
         # * H. L. Van Trees, Optimum array processing. New York: Wiley, 2002.
         A = self._eval_steering_matrix_from_x(x)
-        PPA = np.eye(self._array.size) - projm(A, True)
-        # tr(P^\perp_A M)
-        return np.real(np.trace(PPA @ self._M))
+        # tr(P^\perp_A M), where M = L L^H
+        return _f_tr_ppa(A, None, self._tr_m, L=self._L)
+
+    def _eval_nll_grad(self, x, R, k):
+        A, DA = self._eval_steering_matrix_and_derivatives_from_x(x)
+        return _f_tr_ppa(A, DA, self._tr_m, L=self._L)
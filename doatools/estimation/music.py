@@ -3,8 +3,10 @@ from math import ceil
 from scipy.signal import find_peaks
 import warnings
 from ..model.sources import FarField1DSourcePlacement
+from .subspace_tracking import SubspaceTracker
 from .core import SpectrumBasedEstimatorBase, get_noise_subspace, \
-                  ensure_covariance_size, ensure_n_resolvable_sources
+                  get_signal_subspace, ensure_covariance_or_tracker_size, \
+                  ensure_covariance_batch_size, ensure_n_resolvable_sources
 
 def f_music(A, En):
     r"""Computes the classical MUSIC spectrum
@@ -26,18 +28,95 @@ def f_music(A, En):
     v = En.T.conj() @ A
     return np.reciprocal(np.sum(v * v.conj(), axis=0).real)
 
+def f_music_batch(A, En):
+    r"""Computes the classical MUSIC spectra for a stack of noise subspaces.
+
+    All spectra are evaluated with a single matrix multiplication against the
+    steering matrix.
+
+    Args:
+        A: m x k steering matrix of candidate direction-of-arrivals, where
+            m is the number of sensors and k is the number of candidate
+            direction-of-arrivals.
+        En: b x m x d stack of noise eigenvectors, where b is the batch size
+            and d is the dimension of the noise subspace.
+
+    Returns:
+        A b x k matrix whose i-th row is the MUSIC spectrum of ``En[i]``.
+    """
+    b, m, d = En.shape
+    v = En.conj().transpose(0, 2, 1).reshape((b * d, m)) @ A
+    v = v.reshape((b, d, -1))
+    return np.reciprocal(np.sum(v * v.conj(), axis=1).real)
+
+def _f_music_from_norms(n_a, n_s):
+    # Because E_n E_n^H = I - E_s E_s^H, the denominator is the difference
+    # between the two norms. It is bounded from below to avoid negative values
+    # due to cancellation near the peaks.
+    d = n_a - n_s
+    return np.reciprocal(np.maximum(d, np.finfo(d.dtype).eps * n_a))
+
+def f_music_signal(A, Es):
+    r"""Computes the classical MUSIC spectrum from the signal subspace.
+
+    Because :math:`\mathbf{E}_\mathrm{n}\mathbf{E}_\mathrm{n}^H =
+    \mathbf{I} - \mathbf{E}_\mathrm{s}\mathbf{E}_\mathrm{s}^H`, the
+    spectrum function can be rewritten as
+
+    .. math::
+        P_{\mathrm{MUSIC}}(\theta)
+        = \frac{1}{\|\mathbf{a}(\theta)\|_2^2
+                   - \|\mathbf{E}_\mathrm{s}^H \mathbf{a}(\theta)\|_2^2},
+
+    which only requires the m x k signal subspace instead of the
+    m x (m - k) noise subspace.
+
+    Args:
+        A: m x k steering matrix of candidate direction-of-arrivals, where
+            m is the number of sensors and k is the number of candidate
+            direction-of-arrivals.
+        Es: m x d matrix of signal eigenvectors, where d is the dimension of
+            the signal subspace.
+    """
+    v = Es.T.conj() @ A
+    n_a = np.sum(A.real**2 + A.imag**2, axis=0)
+    return _f_music_from_norms(n_a, np.sum(v.real**2 + v.imag**2, axis=0))
+
+def f_music_signal_batch(A, Es):
+    r"""Computes the classical MUSIC spectra for a stack of signal subspaces.
+
+    See :meth:`f_music_signal` for details.
+
+    Args:
+        A: m x k steering matrix of candidate direction-of-arrivals.
+        Es: b x m x d stack of signal eigenvectors, where b is the batch size
+            and d is the dimension of the signal subspace.
+
+    Returns:
+        A b x k matrix whose i-th row is the MUSIC spectrum of ``Es[i]``.
+    """
+    b, m, d = Es.shape
+    v = Es.conj().transpose(0, 2, 1).reshape((b * d, m)) @ A
+    v = v.reshape((b, d, -1))
+    n_a = np.sum(A.real**2 + A.imag**2, axis=0)
+    return _f_music_from_norms(n_a, np.sum(v.real**2 + v.imag**2, axis=1))
+
 class MUSIC(SpectrumBasedEstimatorBase):
     """Creates a spectrum-based MUSIC estimator.
     
     The MUSIC spectrum is computed on a predefined-grid using
-    :meth:`~doatools.estimation.music.f_music`, and the source locations are
-    estimated by identifying the peaks.
+    :meth:`~doatools.estimation.music.f_music_signal`, and the source
+    locations are estimated by identifying the peaks. Only the signal subspace
+    is computed so the noise subspace is never formed.
 
     Args:
         array (~doatools.model.arrays.ArrayDesign): Array design.
         wavelength (float): Wavelength of the carrier wave.
         search_grid (~doatools.estimation.grid.SearchGrid): The search grid
             used to locate the sources.
+        subspace_method (str): Method used to compute the signal subspace.
+            See :meth:`~doatools.estimation.core.get_signal_subspace`.
+            Default value is ``'auto'``.
         **kwargs: Other keyword arguments supported by
             :class:`~doatools.estimation.core.SpectrumBasedEstimatorBase`.
     
@@ -47,16 +126,29 @@ class MUSIC(SpectrumBasedEstimatorBase):
         vol. 34, no. 3, pp. 276-280, Mar. 1986.
     """
 
-    def __init__(self, array, wavelength, search_grid, **kwargs):
+    def __init__(self, array, wavelength, search_grid, subspace_method='auto',
+                 **kwargs):
         super().__init__(array, wavelength, search_grid, **kwargs)
-        
+        self._subspace_method = subspace_method
+        self._grid_atom_norms = None
+
+    def _get_grid_atom_norms(self):
+        """Retrieves the squared norms of the steering vectors over the search
+        grid using the spectrum evaluator."""
+        if self._grid_atom_norms is None:
+            m = self._array.size
+            self._grid_atom_norms = self._spectrum_evaluator.eval_norms(np.eye(m))
+        return self._grid_atom_norms
+
     def estimate(self, R, k, **kwargs):
         """Estimates the source locations from the given covariance matrix.
 
         Args:
             R (~numpy.ndarray): Covariance matrix input. The size of R must
                 match that of the array design used when creating this
-                estimator.
+                estimator. Can also be a
+                :class:`~doatools.estimation.subspace_tracking.SubspaceTracker`
+                of the same size.
             k (int): Expected number of sources.
             return_spectrum (bool): Set to ``True`` to also output the spectrum
                 for visualization. Default value if ``False``.
@@ -88,10 +180,154 @@ class MUSIC(SpectrumBasedEstimatorBase):
               at the grid points. Only present if ``return_spectrum`` is
               ``True``.
         """
-        ensure_covariance_size(R, self._array)
+        ensure_covariance_or_tracker_size(R, self._array)
         ensure_n_resolvable_sources(k, self._array.size - 1)
-        En = get_noise_subspace(R, k)
-        return self._estimate(lambda A: f_music(A, En), k, **kwargs)
+        Es = get_signal_subspace(R, k, self._subspace_method)
+        f_sp_grid = None
+        if self._spectrum_evaluator is not None:
+            f_sp_grid = lambda: _f_music_from_norms(
+                self._get_grid_atom_norms(),
+                self._spectrum_evaluator.eval_norms(Es)
+            )
+        return self._estimate(lambda A: f_music_signal(A, Es), k,
+                              f_sp_grid=f_sp_grid, **kwargs)
+
+    def estimate_batch(self, Rs, k, return_spectrum=False):
+        """Estimates the source locations from a stack of covariance matrices.
+
+        This is equivalent to calling :meth:`estimate` for each covariance
+        matrix, but the eigendecompositions, the spectrum evaluations, and the
+        peak finding are all performed over the whole batch at once. Grid
+        refinement is not supported.
+
+        Args:
+            Rs (~numpy.ndarray): A B x M x M stack of covariance matrices,
+                where M must match the size of the array design used when
+                creating this estimator.
+            k (int): Expected number of sources.
+            return_spectrum (bool): Set to ``True`` to also output the spectra
+                for visualization. Default value if ``False``.
+
+        Returns:
+            A tuple with the following elements.
+
+            * resolved (:class:`~numpy.ndarray`): A boolean vector of length B
+              indicating whether the desired number of sources are found for
+              each covariance matrix.
+            * estimates (:class:`~numpy.ndarray`): A B x k (1D search grids) or
+              B x k x d (d-D search grids) array of the estimated source
+              locations, using the same unit as the search grid. Rows
+              corresponding to unresolved inputs are filled with NaN.
+            * spectrum (:class:`~numpy.ndarray`): An numpy array of shape
+              ``(B,) + search_grid.shape``. Only present if
+              ``return_spectrum`` is ``True``.
+        """
+        ensure_covariance_batch_size(Rs, self._array)
+        ensure_n_resolvable_sources(k, self._array.size - 1)
+        Es = get_signal_subspace(Rs, k, self._subspace_method)
+        f_sp_grid = None
+        if self._spectrum_evaluator is not None:
+            f_sp_grid = lambda: _f_music_from_norms(
+                self._get_grid_atom_norms(),
+                self._spectrum_evaluator.eval_norms(Es)
+            )
+        return self._estimate_batch(lambda A: f_music_signal_batch(A, Es), k,
+                                    return_spectrum, f_sp_grid)
+
+def _root_music_coefficients(En):
+    """Computes the coefficients of the root-MUSIC polynomials.
+
+    Args:
+        En: b x m x d stack of noise eigenvectors.
+
+    Returns:
+        A b x (2m - 1) matrix whose i-th row consists of the coefficients of
+        the i-th polynomial, ordered from the highest degree to the lowest
+        degree.
+    """
+    return _root_music_coefficients_from_projectors(_outer_batch(En))
+
+def _outer_batch(E):
+    """Computes E[i] E[i]^H for a stack of matrices."""
+    return E @ E.conj().transpose(0, 2, 1)
+
+def _root_music_coefficients_from_projectors(C):
+    """Computes the coefficients of the root-MUSIC polynomials from the noise
+    subspace projectors.
+
+    Args:
+        C: b x m x m stack of noise subspace projectors.
+
+    Returns:
+        See :meth:`_root_music_coefficients`.
+    """
+    b, m, _ = C.shape
+    # Sum the elements along each upper diagonal of C with a single bincount:
+    # the element C[l, i, j] (j >= i) goes to bin l * m + (j - i).
+    ii, jj = np.triu_indices(m)
+    bins = (np.arange(b)[:, np.newaxis] * m + (jj - ii)).ravel()
+    c = C[:, ii, jj].ravel()
+    u = np.bincount(bins, c.real, b * m) + 1j * np.bincount(bins, c.imag, b * m)
+    u = u.reshape((b, m))
+    # The lower diagonals are the conjugates of the upper ones.
+    return np.hstack((u[:, :0:-1], u[:, :1], u[:, 1:].conj()))
+
+def _roots_batch(coeff):
+    """Finds the roots of a stack of polynomials with a single batched
+    eigenvalue computation of their companion matrices.
+
+    Args:
+        coeff: A b x (n + 1) matrix of the polynomial coefficients, ordered
+            from the highest degree to the lowest degree.
+
+    Returns:
+        A b x n matrix of roots. If the leading coefficient of a polynomial is
+        zero, its roots are found with :func:`numpy.roots` and the missing ones
+        are filled with NaN.
+    """
+    b, n = coeff.shape[0], coeff.shape[1] - 1
+    regular = coeff[:, 0] != 0
+    z = np.full((b, n), np.nan, dtype=np.complex_)
+    if np.any(regular):
+        # Same companion matrix as the one used by numpy.roots.
+        a = coeff[regular]
+        M = np.zeros((a.shape[0], n, n), dtype=a.dtype)
+        M[:, 0, :] = -a[:, 1:] / a[:, :1]
+        M[:, np.arange(1, n), np.arange(n - 1)] = 1.0
+        z[regular] = np.linalg.eigvals(M)
+    for i in np.flatnonzero(~regular):
+        r = np.roots(coeff[i])
+        z[i, :r.size] = r
+    return z
+
+def _select_roots(z, k):
+    """Selects k roots inside the unit circle that are also closest to the unit
+    circle for each row of z.
+
+    Roots outside the unit circle are discarded. Roots lying exactly on the
+    unit circle come in pairs, and only one root of each pair is kept.
+
+    Returns:
+        A tuple ``(resolved, z_selected)``, where ``z_selected`` is a b x k
+        matrix whose rows are only valid if the corresponding elements of
+        ``resolved`` are ``True``.
+    """
+    absz = np.abs(z)
+    keep = absz < 1.0
+    on_circle = absz == 1.0
+    if np.any(on_circle):
+        # Pair each root on the unit circle with the closest root, and keep
+        # the one with the smaller index.
+        D = np.abs(z[:, :, np.newaxis] - z[:, np.newaxis, :])
+        n = z.shape[1]
+        D[:, np.arange(n), np.arange(n)] = np.inf
+        D[np.isnan(D)] = np.inf
+        partner = np.argmin(D, axis=2)
+        keep |= on_circle & (np.arange(n) < partner)
+    score = np.where(keep, absz, -np.inf)
+    indices = np.argsort(-score, axis=1, kind='stable')[:, :k]
+    resolved = np.count_nonzero(keep, axis=1) >= k
+    return resolved, np.take_along_axis(z, indices, axis=1)
 
 class RootMUSIC1D:
     """Creates a root-MUSIC estimator for uniform linear arrays.
@@ -118,7 +354,9 @@ class RootMUSIC1D:
 
         Args:
             R (~numpy.ndarray): Covariance matrix input. This covariance matrix
-                must be obtained using a uniform linear array.
+                must be obtained using a uniform linear array. Can also be a
+                :class:`~doatools.estimation.subspace_tracking.SubspaceTracker`
+                fed with the snapshots of a uniform linear array.
             k (int): Expected number of sources.
             d0 (float): Inter-element spacing of the uniform linear array used
                 to obtain ``R``. If not specified, it will be set to one half
@@ -141,48 +379,68 @@ class RootMUSIC1D:
               recording the estimated source locations. Will be ``None`` if
               resolved is ``False``.
         """
-        if R.ndim != 2 or R.shape[0] != R.shape[1]:
-            raise ValueError('R should be a square matrix.')
-        m = R.shape[0]
-        ensure_n_resolvable_sources(k, m - 1)
+        if isinstance(R, SubspaceTracker):
+            ensure_n_resolvable_sources(k, R.size - 1)
+            # The polynomial only depends on the noise subspace projector,
+            # I - Es Es^H.
+            C = -_outer_batch(R.get_signal_subspace(k)[np.newaxis])
+            C[:, np.arange(R.size), np.arange(R.size)] += 1.0
+        else:
+            if R.ndim != 2 or R.shape[0] != R.shape[1]:
+                raise ValueError('R should be a square matrix.')
+            ensure_n_resolvable_sources(k, R.shape[0] - 1)
+            C = _outer_batch(get_noise_subspace(R[np.newaxis], k))
         if d0 is None:
             d0 = self._wavelength / 2.0
-        En = get_noise_subspace(R, k)
-        # Compute the coefficients for the polynomial.
-        C = En @ En.T.conj()
-        coeff = np.zeros((m - 1,), dtype=np.complex_)
-        for i in range(1, m):
-            coeff[i - 1] += np.sum(np.diag(C, i))
-        coeff = np.hstack((coeff[::-1], np.sum(np.diag(C)), coeff.conj()))
-        # Find the roots of the polynomial.
-        z = np.roots(coeff)
-        # Find k points inside the unit circle that are also closest to the unit
-        # circle.
-        nz = len(z)
-        mask = np.ones((nz,), dtype=np.bool_)
-        for i in range(nz):
-            absz = abs(z[i])
-            if absz > 1.0:
-                # Outside the unit circle.
-                mask[i] = False
-            elif absz == 1.0:
-                # On the unit circle. Need to find the closest point and remove
-                # it.
-                idx = -1
-                dist = np.inf
-                for j in range(nz):
-                    if j != i and mask[j]:
-                        cur_dist = abs(z[i] - z[j])
-                        if cur_dist < dist:
-                            dist = cur_dist
-                            idx = j
-                if idx < 0:
-                    raise RuntimeError('Unpaired point found on the unit circle, which is impossible.')
-                mask[idx] = False
-        z = z[mask]
-        sorted_indices = np.argsort(1.0 - np.abs(z))
-        if len(z) < k:
+        resolved, z = _select_roots(_roots_batch(_root_music_coefficients_from_projectors(C)), k)
+        if not resolved[0]:
             return False, None
+        return True, FarField1DSourcePlacement.from_z(z[0], self._wavelength, d0, unit)
+
+    def estimate_batch(self, Rs, k, d0=None, unit='rad'):
+        """Estimates the direction-of-arrivals of 1D far-field sources from a
+        stack of covariance matrices.
+
+        This is equivalent to calling :meth:`estimate` for each covariance
+        matrix, but the eigendecompositions, the polynomial coefficients, the
+        rooting (through the eigenvalues of the companion matrices), and the
+        root selection are all performed over the whole batch at once.
+
+        Args:
+            Rs (~numpy.ndarray): A B x M x M stack of covariance matrices
+                obtained using a uniform linear array.
+            k (int): Expected number of sources.
+            d0 (float): Inter-element spacing of the uniform linear array. See
+                :meth:`estimate`.
+            unit (str): Unit of the estimates. Default value is ``'rad'``.
+
+        Returns:
+            A tuple with the following elements.
+
+            * resolved (:class:`~numpy.ndarray`): A boolean vector of length B
+              indicating whether ``k`` roots inside the unit circle are found
+              for each covariance matrix.
+            * estimates (:class:`~numpy.ndarray`): A B x k array of the
+              estimated source locations sorted in ascending order. Rows
+              corresponding to unresolved inputs are filled with NaN.
+        """
+        if Rs.ndim != 3 or Rs.shape[1] != Rs.shape[2]:
+            raise ValueError('Expecting a B x M x M stack of matrices.')
+        ensure_n_resolvable_sources(k, Rs.shape[1] - 1)
+        if unit not in ['rad', 'deg', 'sin']:
+            raise ValueError("Unit must be one of 'rad', 'deg', or 'sin'.")
+        if d0 is None:
+            d0 = self._wavelength / 2.0
+        En = get_noise_subspace(Rs, k)
+        resolved, z = _select_roots(_roots_batch(_root_music_coefficients(En)), k)
+        # Same conversion as FarField1DSourcePlacement.from_z.
+        sin_vals = np.angle(z) / (2 * np.pi * d0 / self._wavelength)
+        if unit == 'sin':
+            locations = sin_vals
         else:
-            z = z[sorted_indices[:k]]
-            return True, FarField1DSourcePlacement.from_z(z, self._wavelength, d0, unit)
+            locations = np.arcsin(sin_vals)
+            if unit == 'deg':
+                locations = np.rad2deg(locations)
+        locations.sort(axis=1)
+        locations[~resolved] = np.nan
+        return resolved, locations
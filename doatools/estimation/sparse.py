@@ -4,7 +4,12 @@ import numpy as np
 from .core import SpectrumBasedEstimatorBase, ensure_covariance_size
 from ..optim.l1lsq import L1RegularizedLeastSquaresProblem, \
                           L21RegularizedLeastSquaresProblem
-from ..utils.math import khatri_rao, vec
+from ..optim.operators import KhatriRaoDictionary
+from ..utils.math import vec
+
+# The Gram matrix of the atom matrix used by SparseCovarianceMatching is
+# computed automatically only if its size does not exceed this limit.
+GRAM_MAX_BYTES = 256 * 1024**2
 
 class SparseCovarianceMatching(SpectrumBasedEstimatorBase):
     r"""Creates a source location estimator based on matching the sparse
@@ -45,6 +50,26 @@ class SparseCovarianceMatching(SpectrumBasedEstimatorBase):
             used to locate the sources.
         formulation (str): ``'penalizedl1'``, ``'constrainedl1'``, or
             ``'constrainedl2'``.
+        backend (str): ``'native'`` to use the built-in first-order solvers,
+            or ``'cvxpy'`` to use cvxpy. Default value is ``'native'``. See
+            :class:`~doatools.optim.l1lsq.L1RegularizedLeastSquaresProblem`
+            for more details.
+        use_gram (bool): Specifies whether the native solver of the
+            ``'penalizedl1'`` formulation should work with the Gram matrix
+            :math:`\mathbf{\Phi}^T\mathbf{\Phi}` and discard the grid points
+            that provably have zero powers during the iterations (GAP safe
+            screening). The Gram matrix is computed once from the steering
+            matrix and cached. If set to ``None``, it will be enabled when
+            the formulation is ``'penalizedl1'``, the backend is ``'native'``,
+            and the size of the Gram matrix does not exceed
+            :data:`GRAM_MAX_BYTES`. Default value is ``None``.
+        implicit_dictionary (bool): If set to ``True``,
+            :math:`\mathbf{\Phi}` will be represented by a
+            :class:`~doatools.optim.operators.KhatriRaoDictionary` instead of
+            being materialized, so that only the steering matrix of the search
+            grid is stored. This reduces the memory usage from
+            :math:`O(M^2G)` to :math:`O(MG)` for large arrays. Cannot be used
+            together with ``atom_cache``. Default value is ``False``.
         **kwargs: Other keyword arguments supported by
             :class:`~doatools.estimation.core.SpectrumBasedEstimatorBase`.
 
@@ -64,10 +89,18 @@ class SparseCovarianceMatching(SpectrumBasedEstimatorBase):
     """
 
     def __init__(self, array, wavelength, search_grid, noise_known=False,
-                 formulation='penalizedl1', **kwargs):
+                 formulation='penalizedl1', backend='native', use_gram=None,
+                 implicit_dictionary=False, **kwargs):
+        if kwargs.get('coarse_decimation') is not None:
+            raise ValueError('Coarse-to-fine search is not supported.')
+        if kwargs.get('max_atom_bytes') is not None:
+            raise ValueError('Chunked atom matrix evaluation is not supported.')
+        if implicit_dictionary and kwargs.get('atom_cache') is not None:
+            raise ValueError('The implicit dictionary cannot be cached on disk.')
         super().__init__(array, wavelength, search_grid, **kwargs)
         self._formulation = formulation
         self._noise_known = noise_known
+        self._implicit_dictionary = implicit_dictionary
         # vec(R) -> m*m elements, real + image -> 2*m*m
         m = 2 * self._array.size**2
         k = self._search_grid.size
@@ -75,20 +108,42 @@ class SparseCovarianceMatching(SpectrumBasedEstimatorBase):
         if not self._noise_known:
             k += 1
         # Initialize the problem.
-        self._problem = L1RegularizedLeastSquaresProblem(m, k, formulation, True)
+        if use_gram is None:
+            use_gram = formulation == 'penalizedl1' and backend == 'native' \
+                and k * k * 8 <= GRAM_MAX_BYTES
+        self._use_gram = use_gram
+        self._gram = None
+        self._problem = L1RegularizedLeastSquaresProblem(
+            m, k, formulation, True, backend=backend, use_gram=use_gram
+        )
 
     def _compute_atom_matrix(self, grid):
         A = self._array.steering_matrix(
             grid.source_placement, self._wavelength,
             perturbations='known'
         )
-        Phi = khatri_rao(A.conj(), A)
-        if not self._noise_known:
-            Phi = np.hstack((Phi, vec(np.eye(self._array.size))))
-        Phi = np.vstack((Phi.real, Phi.imag))
-        return Phi
+        Phi = KhatriRaoDictionary(A, not self._noise_known)
+        return Phi if self._implicit_dictionary else Phi.toarray()
+
+    def _get_atom_cache_key_extra(self):
+        return super()._get_atom_cache_key_extra() + (self._noise_known,)
+
+    def _get_gram_matrix(self):
+        """Computes the Gram matrix of the atom matrix of the search grid
+        from the steering matrix without forming the atom matrix. See
+        :meth:`~doatools.optim.operators.KhatriRaoDictionary.gram`.
+        """
+        if self._gram is None:
+            A = self._array.steering_matrix(
+                self._search_grid.source_placement, self._wavelength,
+                perturbations='known'
+            )
+            self._gram = KhatriRaoDictionary(A, not self._noise_known).gram()
+        return self._gram
 
     def _get_sparse_spectrum(self, Phi, R, l, solver_options):
+        if self._use_gram:
+            self._problem.set_gram_matrix(Phi, self._get_gram_matrix())
         r = vec(R)
         r = np.vstack((r.real, r.imag))
         sol = self._problem.solve(Phi, r, l, **solver_options).flatten()
@@ -97,6 +152,49 @@ class SparseCovarianceMatching(SpectrumBasedEstimatorBase):
             # TODO: output noise estimate?
             sol = sol[:-1]
         return sol
+
+    def _subtract_noise(self, R, sigma):
+        ensure_covariance_size(R, self._array)
+        if self._noise_known:
+            if sigma is None:
+                raise ValueError('sigma must be specified when noise variance is assumed known.')
+            # Do not modify R in-place!
+            R = R - np.eye(self._array.size) * sigma
+        return R
+
+    def get_spectrum_path(self, R, ls, sigma=None, solver_options={}):
+        """Computes the sparse spectra for a sequence of regularization
+        parameters.
+
+        The sparse recovery problems are solved with
+        :meth:`~doatools.optim.l1lsq.L1RegularizedLeastSquaresProblem.solve_path`,
+        where each solution warm-starts the next one and the grid points that
+        provably correspond to zero powers are screened out. This is much
+        faster than calling :meth:`estimate` repeatedly when tuning ``l``.
+
+        Args:
+            R (~numpy.ndarray): Covariance matrix input.
+            ls: A sequence of regularization parameters. See :meth:`estimate`
+                for their meanings.
+            sigma (float): Noise variance. Required if the noise variance is
+                assumed known.
+            solver_options (dict): A dictionary of additional keyword arguments
+                to be passed to the optimizer.
+
+        Returns:
+            ~numpy.ndarray: An array of shape ``(len(ls),) + grid_shape``,
+            where ``grid_shape`` is the shape of the search grid. The i-th
+            element is the spectrum associated with ``ls[i]``.
+        """
+        R = self._subtract_noise(R, sigma)
+        Phi = self._get_atom_matrix()
+        if self._use_gram:
+            self._problem.set_gram_matrix(Phi, self._get_gram_matrix())
+        r = vec(R)
+        r = np.vstack((r.real, r.imag))
+        X = self._problem.solve_path(Phi, r, ls, **solver_options)
+        X = X.reshape((X.shape[0], -1))[:, :self._search_grid.size]
+        return X.reshape((-1,) + self._search_grid.shape)
     
     def estimate(self, R, k, l, sigma=None, solver_options={}, **kwargs):
         r"""Estimates the source locations from the given covariance matrix.
@@ -126,8 +224,9 @@ class SparseCovarianceMatching(SpectrumBasedEstimatorBase):
                 for more details.
             
             solver_options (dict): A dictionary of additional keyword arguments
-                to be passed to the optimizer. For instance, you can specify the
-                solver or set the verbosity.
+                to be passed to the optimizer. For the native backend, you can
+                specify ``max_iter`` and ``tol``. For the cvxpy backend, you
+                can specify the solver or set the verbosity.
             
             return_spectrum (bool): Set to ``True`` to also output the spectrum
                 for visualization. Default value if ``False``.
@@ -154,12 +253,7 @@ class SparseCovarianceMatching(SpectrumBasedEstimatorBase):
         """
         if 'refine_estimates' in kwargs:
             raise ValueError('Grid refinement is not supported.')
-        ensure_covariance_size(R, self._array)
-        if self._noise_known:
-            if sigma is None:
-                raise ValueError('sigma must be specified when noise variance is assumed known.')
-            # Do not modify R in-place!
-            R = R - np.eye(self._array.size) * sigma
+        R = self._subtract_noise(R, sigma)
         f_sp = lambda Phi: self._get_sparse_spectrum(Phi, R, l, solver_options)
         return self._estimate(f_sp, k, **kwargs)
 
@@ -207,6 +301,10 @@ class GroupSparseEstimator(SpectrumBasedEstimatorBase):
         search_grid (~doatools.estimation.grid.SearchGrid): The search grid
             used to locate the sources.
         n_snapshots (int): Number of snapshots used.
+        backend (str): ``'native'`` to use the built-in first-order solver,
+            or ``'cvxpy'`` to use cvxpy. Default value is ``'native'``. See
+            :class:`~doatools.optim.l1lsq.L21RegularizedLeastSquaresProblem`
+            for more details.
         **kwargs: Other keyword arguments supported by
             :class:`~doatools.estimation.core.SpectrumBasedEstimatorBase`.
     
@@ -217,17 +315,56 @@ class GroupSparseEstimator(SpectrumBasedEstimatorBase):
         pp. 3010-3022, Aug. 2005.
     """
 
-    def __init__(self, array, wavelength, search_grid, n_snapshots, **kwargs):
+    def __init__(self, array, wavelength, search_grid, n_snapshots,
+                 backend='native', **kwargs):
+        if kwargs.get('coarse_decimation') is not None:
+            raise ValueError('Coarse-to-fine search is not supported.')
+        if kwargs.get('max_atom_bytes') is not None:
+            raise ValueError('Chunked atom matrix evaluation is not supported.')
         super().__init__(array, wavelength, search_grid, **kwargs)
         self._n_snapshots = n_snapshots
         self._problem = L21RegularizedLeastSquaresProblem(
-            array.size, search_grid.size, n_snapshots, True
+            array.size, search_grid.size, n_snapshots, True, backend=backend
         )
     
     def _get_sparse_spectrum(self, A, Y, l, solver_options):
         X = self._problem.solve(A, Y, l, **solver_options)
         return np.linalg.norm(X, ord=2, axis=1)
 
+    def _check_measurements(self, Y):
+        if Y.shape[0] != self._array.size:
+            raise ValueError('The number of rows of Y must be equal to the array size.')
+        if Y.shape[1] != self._n_snapshots:
+            raise ValueError('The number of columns of Y must be equal to the number of snapshots.')
+
+    def get_spectrum_path(self, Y, ls, solver_options={}):
+        """Computes the sparse spectra for a sequence of regularization
+        parameters.
+
+        The sparse recovery problems are solved with
+        :meth:`~doatools.optim.l1lsq.L21RegularizedLeastSquaresProblem.solve_path`,
+        where each solution warm-starts the next one and the grid points that
+        provably correspond to zero rows are screened out. This is much faster
+        than calling :meth:`estimate` repeatedly when tuning ``l``.
+
+        Args:
+            Y (~numpy.ndarray): The matrix of measurements, each column of which
+                represents a single snapshot.
+            ls: A sequence of regularization parameters.
+            solver_options (dict): A dictionary of additional keyword arguments
+                to be passed to the optimizer.
+
+        Returns:
+            ~numpy.ndarray: An array of shape ``(len(ls),) + grid_shape``,
+            where ``grid_shape`` is the shape of the search grid. The i-th
+            element is the spectrum associated with ``ls[i]``.
+        """
+        self._check_measurements(Y)
+        A = self._get_atom_matrix()
+        X = self._problem.solve_path(A, Y, ls, **solver_options)
+        sp = np.linalg.norm(X, ord=2, axis=2)
+        return sp.reshape((-1,) + self._search_grid.shape)
+
     def estimate(self, Y, k, l, solver_options={}, **kwargs):
         """Estimates the source locations from the given measurements.
 
@@ -239,8 +376,9 @@ class GroupSparseEstimator(SpectrumBasedEstimatorBase):
                 usually leads to more sparse solutions, at the cost of increased
                 biases.
             solver_options (dict): A dictionary of additional keyword arguments
-                to be passed to the optimizer. For instance, you can specify the
-                solver or set the verbosity.
+                to be passed to the optimizer. For the native backend, you can
+                specify ``max_iter`` and ``tol``. For the cvxpy backend, you
+                can specify the solver or set the verbosity.
             return_spectrum (bool): Set to ``True`` to also output the spectrum
                 for visualization. Default value if ``False``.
                 
@@ -266,9 +404,6 @@ class GroupSparseEstimator(SpectrumBasedEstimatorBase):
         """
         if 'refine_estimates' in kwargs:
             raise ValueError('Grid refinement is not supported.')
-        if Y.shape[0] != self._array.size:
-            raise ValueError('The number of rows of Y must be equal to the array size.')
-        if Y.shape[1] != self._n_snapshots:
-            raise ValueError('The number of columns of Y must be equal to the number of snapshots.')
+        self._check_measurements(Y)
         f_sp = lambda A: self._get_sparse_spectrum(A, Y, l, solver_options)
         return self._estimate(f_sp, k, **kwargs)
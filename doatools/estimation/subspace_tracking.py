@@ -0,0 +1,187 @@
+from abc import ABC, abstractmethod
+import numpy as np
+
+class SubspaceTracker(ABC):
+    """Base class for signal subspace trackers.
+
+    A subspace tracker recursively updates an estimate of the k-dimensional
+    signal subspace from incoming snapshots without forming or decomposing the
+    sample covariance matrix. Subspace trackers can be passed to
+    :class:`~doatools.estimation.music.MUSIC`,
+    :class:`~doatools.estimation.min_norm.MinNorm`,
+    :class:`~doatools.estimation.music.RootMUSIC1D`, and
+    :class:`~doatools.estimation.esprit.Esprit1D` in place of the covariance
+    matrix.
+
+    Args:
+        m (int): Number of sensors.
+        k (int): Dimension of the signal subspace being tracked.
+        forgetting_factor (float): The forgetting factor, :math:`\\beta`,
+            within (0, 1]. Smaller values lead to faster tracking at the cost
+            of higher steady-state errors. Default value is 0.99.
+        W0 (~numpy.ndarray): An M x k matrix used to initialize the subspace
+            estimate. Default value is ``None``, which uses the first k columns
+            of the identity matrix.
+    """
+
+    def __init__(self, m, k, forgetting_factor=0.99, W0=None):
+        if k < 1 or k >= m:
+            raise ValueError('The dimension of the signal subspace must be between 1 and {0}.'.format(m - 1))
+        if forgetting_factor <= 0.0 or forgetting_factor > 1.0:
+            raise ValueError('The forgetting factor must be within (0, 1].')
+        if W0 is not None and W0.shape != (m, k):
+            raise ValueError('W0 must be a {0} x {1} matrix.'.format(m, k))
+        self._m = m
+        self._k = k
+        self._beta = forgetting_factor
+        self._W = np.eye(m, k, dtype=np.complex_) if W0 is None \
+            else np.array(W0, dtype=np.complex_)
+        self._n_snapshots = 0
+
+    @property
+    def size(self):
+        """Retrieves the number of sensors."""
+        return self._m
+
+    @property
+    def rank(self):
+        """Retrieves the dimension of the signal subspace being tracked."""
+        return self._k
+
+    @property
+    def forgetting_factor(self):
+        """Retrieves the forgetting factor."""
+        return self._beta
+
+    @property
+    def n_snapshots(self):
+        """Retrieves the number of snapshots received."""
+        return self._n_snapshots
+
+    @property
+    def basis(self):
+        """Retrieves the current (not necessarily orthonormal) M x k basis
+        estimate. You are not supposed to modify the returned array."""
+        return self._W
+
+    def update(self, Y):
+        """Updates the subspace estimate with a block of snapshots.
+
+        Args:
+            Y (~numpy.ndarray): An M x n matrix of n snapshots, where each
+                column is a snapshot. A single snapshot can also be given as
+                a vector of length M.
+        """
+        Y = np.asarray(Y)
+        if Y.ndim == 1:
+            Y = Y[:, np.newaxis]
+        if Y.ndim != 2 or Y.shape[0] != self._m:
+            raise ValueError('Expecting an {0} x n matrix of snapshots.'.format(self._m))
+        for t in range(Y.shape[1]):
+            self._update_snapshot(Y[:, t].astype(np.complex_))
+        self._n_snapshots += Y.shape[1]
+
+    @abstractmethod
+    def _update_snapshot(self, x):
+        """Updates the subspace estimate with a single snapshot."""
+        raise NotImplementedError()
+
+    def get_signal_subspace(self, k=None):
+        """Retrieves an orthonormal basis of the tracked signal subspace.
+
+        Args:
+            k (int): Expected dimension of the signal subspace. Must match the
+                dimension being tracked. Default value is ``None``, which skips
+                the check.
+
+        Returns:
+            ~numpy.ndarray: An M x k matrix with orthonormal columns.
+        """
+        if k is not None and k != self._k:
+            raise ValueError(
+                'Expected {0} sources but the tracker tracks a {1}-dimensional subspace.'
+                .format(k, self._k)
+            )
+        # The columns of W are only asymptotically orthonormal.
+        Q, _ = np.linalg.qr(self._W)
+        return Q
+
+class PASTTracker(SubspaceTracker):
+    r"""Tracks the signal subspace with the projection approximation subspace
+    tracking (PAST) algorithm.
+
+    Each snapshot costs :math:`O(Mk + k^2)` operations. The inverse of the
+    correlation matrix of the compressed snapshots,
+    :math:`\mathbf{W}^H\mathbf{x}(t)`, is updated with the recursive least
+    squares method.
+
+    Args:
+        m (int): Number of sensors.
+        k (int): Dimension of the signal subspace being tracked.
+        forgetting_factor (float): The forgetting factor. See
+            :class:`SubspaceTracker`.
+        W0 (~numpy.ndarray): Initial subspace estimate. See
+            :class:`SubspaceTracker`.
+
+    References:
+        [1] B. Yang, "Projection approximation subspace tracking," IEEE
+        Transactions on Signal Processing, vol. 43, no. 1, pp. 95-107,
+        Jan. 1995.
+    """
+
+    def __init__(self, m, k, forgetting_factor=0.99, W0=None):
+        super().__init__(m, k, forgetting_factor, W0)
+        self._P = np.eye(k, dtype=np.complex_)
+
+    def _update_snapshot(self, x):
+        y = self._W.conj().T @ x
+        h = self._P @ y
+        g = h / (self._beta + np.vdot(y, h).real)
+        P = (self._P - np.outer(g, h.conj())) / self._beta
+        # Keep P Hermitian.
+        self._P = 0.5 * (P + P.conj().T)
+        e = x - self._W @ y
+        self._W += np.outer(e, g.conj())
+
+class PASTdTracker(SubspaceTracker):
+    r"""Tracks the signal subspace with the deflation version of the
+    projection approximation subspace tracking (PASTd) algorithm.
+
+    The basis vectors are updated one at a time, and the projection onto the
+    current basis vector is removed from the snapshot before the next one is
+    updated. Each snapshot costs :math:`O(Mk)` operations. In addition to the
+    signal subspace, PASTd also tracks the k dominant eigenvalues of the
+    covariance matrix.
+
+    Args:
+        m (int): Number of sensors.
+        k (int): Dimension of the signal subspace being tracked.
+        forgetting_factor (float): The forgetting factor. See
+            :class:`SubspaceTracker`.
+        W0 (~numpy.ndarray): Initial subspace estimate. See
+            :class:`SubspaceTracker`.
+
+    References:
+        [1] B. Yang, "Projection approximation subspace tracking," IEEE
+        Transactions on Signal Processing, vol. 43, no. 1, pp. 95-107,
+        Jan. 1995.
+    """
+
+    def __init__(self, m, k, forgetting_factor=0.99, W0=None):
+        super().__init__(m, k, forgetting_factor, W0)
+        self._d = np.ones((k,))
+
+    @property
+    def eigenvalues(self):
+        """Retrieves the estimates of the k dominant eigenvalues of the
+        covariance matrix, scaled by :math:`1/(1 - \\beta)`."""
+        return self._d
+
+    def _update_snapshot(self, x):
+        x = x.copy()
+        for i in range(self._k):
+            w = self._W[:, i]
+            y = np.vdot(w, x)
+            self._d[i] = self._beta * self._d[i] + (y.real**2 + y.imag**2)
+            w += (x - w * y) * (y.conjugate() / self._d[i])
+            x -= w * y
@@ -3,4 +3,5 @@ from .arrays import *
 from .coarray import WeightFunction1D
 from .signals import ComplexStochasticSignal
 from .sources import FarField1DSourcePlacement, FarField2DSourcePlacement, NearField2DSourcePlacement
-from .snapshots import get_narrowband_snapshots
+from .snapshots import get_narrowband_snapshots, iter_narrowband_snapshots, \
+                       get_narrowband_covariance, CovarianceAccumulator
@@ -213,6 +213,25 @@ class ArrayDesign:
             }
             perturbations = [factories[k](v[0], v[1]) for k, v in perturbations.items()]
         return perturbations
+
+    def _get_perturbation_list(self, perturbations):
+        """Filters perturbations.
+
+        Args:
+            perturbations (str): ``'all'``, ``'known'``, or ``'none'``. See
+                :meth:`steering_matrix` for details.
+
+        Returns:
+            list: A list of the selected perturbations.
+        """
+        if perturbations == 'all':
+            return list(self._perturbations.values())
+        elif perturbations == 'known':
+            return [v for v in self._perturbations.values() if v.is_known]
+        elif perturbations == 'none':
+            return []
+        else:
+            raise ValueError('Perturbation can only be "all", "known", or "none".')
         
     def get_perturbed_copy(self, perturbations, new_name=None):
         """Returns a copy of this array design but with the specified
@@ -391,14 +410,7 @@ class ArrayDesign:
             of arrays.
         """
         # Filter perturbations.
-        if perturbations == 'all':
-            perturb_list = self._perturbations.values()
-        elif perturbations == 'known':
-            perturb_list = [v for v in self._perturbations.values() if v.is_known]
-        elif perturbations == 'none':
-            perturb_list = []
-        else:
-            raise ValueError('Perturbation can only be "all", "known", or "none".')
+        perturb_list = self._get_perturbation_list(perturbations)
         # Check array element.
         if not self._element.is_isotropic or not self._element.is_scalar:
             require_spatial_response = True
@@ -532,6 +544,51 @@ class GridBasedArrayDesign(ArrayDesign):
         """
         return self._element_indices.copy()
 
+    def steering_matrix(self, sources, wavelength, compute_derivatives=False,
+                        perturbations='all', flatten=True):
+        r"""Creates the steering matrix for the given DOAs.
+
+        See :meth:`ArrayDesign.steering_matrix` for details.
+
+        For far-field sources, the phase delays are linear in the sensor
+        locations. Given the phase delays associated with the basis vectors,
+        :math:`\phi_1, \ldots, \phi_d`, the steering vector element of the
+        :math:`(i_1, \ldots, i_d)`-th sensor factorizes as
+
+        .. math::
+
+            e^{j(i_1 \phi_1 + \cdots + i_d \phi_d)}
+            = e^{j i_1 \phi_1} \cdots e^{j i_d \phi_d}.
+
+        For multi-dimensional grids of isotropic scalar sensors without
+        perturbations, this method exploits this factorization so that only
+        :math:`n_1 + \cdots + n_d` exponentials instead of
+        :math:`n_1 n_2 \cdots n_d` exponentials are evaluated for each source,
+        where :math:`n_i` is the number of grid points along the :math:`i`-th
+        axis.
+        """
+        if (self._bases.shape[0] > 1 and sources.is_far_field and
+                not compute_derivatives and self._element.is_isotropic and
+                self._element.is_scalar and
+                len(self._get_perturbation_list(perturbations)) == 0):
+            return self._separable_steering_matrix(sources, wavelength)
+        return super().steering_matrix(sources, wavelength, compute_derivatives,
+                                       perturbations, flatten)
+
+    def _separable_steering_matrix(self, sources, wavelength):
+        # Phase delays associated with each basis vector.
+        Phi = sources.phase_delay_matrix(self._bases, wavelength)
+        A = None
+        for i in range(self._bases.shape[0]):
+            indices = self._element_indices[:, i]
+            i_min = indices.min()
+            E = np.exp(1j * np.outer(np.arange(i_min, indices.max() + 1), Phi[i]))
+            if A is None:
+                A = E[indices - i_min]
+            else:
+                A *= E[indices - i_min]
+        return A
+
 class UniformLinearArray(GridBasedArrayDesign):
     """Creates an n-element uniform linear array (ULA).
         
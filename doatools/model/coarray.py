@@ -1,4 +1,5 @@
 import numpy as np
+from scipy.sparse import csr_matrix
 from .arrays import GridBasedArrayDesign
 from ..utils.math import unique_rows
 
@@ -47,7 +48,6 @@ class WeightFunction1D:
         if array.ndim != 1 or not isinstance(array, GridBasedArrayDesign):
             raise ValueError('Expecting a 1D grid-based array.')
         self._m = array.size
-        self._mv = None
         self._build_map(array)
 
     def __call__(self, diff):
@@ -56,7 +56,7 @@ class WeightFunction1D:
 
     def __len__(self):
         """Retrieves the number of unique differences."""
-        return len(self._index_map)
+        return self._differences.size
 
     def differences(self):
         """Retrieves a 1D array of unique differences in ascending order.
@@ -72,14 +72,22 @@ class WeightFunction1D:
         The ordering of elements returned by :meth:`differences` and the
         ordering of elements returned by :meth:`weights` are the same.
         """
-        return np.array([len(self._index_map[x]) for x in self._differences])
+        return np.diff(self._offsets)
+
+    def _find(self, diff):
+        """Retrieves the position of the given difference in the sorted unique
+        differences, or -1 if it does not exist."""
+        i = np.searchsorted(self._differences, diff)
+        if i < self._differences.size and self._differences[i] == diff:
+            return i
+        return -1
 
     def weight_of(self, diff):
         """Evaluates the weight function at the given difference."""
-        if diff in self._index_map:
-            return len(self._index_map[diff])
-        else:
+        i = self._find(diff)
+        if i < 0:
             return 0
+        return int(self._offsets[i + 1] - self._offsets[i])
 
     def indices_of(self, diff):
         """Retrieves the list of indices of elements in the vectorized
@@ -89,10 +97,10 @@ class WeightFunction1D:
         Args:
             diff (int): Difference.
         """
-        if diff in self._index_map:
-            return self._index_map[diff][:]
-        else:
+        i = self._find(diff)
+        if i < 0:
             return []
+        return self._indices[self._offsets[i]:self._offsets[i + 1]].tolist()
 
     def get_central_ula_size(self, exclude_negative_part=False):
         r"""Gets the size of the central ULA in the difference coarray.
@@ -120,14 +128,10 @@ class WeightFunction1D:
                 
                 Default value is ``False``.
         """
-        if self._mv is None:
-            mv = 0
-            while mv in self._index_map:
-                mv += 1
-            self._mv = mv
         return self._mv if exclude_negative_part else self._mv * 2 - 1 
     
-    def get_coarray_selection_matrix(self, exclude_negative_part=False):
+    def get_coarray_selection_matrix(self, exclude_negative_part=False,
+                                     sparse=False):
         r"""Gets the coarray selection matrix.
 
         Let the central ULA size be :math:`2M_{\mathrm{v}} - 1` and the original
@@ -147,6 +151,9 @@ class WeightFunction1D:
                 :math:`\lbrack 0, 1, \ldots, M_\mathrm{v} - 1\rbrack`) will be
                 considered, and the resulting :math:`\mathbf{F}` will be
                 :math:`M_\mathrm{v} \times M^2`. Default value is ``False``.
+            sparse (bool): If set to ``True``, returns a
+                :class:`~scipy.sparse.csr_matrix` instead of a dense matrix.
+                Default value is ``False``.
         
         Returns:
             The coarray selection matrix.
@@ -156,30 +163,42 @@ class WeightFunction1D:
             Bound," IEEE Transactions on Signal Processing, vol. 65, no. 4,
             pp. 933-946, Feb. 2017.
         """
-        m_v = self.get_central_ula_size(exclude_negative_part=True)
+        m_v = self._mv
+        # Position of the zero difference.
+        i0 = self._find(0)
         if exclude_negative_part:
-            m_ula = m_v
-            diff_range = range(0, m_v)
+            first = i0
         else:
-            m_ula = 2 * m_v - 1
-            diff_range = range(-m_v + 1, m_v)
-        F = np.zeros((m_ula, self._m**2))
-        for i, diff in enumerate(diff_range):
-            F[i, self.indices_of(diff)] = 1.0 / self.weight_of(diff)
+            first = i0 - m_v + 1
+        last = i0 + m_v
+        # The central ULA part is contiguous in the sorted unique differences,
+        # so its indices form a contiguous block.
+        offsets = self._offsets[first:last + 1]
+        indptr = offsets - offsets[0]
+        indices = self._indices[offsets[0]:offsets[-1]]
+        counts = np.diff(offsets)
+        data = np.repeat(1.0 / counts, counts)
+        shape = (last - first, self._m**2)
+        if sparse:
+            return csr_matrix((data, indices, indptr), shape=shape)
+        F = np.zeros(shape)
+        F[np.repeat(np.arange(shape[0]), counts), indices] = data
         return F
     
     def _build_map(self, array):
-        # Maps difference -> indices in the vectorized difference matrix 
-        index_map = {}
+        # Group the indices in the vectorized difference matrix by their
+        # differences. The indices of the i-th unique difference are stored in
+        # indices[offsets[i]:offsets[i+1]] in ascending order.
         diffs = compute_location_differences(array.element_indices).flatten()
-        for i, diff in enumerate(diffs):
-            if diff in index_map:
-                index_map[diff].append(i)
-            else:
-                index_map[diff] = [i]
-        # Collect all unique differences and sort them
-        differences = np.fromiter(index_map.keys(),
-            dtype=np.int_, count=len(index_map))
-        differences.sort()
-        self._index_map = index_map
-        self._differences = differences
+        differences, inverse = np.unique(diffs, return_inverse=True)
+        self._indices = np.argsort(inverse, kind='stable')
+        self._offsets = np.zeros((differences.size + 1,), dtype=np.int_)
+        np.cumsum(np.bincount(inverse, minlength=differences.size),
+                  out=self._offsets[1:])
+        self._differences = differences.astype(np.int_)
+        # The unique differences are sorted integers, so the nonnegative part
+        # of the central ULA consists of the leading differences d such that
+        # d[i0 + k] == k.
+        nonneg = self._differences[self._differences >= 0]
+        gaps = np.flatnonzero(nonneg != np.arange(nonneg.size))
+        self._mv = int(gaps[0]) if gaps.size > 0 else nonneg.size
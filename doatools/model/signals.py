@@ -24,6 +24,29 @@ class SignalGenerator(ABC):
         """
         pass
 
+    def emit_blocks(self, n, block_size):
+        """Emits the signal matrix in blocks of columns.
+
+        The default implementation calls :meth:`emit` for each block, so the
+        concatenation of the blocks follows the same distribution as
+        ``emit(n)`` but consists of different samples. Built-in signal
+        generators override this method so that the concatenation of the
+        blocks is identical to the output of ``emit(n)`` with the same global
+        random state. In this case, the random draws are consumed (but not
+        stored) when this method is called, which leaves the global random
+        state as if ``emit(n)`` were called.
+
+        Args:
+            n (int): Total number of samples.
+            block_size (int): Maximum number of samples in each block. The
+                last block may contain fewer samples.
+
+        Returns:
+            An iterator of k x b matrices, where b is the number of samples in
+            each block.
+        """
+        return (self.emit(b) for b in _get_block_sizes(n, block_size))
+
 class ComplexStochasticSignal(SignalGenerator):
     """Creates a signal generator that generates zero-mean complex
     circularly-symmetric Gaussian signals.
@@ -49,19 +72,19 @@ class ComplexStochasticSignal(SignalGenerator):
         if np.isscalar(C):
             # Scalar
             self._C2 = np.sqrt(C)
-            self._generator = lambda n: self._C2 * randcn((self._dim, n))
+            self._transform = lambda x: self._C2 * x
         elif C.ndim == 1:
             # Vector
             if C.size != dim:
                 raise ValueError('The size of C must be {0}.'.format(dim))
             self._C2 = np.sqrt(C).reshape((-1, 1))
-            self._generator = lambda n: self._C2 * randcn((self._dim, n))
+            self._transform = lambda x: self._C2 * x
         elif C.ndim == 2:
             # Matrix
             if C.shape[0] != dim or C.shape[1] != dim:
                 raise ValueError('The shape of C must be ({0}, {0}).'.format(dim))
             self._C2 = sqrtm(C)
-            self._generator = lambda n: self._C2 @ randcn((self._dim, n))
+            self._transform = lambda x: self._C2 @ x
         else:
             raise ValueError(
                 'The covariance must be specified by a scalar, a vector of'
@@ -74,7 +97,20 @@ class ComplexStochasticSignal(SignalGenerator):
         return self._dim
 
     def emit(self, n):
-        return self._generator(n)
+        return self._transform(randcn((self._dim, n)))
+
+    def emit_blocks(self, n, block_size):
+        # randcn draws the imaginary parts before the real parts.
+        imag = _RowMajorReplay(self._dim, n, lambda rs, b: rs.randn(b))
+        real = _RowMajorReplay(self._dim, n, lambda rs, b: rs.randn(b))
+        def generate():
+            for b in _get_block_sizes(n, block_size):
+                # Same operations as randcn.
+                x = 1j * imag.draw(b)
+                x += real.draw(b)
+                x *= np.sqrt(0.5)
+                yield self._transform(x)
+        return generate()
 
 class RandomPhaseSignal(SignalGenerator):
     r"""Creates a random phase signal generator.
@@ -105,6 +141,61 @@ class RandomPhaseSignal(SignalGenerator):
 
     def emit(self, n):
         phases = np.random.uniform(-np.pi, np.pi, (self._dim, n))
+        return self._from_phases(phases)
+
+    def emit_blocks(self, n, block_size):
+        phases = _RowMajorReplay(self._dim, n,
+                                 lambda rs, b: rs.uniform(-np.pi, np.pi, b))
+        return (self._from_phases(phases.draw(b))
+                for b in _get_block_sizes(n, block_size))
+
+    def _from_phases(self, phases):
         c = np.sin(phases) * 1j
         c += np.cos(phases)
         return self._amplitudes * c
+
+def _get_block_sizes(n, block_size):
+    """Splits n into blocks of at most block_size."""
+    if block_size < 1:
+        raise ValueError('The block size must be positive.')
+    sizes = [block_size] * (n // block_size)
+    if n % block_size > 0:
+        sizes.append(n % block_size)
+    return sizes
+
+class _RowMajorReplay:
+    """Replays the random draws that fill a d x n array in row-major order
+    from the global random state, one block of columns at a time.
+
+    On creation, the global random state is advanced past all the d x n draws
+    (in chunks so that the draws are never stored), and the random state at
+    the beginning of each row is recorded. Each row is then replayed with its
+    own :class:`~numpy.random.RandomState`.
+
+    Args:
+        d (int): Number of rows.
+        n (int): Number of columns.
+        f: A callable ``f(rs, b)`` that draws b samples from the
+            :class:`~numpy.random.RandomState` ``rs``. Drawing b1 samples and
+            then b2 samples must be equivalent to drawing b1 + b2 samples.
+    """
+
+    # Number of samples drawn at a time when skipping rows.
+    SKIP_BLOCK_SIZE = 65536
+
+    def __init__(self, d, n, f):
+        self._f = f
+        rs = np.random.RandomState()
+        rs.set_state(np.random.get_state())
+        self._streams = []
+        for _ in range(d):
+            rs_row = np.random.RandomState()
+            rs_row.set_state(rs.get_state())
+            self._streams.append(rs_row)
+            for b in _get_block_sizes(n, self.SKIP_BLOCK_SIZE):
+                f(rs, b)
+        np.random.set_state(rs.get_state())
+
+    def draw(self, b):
+        """Draws the next b columns."""
+        return np.stack([self._f(rs, b) for rs in self._streams])
@@ -1,3 +1,6 @@
+import numpy as np
+from scipy.linalg.blas import zherk
+
 def get_narrowband_snapshots(array, sources, wavelength, source_signal,
                              noise_signal=None, n_snapshots=1,
                              return_covariance=False):
@@ -54,3 +57,275 @@ def get_narrowband_snapshots(array, sources, wavelength, source_signal,
         return Y, R
     else:
         return Y
+
+def iter_narrowband_snapshots(array, sources, wavelength, source_signal,
+                              noise_signal=None, n_snapshots=1,
+                              block_size=4096, out=None):
+    r"""Generates snapshots based on the narrowband snapshot model in blocks.
+
+    This is the streaming version of :meth:`get_narrowband_snapshots`, which
+    yields the snapshot matrix :math:`\mathbf{Y}` in blocks of columns so that
+    the full snapshot matrix, the source signal matrix, and the noise matrix
+    are never allocated.
+
+    For the built-in signal generators, the concatenation of the blocks equals
+    (up to floating point rounding in the matrix multiplications) the
+    snapshot matrix returned by :meth:`get_narrowband_snapshots` with the same
+    global random state, and the global random state after the first block
+    is generated is identical to that after the one-shot call. See
+    :meth:`~doatools.model.signals.SignalGenerator.emit_blocks` for details.
+
+    Args:
+        array (~doatools.model.arrays.ArrayDesign): The array receiving the
+            snapshots.
+        sources (~doatools.model.sources.SourcePlacement): Source placement.
+        wavelength (float): Wavelength of the carrier wave.
+        source_signal (~doatools.model.signals.SignalGenerator):
+            Source signal generator.
+        noise_signal (~doatools.model.signals.SignalGenerator):
+            Noise signal generator. Default value is ``None``, meaning no
+            additive noise.
+        n_snapshots (int): Total number of snapshots. Default value is 1.
+        block_size (int): Maximum number of snapshots in each block. Default
+            value is 4096.
+        out (~numpy.ndarray): An optional preallocated complex M x block_size
+            output buffer. If specified, each block is written into the first
+            columns of ``out`` and a view of ``out`` is yielded, so the
+            yielded block is overwritten when the next block is generated.
+            Default value is ``None``.
+
+    Yields:
+        ~numpy.ndarray: An M x b matrix of b snapshots.
+    """
+    A = array.steering_matrix(sources, wavelength)
+    if out is not None and (out.shape != (A.shape[0], block_size) or
+                            out.dtype != np.complex_):
+        raise ValueError(
+            'The output buffer must be a complex matrix of shape {0}.'
+            .format((A.shape[0], block_size))
+        )
+    # The blocks of the source signal must be created before those of the
+    # noise signal to consume the random draws in the same order as
+    # get_narrowband_snapshots.
+    S_blocks = source_signal.emit_blocks(n_snapshots, block_size)
+    N_blocks = None if noise_signal is None \
+        else noise_signal.emit_blocks(n_snapshots, block_size)
+    for S in S_blocks:
+        if out is None:
+            Y = A @ S
+        else:
+            Y = out[:, :S.shape[1]]
+            np.matmul(A, S, out=Y)
+        if N_blocks is not None:
+            Y += next(N_blocks)
+        yield Y
+
+def get_narrowband_covariance(array, sources, wavelength, source_signal,
+                              noise_signal=None, n_snapshots=1,
+                              block_size=4096, accumulator=None):
+    r"""Computes the sample covariance matrix of the snapshots generated by
+    the narrowband snapshot model without storing the snapshots.
+
+    The snapshots are generated in blocks with
+    :meth:`iter_narrowband_snapshots` using a single reused output buffer and
+    accumulated with a :class:`CovarianceAccumulator`, so the memory usage is
+    :math:`O(M^2 + M B)` regardless of the number of snapshots, where B is the
+    block size.
+
+    Args:
+        array (~doatools.model.arrays.ArrayDesign): The array receiving the
+            snapshots.
+        sources (~doatools.model.sources.SourcePlacement): Source placement.
+        wavelength (float): Wavelength of the carrier wave.
+        source_signal (~doatools.model.signals.SignalGenerator):
+            Source signal generator.
+        noise_signal (~doatools.model.signals.SignalGenerator):
+            Noise signal generator. Default value is ``None``, meaning no
+            additive noise.
+        n_snapshots (int): Total number of snapshots. Default value is 1.
+        block_size (int): Maximum number of snapshots in each block. Default
+            value is 4096.
+        accumulator (CovarianceAccumulator): An optional accumulator into
+            which the snapshots are fed. Can be used to apply exponential
+            forgetting or sliding windows, or to continue an existing
+            accumulation. Default value is ``None``, which creates a new
+            cumulative accumulator.
+
+    Returns:
+        ~numpy.ndarray: The sample covariance matrix retrieved from the
+        accumulator.
+    """
+    if accumulator is None:
+        accumulator = CovarianceAccumulator(array.size)
+    out = np.empty((array.size, min(block_size, max(n_snapshots, 1))), dtype=np.complex_)
+    for Y in iter_narrowband_snapshots(array, sources, wavelength,
+                                       source_signal, noise_signal,
+                                       n_snapshots, out.shape[1], out):
+        accumulator.update(Y)
+    return accumulator.get_covariance()
+
+class CovarianceAccumulator:
+    r"""Accumulates the sample covariance matrix from blocks of snapshots.
+
+    Snapshots can be fed incrementally with :meth:`update`, and the current
+    sample covariance matrix can be retrieved at any time with
+    :meth:`get_covariance`. Only the upper triangular part of the running sum
+    of the outer products is stored (in packed form), and each block is
+    accumulated with a single Hermitian rank-n update, so the memory usage
+    does not depend on the length of the stream.
+
+    Three accumulation modes are supported:
+
+    * Cumulative (default): all the snapshots are equally weighted, and
+      :math:`\mathbf{R} = \frac{1}{N}\sum_{t=1}^N \mathbf{y}(t)\mathbf{y}^H(t)`.
+    * Exponential forgetting: the t-th snapshot is weighted by
+      :math:`\lambda^{N-t}`, and
+      :math:`\mathbf{R} = \sum_{t=1}^N \lambda^{N-t} \mathbf{y}(t)\mathbf{y}^H(t)
+      / \sum_{t=1}^N \lambda^{N-t}`.
+    * Sliding window: only the most recent L snapshots are used. The
+      snapshots within the window are kept in a ring buffer of size
+      M x L so that the departing snapshots can be removed from the running
+      sum. The running sum is recomputed from the ring buffer once every L
+      snapshots to prevent the accumulation of rounding errors.
+
+    Args:
+        m (int): Number of sensors.
+        forgetting_factor (float): The forgetting factor :math:`\lambda`.
+            Must be within (0, 1]. Default value is 1, meaning no forgetting.
+        window_size (int): Length of the sliding window, L. Cannot be combined
+            with exponential forgetting. Default value is ``None``, meaning
+            no sliding window.
+    """
+
+    def __init__(self, m, forgetting_factor=1.0, window_size=None):
+        if m < 1:
+            raise ValueError('The number of sensors must be positive.')
+        if forgetting_factor <= 0.0 or forgetting_factor > 1.0:
+            raise ValueError('The forgetting factor must be within (0, 1].')
+        if window_size is not None:
+            if window_size < 1:
+                raise ValueError('The window size must be positive.')
+            if forgetting_factor != 1.0:
+                raise ValueError('Sliding windows cannot be combined with exponential forgetting.')
+        self._m = m
+        self._forgetting_factor = forgetting_factor
+        self._window_size = window_size
+        self._triu_indices = np.triu_indices(m)
+        self.reset()
+
+    @property
+    def size(self):
+        """Retrieves the number of sensors."""
+        return self._m
+
+    @property
+    def forgetting_factor(self):
+        """Retrieves the forgetting factor."""
+        return self._forgetting_factor
+
+    @property
+    def window_size(self):
+        """Retrieves the length of the sliding window. ``None`` if the sliding
+        window is disabled."""
+        return self._window_size
+
+    @property
+    def n_snapshots(self):
+        """Retrieves the total number of snapshots received since the last
+        reset."""
+        return self._n_snapshots
+
+    @property
+    def weight(self):
+        """Retrieves the sum of the weights of the snapshots in the running
+        sum (i.e., the normalization factor of the covariance matrix)."""
+        return self._weight
+
+    def reset(self):
+        """Discards all the accumulated snapshots."""
+        m = self._m
+        self._sum = np.zeros((m * (m + 1) // 2,), dtype=np.complex_)
+        self._weight = 0.0
+        self._n_snapshots = 0
+        if self._window_size is not None:
+            self._buffer = np.zeros((m, self._window_size), dtype=np.complex_)
+            self._buffer_pos = 0
+            self._n_since_refresh = 0
+
+    def update(self, Y):
+        """Accumulates a block of snapshots.
+
+        Args:
+            Y (~numpy.ndarray): An M x n matrix of n snapshots, where each
+                column is a snapshot. A single snapshot can also be given as
+                a vector of length M.
+        """
+        Y = np.asarray(Y)
+        if Y.ndim == 1:
+            Y = Y[:, np.newaxis]
+        if Y.ndim != 2 or Y.shape[0] != self._m:
+            raise ValueError('Expecting an {0} x n matrix of snapshots.'.format(self._m))
+        n = Y.shape[1]
+        if n == 0:
+            return
+        Y = Y.astype(np.complex_, copy=False)
+        if self._window_size is not None:
+            self._update_window(Y)
+        elif self._forgetting_factor < 1.0:
+            # Weight the t-th snapshot by sqrt(lambda^(n - t)) so that the
+            # outer products are weighted by lambda^(n - t).
+            w = self._forgetting_factor ** np.arange(n - 1, -1, -1, dtype=np.float_)
+            decay = self._forgetting_factor ** n
+            self._sum *= decay
+            self._sum += self._packed_outer(Y * np.sqrt(w))
+            self._weight = decay * self._weight + np.sum(w)
+        else:
+            self._sum += self._packed_outer(Y)
+            self._weight += n
+        self._n_snapshots += n
+
+    def _update_window(self, Y):
+        L = self._window_size
+        n = Y.shape[1]
+        if n >= L:
+            self._buffer[:] = Y[:, -L:]
+            self._buffer_pos = 0
+            self._refresh_window()
+        else:
+            # Columns of the ring buffer to be overwritten. They store either
+            # the oldest snapshots or zeros (if the window is not filled yet).
+            indices = (self._buffer_pos + np.arange(n)) % L
+            self._sum -= self._packed_outer(self._buffer[:, indices])
+            self._sum += self._packed_outer(Y)
+            self._buffer[:, indices] = Y
+            self._buffer_pos = (self._buffer_pos + n) % L
+            self._n_since_refresh += n
+            if self._n_since_refresh >= L:
+                self._refresh_window()
+        self._weight = float(min(self._n_snapshots + n, L))
+
+    def _refresh_window(self):
+        """Recomputes the running sum from the ring buffer."""
+        self._sum = self._packed_outer(self._buffer)
+        self._n_since_refresh = 0
+
+    def _packed_outer(self, Y):
+        """Computes the upper triangular part of Y Y^H in packed form."""
+        # Only the upper triangular part is computed by the Hermitian rank-n
+        # update.
+        return zherk(1.0, Y)[self._triu_indices]
+
+    def get_covariance(self):
+        """Retrieves the current sample covariance matrix.
+
+        Returns:
+            ~numpy.ndarray: An M x M Hermitian matrix. The returned matrix is
+            a new array and can be modified freely.
+        """
+        if self._weight == 0:
+            raise RuntimeError('No snapshots have been received.')
+        R = np.empty((self._m, self._m), dtype=np.complex_)
+        i, j = self._triu_indices
+        R[i, j] = self._sum / self._weight
+        R[j, i] = R[i, j].conj()
+        return R
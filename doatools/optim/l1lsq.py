@@ -1,13 +1,279 @@
 import numpy as np
 import warnings
+from scipy.linalg import eigvalsh
+from scipy.sparse.linalg import LinearOperator, eigsh
 try:
     import cvxpy as cvx
     cvx_available = True
 except ImportError:
-    warnings.warn('Cannot import cvxpr. Some sparse recovery based estimators will not be usable.')
     cvx_available = False
 
-class L1RegularizedLeastSquaresProblem:
+def _as_array(A):
+    """Materializes the dictionary matrix if it is an implicit operator (e.g.,
+    :class:`~doatools.optim.operators.KhatriRaoDictionary`)."""
+    return A.toarray() if isinstance(A, LinearOperator) else A
+
+def _select_columns(A, indices):
+    """Selects the columns of the dictionary matrix, which can be an implicit
+    operator."""
+    if isinstance(A, LinearOperator):
+        return A.select_columns(indices)
+    return A[:, indices]
+
+def _soft_threshold(x, t, nonnegative):
+    """Evaluates the proximal operator of ``t * ||x||_1`` (plus the indicator
+    function of the nonnegative orthant if ``nonnegative`` is ``True``)."""
+    if nonnegative:
+        return np.maximum(x - t, 0.0)
+    return np.sign(x) * np.maximum(np.abs(x) - t, 0.0)
+
+def _group_soft_threshold(X, t):
+    """Evaluates the proximal operator of ``t * ||X||_{2,1}``, which shrinks
+    the l2 norm of each row of X by t."""
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = np.maximum(1.0 - t / norms, 0.0)
+    scale[norms == 0] = 0.0
+    return X * scale
+
+def _project_l1_ball(x, r, nonnegative):
+    """Projects x onto ``{x : ||x||_1 <= r}`` (intersected with the nonnegative
+    orthant if ``nonnegative`` is ``True``).
+
+    References:
+        [1] J. Duchi, S. Shalev-Shwartz, Y. Singer, and T. Chandra, "Efficient
+        projections onto the l1-ball for learning in high dimensions," in
+        Proceedings of the 25th International Conference on Machine Learning,
+        2008, pp. 272-279.
+    """
+    v = np.maximum(x, 0.0) if nonnegative else np.abs(x)
+    if v.sum() <= r:
+        return v if nonnegative else x
+    # Find the threshold such that the soft-thresholded vector sums to r.
+    u = np.sort(v.ravel())[::-1]
+    css = np.cumsum(u) - r
+    ind = np.arange(1, u.size + 1)
+    rho = np.flatnonzero(u * ind > css)[-1]
+    theta = css[rho] / (rho + 1.0)
+    w = np.maximum(v - theta, 0.0)
+    return w if nonnegative else np.sign(x) * w
+
+def _l1_duality_gap(A, b, x, l, nonnegative):
+    """Computes the duality gap of the 'penalizedl1' formulation.
+
+    A dual feasible point is obtained by rescaling the residual.
+
+    Returns:
+        A tuple ``(gap, corr)``, where ``corr`` stores the (absolute values
+        of) correlations between the columns of A and the dual point.
+    """
+    r = b - A @ x
+    c = A.T @ r
+    if not nonnegative:
+        c = np.abs(c)
+    scale = max(l, c.max()) if c.size > 0 else l
+    theta = r / scale
+    primal = 0.5 * np.dot(r, r) + l * np.sum(np.abs(x))
+    dual = 0.5 * np.dot(b, b) - 0.5 * l * l * np.sum((theta - b / l)**2)
+    return max(primal - dual, 0.0), c / scale
+
+def _l21_duality_gap(A, B, X, l):
+    """Computes the duality gap of the l2,1-norm regularized least squares
+    problem. See :meth:`_l1_duality_gap`."""
+    R = B - A @ X
+    c = np.linalg.norm(A.conj().T @ R, axis=1)
+    scale = max(l, c.max()) if c.size > 0 else l
+    theta = R / scale
+    primal = 0.5 * np.linalg.norm(R)**2 + l * np.sum(np.linalg.norm(X, axis=1))
+    dual = 0.5 * np.linalg.norm(B)**2 - \
+        0.5 * l * l * np.linalg.norm(theta - B / l)**2
+    return max(primal - dual, 0.0), c / scale
+
+def _l1_duality_gap_gram(G, c, bb, x, l, nonnegative):
+    """Computes the duality gap of the 'penalizedl1' formulation using the
+    Gram matrix ``G = A^T A``, ``c = A^T b``, and ``bb = b^T b``, without
+    accessing the dictionary matrix. See :meth:`_l1_duality_gap`."""
+    support = np.flatnonzero(x)
+    x_s = x[support]
+    Gx = G[:, support] @ x_s
+    cx = np.dot(c[support], x_s)
+    # ||r||^2 and r^T b, where r = b - A x.
+    rr = max(bb - 2.0 * cx + np.dot(x_s, Gx[support]), 0.0)
+    rb = bb - cx
+    corr = c - Gx
+    if not nonnegative:
+        corr = np.abs(corr)
+    scale = max(l, corr.max())
+    primal = 0.5 * rr + l * np.sum(np.abs(x_s))
+    # ||theta - b / l||^2 with theta = r / scale.
+    dist = rr / scale**2 - 2.0 * rb / (scale * l) + bb / l**2
+    dual = 0.5 * bb - 0.5 * l * l * dist
+    return max(primal - dual, 0.0), corr / scale
+
+def _fista(f_grad, f_prox, x0, step, max_iter, tol, f_gap=None,
+           gap_interval=10):
+    """Minimizes ``f(x) + g(x)`` with FISTA and adaptive restarts.
+
+    Args:
+        f_grad: A callable object that evaluates the gradient of f.
+        f_prox: A callable object that accepts ``v`` and ``step`` and
+            evaluates the proximal operator of ``step * g`` at ``v``.
+        x0 (~numpy.ndarray): Initial point.
+        step (float): Step size, which should not exceed the inverse of the
+            Lipschitz constant of the gradient of f.
+        max_iter (int): Maximum number of iterations.
+        tol (float): If ``f_gap`` is specified, the iterations stop when
+            ``f_gap(x) <= tol``. Otherwise the iterations stop when the relative
+            change of x between two consecutive iterations does not exceed
+            ``tol``.
+        f_gap: A callable object that evaluates an upper bound of the
+            suboptimality (e.g., the duality gap), which is evaluated every
+            ``gap_interval`` iterations. Default value is ``None``.
+
+    Returns:
+        A tuple ``(x, n_iter, converged)``.
+
+    References:
+        [1] A. Beck and M. Teboulle, "A fast iterative shrinkage-thresholding
+        algorithm for linear inverse problems," SIAM Journal on Imaging
+        Sciences, vol. 2, no. 1, pp. 183-202, Jan. 2009.
+
+        [2] B. O'Donoghue and E. Candès, "Adaptive restart for accelerated
+        gradient schemes," Foundations of Computational Mathematics, vol. 15,
+        no. 3, pp. 715-732, Jun. 2015.
+    """
+    x = x0
+    y = x0
+    t = 1.0
+    for i in range(max_iter):
+        x_new = f_prox(y - step * f_grad(y), step)
+        dx = x_new - x
+        dx_norm = np.linalg.norm(dx)
+        if f_gap is None:
+            if dx_norm <= tol * np.linalg.norm(x_new):
+                return x_new, i + 1, True
+        elif dx_norm == 0.0 or (i % gap_interval == 0 and f_gap(x_new) <= tol):
+            return x_new, i + 1, True
+        if np.real(np.vdot(y - x_new, dx)) > 0:
+            # Restart the momentum when it points to an ascent direction.
+            t = 1.0
+            y = x_new
+        else:
+            t_new = 0.5 * (1.0 + np.sqrt(1.0 + 4.0 * t * t))
+            y = x_new + ((t - 1.0) / t_new) * dx
+            t = t_new
+        x = x_new
+    return x, max_iter, False
+
+class _FirstOrderProblemBase:
+    """Provides common functionalities for problems that can be solved by the
+    built-in first-order solvers or by cvxpy.
+
+    The spectral information (e.g., the Lipschitz constant) of the most
+    recently used dictionary matrix is cached and reused as long as the same
+    array object is passed to :meth:`solve`. Therefore the dictionary matrix
+    should not be modified in-place between two calls.
+    """
+
+    def __init__(self, backend, max_iter, tol, warm_start):
+        if backend not in ['native', 'cvxpy']:
+            raise ValueError("Unknown backend '{0}'.".format(backend))
+        if backend == 'cvxpy' and not cvx_available:
+            raise RuntimeError('Cannot use the cvxpy backend when cvxpy is not available.')
+        if max_iter < 1:
+            raise ValueError('The maximum number of iterations must be positive.')
+        if tol <= 0:
+            raise ValueError('The tolerance must be positive.')
+        self._backend = backend
+        self._max_iter = max_iter
+        self._tol = tol
+        self._warm_start = warm_start
+        self._cached_dict = None
+        self._dict_cache = {}
+        self._x_prev = None
+
+    @property
+    def backend(self):
+        """Retrieves the backend used to solve the problem."""
+        return self._backend
+
+    def _get_dict_info(self, A, name, f):
+        """Retrieves the cached information of the dictionary matrix, or
+        computes it with ``f`` if not found."""
+        if A is not self._cached_dict:
+            self._cached_dict = A
+            self._dict_cache = {}
+        if name not in self._dict_cache:
+            self._dict_cache[name] = f(A)
+        return self._dict_cache[name]
+
+    def get_lipschitz_constant(self, A):
+        r"""Retrieves the squared spectral norm of the dictionary matrix,
+        :math:`\|\mathbf{A}\|_2^2`, which is the Lipschitz constant of the
+        gradient of :math:`\frac{1}{2}\|\mathbf{A}\mathbf{x}-\mathbf{b}\|_2^2`.
+
+        The result is cached for the most recently used dictionary matrix.
+
+        Args:
+            A (~numpy.ndarray): Dictionary matrix.
+        """
+        def compute(A):
+            m, k = A.shape
+            if isinstance(A, LinearOperator):
+                if min(m, k) <= 2:
+                    A = A.toarray()
+                else:
+                    # Lanczos iterations only require matrix-vector products.
+                    # The estimate is slightly enlarged so that the step size
+                    # is never too large.
+                    G = A.H @ A if k <= m else A @ A.H
+                    v = eigsh(G, k=1, which='LA', tol=1e-8,
+                              return_eigenvectors=False)[0]
+                    return v * (1.0 + 1e-6)
+            G = A @ A.conj().T if m <= k else A.conj().T @ A
+            n = G.shape[0]
+            return eigvalsh(G, subset_by_index=[n - 1, n - 1])[0]
+        return self._get_dict_info(A, 'lipschitz', compute)
+
+    def _get_column_norms(self, A):
+        """Retrieves the l2 norms of the columns of the dictionary matrix."""
+        def compute(A):
+            if isinstance(A, LinearOperator):
+                return A.column_norms()
+            return np.linalg.norm(A, axis=0)
+        return self._get_dict_info(A, 'col_norms', compute)
+
+    def _parse_options(self, kwargs):
+        max_iter = kwargs.pop('max_iter', self._max_iter)
+        tol = kwargs.pop('tol', self._tol)
+        if len(kwargs) > 0:
+            raise ValueError(
+                'Unknown options for the native backend: {0}.'
+                .format(', '.join(kwargs.keys()))
+            )
+        return max_iter, tol
+
+    def _get_initial_point(self, x0, shape, dtype):
+        if x0 is not None:
+            if x0.shape != shape:
+                raise ValueError(
+                    'The shape of the initial point must be {0}. Got {1}.'
+                    .format(shape, x0.shape)
+                )
+            return x0.astype(dtype)
+        if self._warm_start and self._x_prev is not None and \
+                self._x_prev.shape == shape:
+            return self._x_prev
+        return np.zeros(shape, dtype=dtype)
+
+    def _check_convergence(self, converged):
+        if not converged:
+            warnings.warn(
+                'The maximum number of iterations is reached before '
+                'convergence.'
+            )
+
+class L1RegularizedLeastSquaresProblem(_FirstOrderProblemBase):
     r"""Creates a reusable :math:`l_1`-regularized least squares problem.
 
     Let :math:`\mathbf{A}` be an :math:`M \times L` real dictionary matrix,
@@ -16,7 +282,7 @@ class L1RegularizedLeastSquaresProblem:
     a nonnegative scalar. Let :math:`c` equal to 0 if :math:`\mathbf{x}`
     must be nonnegative and :math:`-\infty` if :math:`\mathbf{x}` can be any
     real number.
-    
+
     The default formulation, named ``'penalizedl1'``, is given by
 
     .. math::
@@ -40,7 +306,7 @@ class L1RegularizedLeastSquaresProblem:
         \text{s.t. }& \| \mathbf{x} \|_1 \leq l, \mathbf{x} \geq c.
         \end{aligned}
 
-    This formulation can be efficiently solved with QP.
+    This formulation can be efficiently solved with QP or projected FISTA.
 
     A less common variant, namely the ``'constrainedl2'`` formulation, is
     given by
@@ -52,10 +318,26 @@ class L1RegularizedLeastSquaresProblem:
         \text{s.t. }& \| \mathbf{A}\mathbf{x} - \mathbf{b} \|_2 \leq l,
             \mathbf{x} \geq c.
         \end{aligned}
-    
+
     Note that the :math:`l_2` error is upper bounded by l. If l is too small
     this problem may be infeasible. This formulation can be converted to a
-    SOCP problem.
+    SOCP problem, or solved with ADMM.
+
+    The built-in ``'native'`` backend solves the ``'penalizedl1'`` formulation
+    with FISTA, the ``'constrainedl1'`` formulation with FISTA using
+    projections onto the :math:`l_1` ball, and the ``'constrainedl2'``
+    formulation with ADMM, where the projections onto the feasible set
+    :math:`\{\mathbf{x}: \| \mathbf{A}\mathbf{x} - \mathbf{b} \|_2 \leq l\}`
+    are evaluated with the cached singular value decomposition of
+    :math:`\mathbf{A}`. The ``'cvxpy'`` backend uses cvxpy, which is usually
+    much slower but useful for validation.
+
+    Besides :class:`~numpy.ndarray`, the dictionary matrix can also be an
+    implicit operator such as
+    :class:`~doatools.optim.operators.KhatriRaoDictionary`, which the
+    ``'penalizedl1'`` and ``'constrainedl1'`` formulations access only
+    through matrix-vector products. The ``'constrainedl2'`` formulation and
+    the ``'cvxpy'`` backend materialize the dictionary matrix.
 
     Args:
         m (int): Dimension of the observation vector :math:`\mathbf{b}`.
@@ -65,11 +347,50 @@ class L1RegularizedLeastSquaresProblem:
             ``'constrainedl2'``. Default value is ``'penalizedl1'``.
         nonnegative (bool): Specifies whether :math:`\mathbf{x}` must be
             nonnegative. Default value is ``False``.
+        backend (str): ``'native'`` or ``'cvxpy'``. Default value is
+            ``'native'``.
+        max_iter (int): Maximum number of iterations of the native solvers.
+            Default value is 10000.
+        tol (float): Tolerance used by the native solvers to determine
+            convergence. FISTA stops when the duality gap (or the Frank-Wolfe
+            gap for the ``'constrainedl1'`` formulation) does not exceed
+            ``tol`` times the objective function value at zero. ADMM stops
+            when the relative primal and dual residuals do not exceed ``tol``.
+            Default value is 1e-4.
+        warm_start (bool): If set to ``True``, the native solvers will start
+            from the previous solution when no initial point is given.
+            Default value is ``False``.
+        use_gram (bool): If set to ``True``, the native solver of the
+            ``'penalizedl1'`` formulation will work with the cached Gram
+            matrix :math:`\mathbf{A}^T\mathbf{A}` instead of the dictionary
+            matrix, and will discard the columns that provably correspond to
+            zero elements (GAP safe screening) during the iterations. The cost
+            of each iteration then grows with the number of remaining columns
+            instead of the size of the dictionary. Requires
+            :math:`O(K^2)` memory. Default value is ``False``.
     """
 
-    def __init__(self, m, k, formulation='penalizedl1', nonnegative=False):
-        if not cvx_available:
-            raise RuntimeError('Cannot initialize when cvxpy is not available.')
+    def __init__(self, m, k, formulation='penalizedl1', nonnegative=False,
+                 backend='native', max_iter=10000, tol=1e-4, warm_start=False,
+                 use_gram=False):
+        if formulation not in ['penalizedl1', 'constrainedl1', 'constrainedl2']:
+            raise ValueError("Unknown formulation '{0}'.".format(formulation))
+        if use_gram and formulation != 'penalizedl1':
+            raise ValueError('The Gram matrix can only be used with the penalizedl1 formulation.')
+        super().__init__(backend, max_iter, tol, warm_start)
+        self._m = m
+        self._k = k
+        self._formulation = formulation
+        self._nonnegative = nonnegative
+        self._use_gram = use_gram
+        # Scaled dual variable and penalty parameter of ADMM.
+        self._admm_state = None
+        if backend == 'cvxpy':
+            self._init_cvxpy_problem()
+
+    def _init_cvxpy_problem(self):
+        m, k = self._m, self._k
+        formulation = self._formulation
         # Initialize parameters and variables
         A = cvx.Parameter((m, k))
         b = cvx.Parameter((m, 1))
@@ -82,15 +403,12 @@ class L1RegularizedLeastSquaresProblem:
         elif formulation == 'constrainedl1':
             obj_func = cvx.sum_squares(cvx.matmul(A, x) - b)
             constraints = [cvx.norm1(x) <= l]
-        elif formulation == 'constrainedl2':
+        else:
             obj_func = cvx.norm1(x)
             constraints = [cvx.norm(cvx.matmul(A, x) - b) <= l]
-        else:
-            raise ValueError("Unknown formulation '{0}'.".format(formulation))
-        if nonnegative:
+        if self._nonnegative:
             constraints.append(x >= 0)
         problem = cvx.Problem(cvx.Minimize(obj_func), constraints)
-        self._formulation = formulation
         self._A = A
         self._b = b
         self._l = l
@@ -99,16 +417,42 @@ class L1RegularizedLeastSquaresProblem:
         self._constraints = constraints
         self._problem = problem
 
-    def solve(self, A, b, l, **kwargs):
+    def solve(self, A, b, l, x0=None, **kwargs):
         """Solves the problem with the specified parameters.
 
         Args:
             A (~numpy.ndarray): Dictionary matrix.
             b (~numpy.ndarray): Observation vector.
             l (float): Regularization/constraint parameter.
-            **kwargs: Other keyword arguments to be passed to the solver.
+            x0 (~numpy.ndarray): Initial point used by the native solvers. Must
+                have the shape ``(k,) + b.shape[1:]``. Default value is
+                ``None``, which starts from zero, or from the previous
+                solution if ``warm_start`` is enabled.
+            **kwargs: Other keyword arguments to be passed to the solver. For
+                the native backend, ``max_iter`` and ``tol`` can be used to
+                override the default settings.
+
+        Returns:
+            ~numpy.ndarray: The solution.
         """
-        self._A.value = A
+        if self._backend == 'cvxpy':
+            return self._solve_cvxpy(A, b, l, **kwargs)
+        max_iter, tol = self._parse_options(kwargs)
+        x0 = self._get_initial_point(x0, (self._k,) + b.shape[1:], np.float_)
+        if self._formulation == 'constrainedl2':
+            x, converged = self._solve_admm(A, b, l, x0, max_iter, tol)
+        elif self._use_gram:
+            x, converged = self._solve_gram(A, b.reshape((-1,)), l,
+                                            x0.reshape((-1,)), max_iter, tol)
+            x = x.reshape(x0.shape)
+        else:
+            x, converged = self._solve_fista(A, b, l, x0, max_iter, tol)
+        self._check_convergence(converged)
+        self._x_prev = x
+        return x
+
+    def _solve_cvxpy(self, A, b, l, **kwargs):
+        self._A.value = _as_array(A)
         self._b.value = b
         self._l.value = l
         self._problem.solve(**kwargs)
@@ -117,17 +461,365 @@ class L1RegularizedLeastSquaresProblem:
             return np.zeros((self._x.size,))
         return self._x.value
 
-class L21RegularizedLeastSquaresProblem:
+    def get_max_regularization_parameter(self, A, b):
+        r"""Computes the smallest value of :math:`l` for which the solution of
+        the ``'penalizedl1'`` formulation is zero, which is given by
+        :math:`\|\mathbf{A}^T\mathbf{b}\|_\infty` (or
+        :math:`\max(\max_i (\mathbf{A}^T\mathbf{b})_i, 0)` if
+        :math:`\mathbf{x}` must be nonnegative).
+
+        Args:
+            A (~numpy.ndarray): Dictionary matrix.
+            b (~numpy.ndarray): Observation vector.
+        """
+        c = A.T @ b.reshape((-1,))
+        if self._nonnegative:
+            return max(c.max(), 0.0)
+        return np.abs(c).max()
+
+    def solve_path(self, A, b, ls, **kwargs):
+        r"""Solves the problem for a sequence of regularization/constraint
+        parameters.
+
+        The parameters are processed from the one leading to the sparsest
+        solution to the one leading to the densest solution (i.e., from large
+        to small for ``'penalizedl1'`` and ``'constrainedl2'``, and from small
+        to large for ``'constrainedl1'``), and each solution is used as the
+        initial point of the next problem.
+
+        For the ``'penalizedl1'`` formulation solved by the native backend,
+        the GAP safe screening rule is also applied before solving each
+        problem. Columns of the dictionary matrix that provably correspond to
+        zero elements of the solution are removed, so that the cost of each
+        iteration is proportional to the number of remaining columns.
+
+        Args:
+            A (~numpy.ndarray): Dictionary matrix.
+            b (~numpy.ndarray): Observation vector.
+            ls: A sequence of regularization/constraint parameters.
+            **kwargs: Other keyword arguments to be passed to the solver. See
+                :meth:`solve`.
+
+        Returns:
+            ~numpy.ndarray: An array of shape ``(len(ls), k) + b.shape[1:]``,
+            whose i-th element is the solution associated with ``ls[i]``.
+
+        References:
+            [1] E. Ndiaye, O. Fercoq, A. Gramfort, and J. Salmon, "Gap safe
+            screening rules for sparsity enforcing penalties," Journal of
+            Machine Learning Research, vol. 18, no. 128, pp. 1-33, 2017.
+        """
+        ls = np.asarray(ls, dtype=np.float_).flatten()
+        X = np.zeros((ls.size, self._k) + b.shape[1:])
+        if self._formulation == 'constrainedl1':
+            order = np.argsort(ls)
+        else:
+            order = np.argsort(-ls, kind='stable')
+        if self._backend == 'cvxpy':
+            for i in order:
+                X[i] = self.solve(A, b, ls[i], **kwargs)
+            return X
+        if self._formulation != 'penalizedl1':
+            x = None
+            for i in order:
+                x = self.solve(A, b, ls[i], x0=x, **kwargs)
+                X[i] = x
+            return X
+        max_iter, tol = self._parse_options(kwargs)
+        shape = b.shape
+        b = b.reshape((-1,))
+        lipschitz = self.get_lipschitz_constant(A)
+        col_norms = self._get_column_norms(A)
+        l_max = self.get_max_regularization_parameter(A, b)
+        x = np.zeros((self._k,))
+        converged = True
+        for i in order:
+            l = ls[i]
+            if l >= l_max:
+                x = np.zeros((self._k,))
+            elif self._use_gram:
+                # Screening is performed inside the solver.
+                x, conv = self._solve_gram(A, b, l, x, max_iter, tol)
+                converged = converged and conv
+            else:
+                active = self._screen(A, b, x, l, col_norms)
+                x_active, conv = self._solve_fista(
+                    _select_columns(A, active), b, l, x[active], max_iter, tol, lipschitz
+                )
+                converged = converged and conv
+                x = np.zeros((self._k,))
+                x[active] = x_active
+            X[i] = x.reshape((self._k,) + shape[1:])
+        self._check_convergence(converged)
+        self._x_prev = X[order[-1]]
+        return X
+
+    def _screen(self, A, b, x, l, col_norms):
+        """Applies the GAP safe screening rule to the 'penalizedl1' formulation
+        and returns the indices of the columns that cannot be removed.
+
+        All optimal dual points lie within a sphere centered at the rescaled
+        residual whose radius is determined by the duality gap.
+        """
+        gap, corr = _l1_duality_gap(A, b, x, l, self._nonnegative)
+        radius = np.sqrt(2.0 * gap) / l
+        return np.flatnonzero(corr + radius * col_norms >= 1.0)
+
+    def get_gram_matrix(self, A):
+        r"""Retrieves the Gram matrix of the dictionary matrix,
+        :math:`\mathbf{A}^T\mathbf{A}`.
+
+        The result is cached for the most recently used dictionary matrix.
+
+        Args:
+            A (~numpy.ndarray): Dictionary matrix.
+        """
+        def compute(A):
+            if isinstance(A, LinearOperator):
+                return A.gram()
+            return A.T @ A
+        return self._get_dict_info(A, 'gram', compute)
+
+    def set_gram_matrix(self, A, G):
+        """Provides a precomputed Gram matrix for the dictionary matrix.
+
+        This is useful when the Gram matrix can be computed more efficiently
+        by exploiting the structure of the dictionary matrix. The column norms
+        of the dictionary matrix are also derived from the diagonal of the Gram
+        matrix.
+
+        Args:
+            A (~numpy.ndarray): Dictionary matrix.
+            G (~numpy.ndarray): The Gram matrix of ``A``.
+        """
+        if G.shape != (A.shape[1], A.shape[1]):
+            raise ValueError('The shape of the Gram matrix does not match the dictionary matrix.')
+        self._get_dict_info(A, 'gram', lambda A: G)
+        self._get_dict_info(A, 'col_norms',
+                            lambda A: np.sqrt(np.maximum(np.diag(G), 0.0)))
+
+    def _solve_gram(self, A, b, l, x0, max_iter, tol, ws_size=100,
+                    gap_interval=10):
+        """Solves the 'penalizedl1' formulation with a working set strategy
+        using the Gram matrix.
+
+        The columns that can be safely discarded are first removed with the
+        GAP safe screening rule. Among the remaining columns, a small working
+        set consisting of the current support and the columns that are closest
+        to violating the optimality conditions is selected, and the subproblem
+        restricted to the working set is solved with FISTA using the
+        associated submatrix of the Gram matrix. The duality gap of the full
+        problem is then evaluated with the Gram matrix, and the working set is
+        enlarged if the gap is not small enough. Therefore the cost of each
+        iteration only depends on the size of the working set.
+
+        References:
+            [1] M. Massias, A. Gramfort, and J. Salmon, "Celer: a fast solver
+            for the lasso with dual extrapolation," in Proceedings of the 35th
+            International Conference on Machine Learning, 2018, pp. 3315-3324.
+        """
+        G = self.get_gram_matrix(A)
+        col_norms = self._get_column_norms(A)
+        k = G.shape[0]
+        nonnegative = self._nonnegative
+        c = A.T @ b
+        bb = np.dot(b, b)
+        gap_tol = 0.5 * tol * bb
+        x = x0.copy()
+        alive = col_norms > 0
+        x[~alive] = 0.0
+        n_iter = 0
+        while True:
+            gap, corr = _l1_duality_gap_gram(G, c, bb, x, l, nonnegative)
+            if gap <= gap_tol:
+                return x, True
+            if n_iter >= max_iter:
+                return x, False
+            # Safe screening.
+            radius = np.sqrt(2.0 * gap) / l
+            alive &= corr + radius * col_norms >= 1.0
+            x[~alive] = 0.0
+            # Select the working set by the distances to the boundary of the
+            # dual feasible set.
+            support = np.flatnonzero(x)
+            with np.errstate(divide='ignore'):
+                dist = (1.0 - corr) / col_norms
+            dist[support] = -np.inf
+            dist[~alive] = np.inf
+            # The working set grows geometrically so that all the columns
+            # will be eventually included if necessary.
+            n_alive = np.count_nonzero(alive)
+            if n_alive == 0:
+                return x, True
+            size = min(max(2 * support.size, ws_size), n_alive)
+            ws = np.sort(np.argpartition(dist, size - 1)[:size])
+            # Solve the subproblem.
+            G_ws = G[np.ix_(ws, ws)]
+            c_ws = c[ws]
+            lipschitz = eigvalsh(G_ws, subset_by_index=[size - 1, size - 1])[0]
+            if lipschitz <= 0.0:
+                x[ws] = 0.0
+                continue
+            step = 1.0 / lipschitz
+            f_grad = lambda y: G_ws @ y - c_ws
+            f_prox = lambda v, step: _soft_threshold(v, step * l, nonnegative)
+            # The subproblem only needs to be solved up to a fraction of the
+            # current duality gap.
+            sub_tol = max(0.3 * gap, gap_tol)
+            f_gap = lambda y: _l1_duality_gap_gram(G_ws, c_ws, bb, y, l, nonnegative)[0]
+            x_ws, n, _ = _fista(f_grad, f_prox, x[ws], step, max_iter - n_iter,
+                                sub_tol, f_gap, gap_interval)
+            n_iter += n
+            x = np.zeros((k,))
+            x[ws] = x_ws
+            if size == n_alive and n < max_iter:
+                # The working set contains all the remaining columns, so the
+                # subproblem is equivalent to the full problem.
+                gap, _ = _l1_duality_gap_gram(G, c, bb, x, l, nonnegative)
+                if gap <= gap_tol:
+                    return x, True
+
+    def _solve_fista(self, A, b, l, x0, max_iter, tol, lipschitz=None):
+        if lipschitz is None:
+            lipschitz = self.get_lipschitz_constant(A)
+        nonnegative = self._nonnegative
+        # The suboptimality is measured relative to the objective function
+        # value at zero. The observations are processed as a single vector.
+        b_vec = b.reshape((-1,))
+        gap_tol = tol * np.dot(b_vec, b_vec)
+        if self._formulation == 'penalizedl1':
+            gap_tol *= 0.5
+            f_grad = lambda x: A.T @ (A @ x - b)
+            f_prox = lambda v, step: _soft_threshold(v, step * l, nonnegative)
+            f_gap = lambda x: _l1_duality_gap(
+                A, b_vec, x.reshape((-1,)), l, nonnegative
+            )[0]
+        else:
+            # The objective function is not scaled by 1/2.
+            lipschitz *= 2.0
+            f_grad = lambda x: 2.0 * (A.T @ (A @ x - b))
+            f_prox = lambda v, step: _project_l1_ball(v, l, nonnegative)
+            def f_gap(x):
+                # Frank-Wolfe gap.
+                x = x.reshape((-1,))
+                r = b_vec - A @ x
+                c = A.T @ r
+                c_max = max(c.max(), 0.0) if nonnegative else np.abs(c).max()
+                return 2.0 * (l * c_max - np.dot(c, x))
+        if lipschitz == 0.0:
+            return np.zeros_like(x0), True
+        x, _, converged = _fista(f_grad, f_prox, x0, 1.0 / lipschitz,
+                                 max_iter, gap_tol, f_gap)
+        return x, converged
+
+    def _get_svd(self, A):
+        def compute(A):
+            A = _as_array(A)
+            U, s, Vh = np.linalg.svd(A, full_matrices=False)
+            # Drop the singular values that are numerically zero.
+            r = np.count_nonzero(s > s[0] * max(A.shape) * np.finfo(s.dtype).eps)
+            return U[:, :r], s[:r], Vh[:r]
+        return self._get_dict_info(A, 'svd', compute)
+
+    def _solve_admm(self, A, b, l, x0, max_iter, tol):
+        """Solves the 'constrainedl2' formulation with ADMM.
+
+        The problem is rewritten as
+        ``min ||w||_1 + I_C(x) s.t. x = w``, where C is the feasible set
+        ``{x : ||A x - b||_2 <= l}``. Let ``A = U S V^T``. The projection of v
+        onto C is given by ``(I + mu A^T A)^{-1} (v + mu A^T b)``, where
+        ``mu >= 0`` is found by solving a scalar equation using the SVD.
+        """
+        U, s, Vh = self._get_svd(A)
+        # The observations are processed column by column.
+        b2 = b.reshape((b.shape[0], -1))
+        w = x0.reshape((x0.shape[0], -1)).copy()
+        if self._warm_start and self._admm_state is not None and \
+                self._admm_state[0].shape == w.shape and x0 is self._x_prev:
+            u, rho = self._admm_state
+        else:
+            u = np.zeros_like(w)
+            rho = 1.0
+        converged = True
+        for j in range(b2.shape[1]):
+            w[:, j], u[:, j], rho, conv = self._admm_single(
+                U, s, Vh, b2[:, j], l, w[:, j], u[:, j], rho, max_iter, tol
+            )
+            converged = converged and conv
+        self._admm_state = (u, rho)
+        return w.reshape(x0.shape), converged
+
+    def _admm_single(self, U, s, Vh, b, l, w, u, rho, max_iter, tol):
+        beta = U.T @ b
+        # Part of the residual that cannot be reduced.
+        b_perp = max(np.dot(b, b) - np.dot(beta, beta), 0.0)
+        l2 = l * l
+        if b_perp > l2:
+            warnings.warn('The problem is infeasible.')
+            return np.zeros_like(w), np.zeros_like(u), rho, True
+        s2 = s * s
+
+        def project(v):
+            c = Vh @ v
+            d = s * c - beta
+            if np.dot(d, d) + b_perp <= l2:
+                return v
+            # Solve ||d / (1 + mu s^2)||^2 + b_perp = l^2 for mu with
+            # safeguarded Newton iterations.
+            lo, hi = 0.0, 1.0 / s2[-1]
+            while np.sum((d / (1.0 + hi * s2))**2) + b_perp > l2:
+                lo = hi
+                hi *= 10.0
+            mu = 0.5 * (lo + hi)
+            for _ in range(100):
+                q = 1.0 + mu * s2
+                f = np.sum((d / q)**2) + b_perp - l2
+                if f > 0:
+                    lo = mu
+                else:
+                    hi = mu
+                df = -2.0 * np.sum(d * d * s2 / q**3)
+                mu_new = mu - f / df
+                if not lo < mu_new < hi:
+                    mu_new = 0.5 * (lo + hi)
+                if abs(mu_new - mu) <= 1e-14 * mu:
+                    mu = mu_new
+                    break
+                mu = mu_new
+            return v + Vh.T @ ((c + mu * s * beta) / (1.0 + mu * s2) - c)
+
+        nonnegative = self._nonnegative
+        for _ in range(max_iter):
+            x = project(w - u)
+            w_old = w
+            w = _soft_threshold(x + u, 1.0 / rho, nonnegative)
+            u = u + x - w
+            r_norm = np.linalg.norm(x - w)
+            s_norm = rho * np.linalg.norm(w - w_old)
+            if r_norm <= tol * max(np.linalg.norm(x), np.linalg.norm(w)) and \
+                    s_norm <= tol * rho * np.linalg.norm(u):
+                return w, u, rho, True
+            # Residual balancing. The scaled dual variable must be rescaled
+            # when the penalty parameter changes.
+            if r_norm > 10.0 * s_norm:
+                rho *= 2.0
+                u = u / 2.0
+            elif s_norm > 10.0 * r_norm:
+                rho /= 2.0
+                u = u * 2.0
+        return w, u, rho, False
+
+class L21RegularizedLeastSquaresProblem(_FirstOrderProblemBase):
     r"""Creates an :math:`l_{2,1}`-norm regularized least squares problem.
-    
+
     The :math:`l_{2,1}`-norm of a matrix variable
     :math:`\mathbf{X} \in \mathbb{C}^{K \times L}` is given by
-    
+
     .. math::
-        
+
         \| \mathbf{X} \|_{2,1}
         = \sum_{i=1}^K \left(\sum_{j=1}^L |X_{ij}|^2\right)^{\frac{1}{2}}.
-    
+
     The :math:`l_{2,1}`-norm regularized least squares problem is given by
 
     .. math::
@@ -135,7 +827,7 @@ class L21RegularizedLeastSquaresProblem:
         \min_{\mathbf{X}}
         \frac{1}{2} \| \mathbf{A}\mathbf{X} - \mathbf{B} \|_F^2 +
         l \| \mathbf{X} \|_{2,1},
-    
+
     where :math:`\mathbf{A}` is :math:`M \times K`, :math:`\mathbf{X}` is
     :math:`K \times L`, :math:`\mathbf{B}` is :math:`M \times L`, and :math:`l`
     is the regularization parameter. Usually :math:`\mathbf{A}` is the
@@ -143,6 +835,10 @@ class L21RegularizedLeastSquaresProblem:
     reconstructed, and :math:`\mathbf{B}` is the observation matrix where each
     column of :math:`\mathbf{B}` represents a single observation.
 
+    The built-in ``'native'`` backend solves this problem with FISTA, whose
+    proximal step shrinks the :math:`l_2` norm of each row of
+    :math:`\mathbf{X}`. The ``'cvxpy'`` backend uses cvxpy.
+
     Args:
         m (int): Number of rows of the dictionary matrix :math:`\mathbf{A}`.
         k (int): Number of rows of :math:`\mathbf{X}` (or the number of columns
@@ -151,11 +847,31 @@ class L21RegularizedLeastSquaresProblem:
             observation matrix, :math:`\mathbf{B}`)
         complex (bool): Specifies whether all matrices are complex. Default
             value is ``False``.
+        backend (str): ``'native'`` or ``'cvxpy'``. Default value is
+            ``'native'``.
+        max_iter (int): Maximum number of iterations of the native solver.
+            Default value is 10000.
+        tol (float): Tolerance used by the native solver to determine
+            convergence. FISTA stops when the duality gap does not exceed
+            ``tol`` times the objective function value at zero. Default value
+            is 1e-4.
+        warm_start (bool): If set to ``True``, the native solver will start
+            from the previous solution when no initial point is given.
+            Default value is ``False``.
     """
 
-    def __init__(self, m, k, n, complex=False):
-        if not cvx_available:
-            raise RuntimeError('Cannot initialize when cvxpy is not available.')
+    def __init__(self, m, k, n, complex=False, backend='native',
+                 max_iter=10000, tol=1e-4, warm_start=False):
+        super().__init__(backend, max_iter, tol, warm_start)
+        self._m = m
+        self._k = k
+        self._n = n
+        self._complex = complex
+        if backend == 'cvxpy':
+            self._init_cvxpy_problem()
+
+    def _init_cvxpy_problem(self):
+        m, k, n, complex = self._m, self._k, self._n, self._complex
         # Initialize parameters and variables
         A = cvx.Parameter((m, k), complex=complex)
         B = cvx.Parameter((m, n), complex=complex)
@@ -174,15 +890,123 @@ class L21RegularizedLeastSquaresProblem:
         self._l = l
         self._X = X
 
-    def solve(self, A, B, l, **kwargs):
+    def solve(self, A, B, l, x0=None, **kwargs):
         """Solves the problem with the specified parameters.
 
         Args:
             A (~numpy.ndarray): Dictionary matrix.
             B (~numpy.ndarray): Observation matrix.
             l (~numpy.ndarray): Regularization parameter.
-            **kwargs: Other keyword arguments to be passed to the solver.
+            x0 (~numpy.ndarray): Initial point used by the native solver. Must
+                be a K x L matrix. Default value is ``None``, which starts from
+                zero, or from the previous solution if ``warm_start`` is
+                enabled.
+            **kwargs: Other keyword arguments to be passed to the solver. For
+                the native backend, ``max_iter`` and ``tol`` can be used to
+                override the default settings.
+
+        Returns:
+            ~numpy.ndarray: The solution.
         """
+        if self._backend == 'cvxpy':
+            return self._solve_cvxpy(A, B, l, **kwargs)
+        max_iter, tol = self._parse_options(kwargs)
+        dtype = np.complex_ if self._complex else np.float_
+        X0 = self._get_initial_point(x0, (self._k, self._n), dtype)
+        X, converged = self._solve_fista(A, B, l, X0, max_iter, tol)
+        self._check_convergence(converged)
+        self._x_prev = X
+        return X
+
+    def _solve_fista(self, A, B, l, X0, max_iter, tol, lipschitz=None):
+        if lipschitz is None:
+            lipschitz = self.get_lipschitz_constant(A)
+        if lipschitz == 0.0:
+            return np.zeros_like(X0), True
+        AH = A.conj().T
+        f_grad = lambda X: AH @ (A @ X - B)
+        f_prox = lambda V, step: _group_soft_threshold(V, step * l)
+        # The suboptimality is measured relative to the objective function
+        # value at zero.
+        f_gap = lambda X: _l21_duality_gap(A, B, X, l)[0]
+        gap_tol = 0.5 * tol * np.linalg.norm(B)**2
+        X, _, converged = _fista(f_grad, f_prox, X0, 1.0 / lipschitz,
+                                 max_iter, gap_tol, f_gap)
+        return X, converged
+
+    def get_max_regularization_parameter(self, A, B):
+        r"""Computes the smallest value of :math:`l` for which the solution is
+        zero, which is given by the largest :math:`l_2` norm of the rows of
+        :math:`\mathbf{A}^H\mathbf{B}`.
+
+        Args:
+            A (~numpy.ndarray): Dictionary matrix.
+            B (~numpy.ndarray): Observation matrix.
+        """
+        return np.linalg.norm(A.conj().T @ B, axis=1).max()
+
+    def solve_path(self, A, B, ls, **kwargs):
+        r"""Solves the problem for a sequence of regularization parameters.
+
+        The regularization parameters are processed from large to small, and
+        each solution is used as the initial point of the next problem. For the
+        native backend, the GAP safe screening rule is applied before solving
+        each problem to remove the rows of :math:`\mathbf{X}` that are
+        provably zero.
+
+        Args:
+            A (~numpy.ndarray): Dictionary matrix.
+            B (~numpy.ndarray): Observation matrix.
+            ls: A sequence of regularization parameters.
+            **kwargs: Other keyword arguments to be passed to the solver. See
+                :meth:`solve`.
+
+        Returns:
+            ~numpy.ndarray: An array of shape ``(len(ls), K, L)``, whose i-th
+            element is the solution associated with ``ls[i]``.
+
+        References:
+            [1] E. Ndiaye, O. Fercoq, A. Gramfort, and J. Salmon, "Gap safe
+            screening rules for sparsity enforcing penalties," Journal of
+            Machine Learning Research, vol. 18, no. 128, pp. 1-33, 2017.
+        """
+        ls = np.asarray(ls, dtype=np.float_).flatten()
+        dtype = np.complex_ if self._complex else np.float_
+        Xs = np.zeros((ls.size, self._k, self._n), dtype=dtype)
+        order = np.argsort(-ls, kind='stable')
+        if self._backend == 'cvxpy':
+            for i in order:
+                Xs[i] = self.solve(A, B, ls[i], **kwargs)
+            return Xs
+        max_iter, tol = self._parse_options(kwargs)
+        lipschitz = self.get_lipschitz_constant(A)
+        col_norms = self._get_column_norms(A)
+        l_max = self.get_max_regularization_parameter(A, B)
+        X = np.zeros((self._k, self._n), dtype=dtype)
+        converged = True
+        for i in order:
+            l = ls[i]
+            X_new = np.zeros_like(X)
+            if l < l_max:
+                active = self._screen(A, B, X, l, col_norms)
+                X_new[active], conv = self._solve_fista(
+                    A[:, active], B, l, X[active], max_iter, tol, lipschitz
+                )
+                converged = converged and conv
+            X = X_new
+            Xs[i] = X
+        self._check_convergence(converged)
+        self._x_prev = Xs[order[-1]]
+        return Xs
+
+    def _screen(self, A, B, X, l, col_norms):
+        """Applies the GAP safe screening rule and returns the indices of the
+        rows of X that cannot be removed."""
+        gap, corr = _l21_duality_gap(A, B, X, l)
+        radius = np.sqrt(2.0 * gap) / l
+        return np.flatnonzero(corr + radius * col_norms >= 1.0)
+
+    def _solve_cvxpy(self, A, B, l, **kwargs):
         self._A.value = A
         self._B.value = B
         self._l.value = l
@@ -0,0 +1,170 @@
+import numpy as np
+from scipy.sparse.linalg import LinearOperator
+from ..utils.math import khatri_rao, vec
+
+class KhatriRaoDictionary(LinearOperator):
+    r"""Creates an implicit real dictionary matrix for the sparse
+    representation of covariance matrices.
+
+    Let :math:`\mathbf{A}` be an :math:`M \times G` complex matrix (e.g., a
+    steering matrix). This operator represents the :math:`2M^2 \times K` real
+    matrix
+
+    .. math::
+
+        \mathbf{\Phi} = \begin{bmatrix}
+            \Re(\mathbf{\Psi}) \\ \Im(\mathbf{\Psi})
+        \end{bmatrix},
+
+    where :math:`\mathbf{\Psi} = \mathbf{A}^* \odot \mathbf{A}` (and
+    :math:`K = G`), or
+    :math:`\mathbf{\Psi} = [\mathbf{A}^* \odot \mathbf{A}, \mathrm{vec}(\mathbf{I})]`
+    (and :math:`K = G + 1`) if ``append_identity`` is ``True``.
+
+    :math:`\mathbf{\Phi}` is never formed. Instead, the products are evaluated
+    with the structure of the Khatri-Rao product:
+
+    * :math:`\mathbf{\Psi}\mathbf{x} = \mathrm{vec}(\mathbf{A}
+      \mathrm{diag}(\mathbf{x}) \mathbf{A}^H)` (plus
+      :math:`x_K \mathrm{vec}(\mathbf{I})`);
+    * :math:`\Re(\mathbf{\Psi}^H \mathrm{vec}(\mathbf{Y})) =
+      \Re(\mathrm{diag}(\mathbf{A}^H \mathbf{Y} \mathbf{A}))` (plus
+      :math:`\Re(\mathrm{tr}(\mathbf{Y}))`).
+
+    Therefore each product only requires :math:`O(MG)` additional memory
+    instead of :math:`O(M^2G)`.
+
+    Args:
+        A (~numpy.ndarray): An :math:`M \times G` complex matrix.
+        append_identity (bool): If set to ``True``, :math:`\mathrm{vec}(\mathbf{I})`
+            will be appended as the last column of :math:`\mathbf{\Psi}`.
+            Default value is ``False``.
+    """
+
+    def __init__(self, A, append_identity=False):
+        if A.ndim != 2:
+            raise ValueError('A must be a matrix.')
+        m, g = A.shape
+        super().__init__(np.float_, (2 * m * m, g + 1 if append_identity else g))
+        self._A = A
+        self._append_identity = append_identity
+
+    @property
+    def base_matrix(self):
+        r"""Retrieves the matrix :math:`\mathbf{A}`."""
+        return self._A
+
+    @property
+    def append_identity(self):
+        r"""Retrieves whether :math:`\mathrm{vec}(\mathbf{I})` is appended."""
+        return self._append_identity
+
+    def _matvec(self, x):
+        x = np.real(x).reshape((-1,))
+        g = self._A.shape[1]
+        X = (self._A * x[:g]) @ self._A.conj().T
+        if self._append_identity:
+            X[np.diag_indices_from(X)] += x[g]
+        r = vec(X).reshape((-1,))
+        return np.concatenate((r.real, r.imag))
+
+    def _rmatvec(self, y):
+        y = np.real(y).reshape((-1,))
+        m = self._A.shape[0]
+        n = m * m
+        Y = (y[:n] + 1j * y[n:]).reshape((m, m), order='F')
+        c = np.einsum('ij,ij->j', self._A.conj(), Y @ self._A).real
+        if self._append_identity:
+            c = np.append(c, np.trace(Y).real)
+        return c
+
+    def _matmat(self, X):
+        return np.column_stack([self._matvec(X[:, j]) for j in range(X.shape[1])])
+
+    def _rmatmat(self, Y):
+        return np.column_stack([self._rmatvec(Y[:, j]) for j in range(Y.shape[1])])
+
+    def _adjoint(self):
+        # The operator is real so its adjoint equals its transpose.
+        return _KhatriRaoDictionaryTranspose(self)
+
+    _transpose = _adjoint
+
+    def column_norms(self):
+        r"""Computes the :math:`l_2` norms of the columns.
+
+        Because :math:`\|\mathbf{a}_i^* \otimes \mathbf{a}_i\|_2 =
+        \|\mathbf{a}_i\|_2^2`, this only requires :math:`O(MG)` operations.
+        """
+        norms = np.sum(self._A.real**2 + self._A.imag**2, axis=0)
+        if self._append_identity:
+            norms = np.append(norms, np.sqrt(self._A.shape[0]))
+        return norms
+
+    def gram(self):
+        r"""Computes the Gram matrix :math:`\mathbf{\Phi}^T\mathbf{\Phi}`.
+
+        Because :math:`(\mathbf{a}_i^* \otimes \mathbf{a}_i)^H
+        (\mathbf{a}_j^* \otimes \mathbf{a}_j) = |\mathbf{a}_i^H\mathbf{a}_j|^2`,
+        we have :math:`\mathbf{\Phi}^T\mathbf{\Phi} = |\mathbf{A}^H\mathbf{A}|^2`
+        (element-wise), which requires :math:`O(M G^2)` operations instead of
+        :math:`O(M^2 G^2)`.
+        """
+        H = self._A.conj().T @ self._A
+        G = H.real**2 + H.imag**2
+        if self._append_identity:
+            # Inner products with vec(I).
+            d = np.diag(H).real
+            G = np.block([
+                [G, d[:, np.newaxis]],
+                [d[np.newaxis, :], np.array([[float(self._A.shape[0])]])]
+            ])
+        return G
+
+    def select_columns(self, indices):
+        r"""Creates a new dictionary consisting of the selected columns.
+
+        Args:
+            indices: A 1D array of the column indices. If
+                :math:`\mathrm{vec}(\mathbf{I})` is selected, it must be
+                the last one.
+        """
+        indices = np.asarray(indices, dtype=np.int_).reshape((-1,))
+        g = self._A.shape[1]
+        is_identity = indices == g
+        if not self._append_identity or not np.any(is_identity):
+            return KhatriRaoDictionary(self._A[:, indices])
+        if not is_identity[-1] or np.count_nonzero(is_identity) > 1:
+            raise ValueError('vec(I) must be the last selected column.')
+        return KhatriRaoDictionary(self._A[:, indices[:-1]], True)
+
+    def toarray(self):
+        """Materializes the dictionary matrix as an :class:`~numpy.ndarray`."""
+        Psi = khatri_rao(self._A.conj(), self._A)
+        if self._append_identity:
+            Psi = np.hstack((Psi, vec(np.eye(self._A.shape[0]))))
+        return np.vstack((Psi.real, Psi.imag))
+
+class _KhatriRaoDictionaryTranspose(LinearOperator):
+    """Transpose of :class:`KhatriRaoDictionary`."""
+
+    def __init__(self, op):
+        super().__init__(op.dtype, (op.shape[1], op.shape[0]))
+        self._op = op
+
+    def _matvec(self, y):
+        return self._op._rmatvec(y)
+
+    def _rmatvec(self, x):
+        return self._op._matvec(x)
+
+    def _matmat(self, Y):
+        return self._op._rmatmat(Y)
+
+    def _rmatmat(self, X):
+        return self._op._matmat(X)
+
+    def _adjoint(self):
+        return self._op
+
+    _transpose = _adjoint
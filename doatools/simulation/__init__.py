@@ -0,0 +1 @@
+from .monte_carlo import run_monte_carlo, MonteCarloResults
@@ -0,0 +1,348 @@
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from ..model.signals import ComplexStochasticSignal
+from ..model.snapshots import get_narrowband_snapshots
+from ..model.sources import FarField1DSourcePlacement
+from ..performance.crb import crb_sto_farfield_1d
+from ..performance.mse import ecov_music_1d
+
+class MonteCarloResults:
+    """Stores the aggregated results of a Monte Carlo simulation.
+
+    Let E be the number of estimators, S be the number of SNRs, N be the
+    number of snapshot settings, and K be the number of sources. The errors
+    are computed for each source location parameter, and only the trials in
+    which the estimator resolved the sources are used when computing the MSEs
+    and the biases.
+
+    Attributes:
+        estimator_names (list): Names of the estimators.
+        snrs (~numpy.ndarray): SNRs in dB.
+        snapshots (~numpy.ndarray): Numbers of snapshots.
+        n_trials (int): Number of trials for each SNR/snapshot setting.
+        n_resolved (~numpy.ndarray): An E x S x N array of the numbers of
+            trials in which the sources are resolved.
+        resolution_prob (~numpy.ndarray): An E x S x N array of the
+            resolution probabilities.
+        mse (~numpy.ndarray): An E x S x N x K array of the empirical MSEs.
+            NaN if the sources are never resolved.
+        bias (~numpy.ndarray): An E x S x N x K array of the empirical biases.
+            NaN if the sources are never resolved.
+        crb (~numpy.ndarray): An S x N x K array of the diagonals of the
+            stochastic CRB, or ``None`` if not available.
+        ecov_music (~numpy.ndarray): An S x N x K array of the diagonals of
+            the asymptotic error covariance matrix of MUSIC, or ``None`` if not
+            available.
+    """
+
+    def __init__(self, estimator_names, snrs, snapshots, n_trials, n_resolved,
+                 sum_err, sum_sq_err, crb=None, ecov_music=None):
+        self.estimator_names = list(estimator_names)
+        self.snrs = snrs
+        self.snapshots = snapshots
+        self.n_trials = n_trials
+        self.n_resolved = n_resolved
+        self.resolution_prob = n_resolved / n_trials
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.mse = sum_sq_err / n_resolved[..., np.newaxis]
+            self.bias = sum_err / n_resolved[..., np.newaxis]
+        self.crb = crb
+        self.ecov_music = ecov_music
+
+    def __getitem__(self, name):
+        """Retrieves the results of the specified estimator as a dictionary
+        with the keys ``'resolution_prob'``, ``'mse'``, and ``'bias'``."""
+        i = self.estimator_names.index(name)
+        return {
+            'resolution_prob': self.resolution_prob[i],
+            'mse': self.mse[i],
+            'bias': self.bias[i]
+        }
+
+# Configuration shared with the worker processes. It is passed once to each
+# worker through the pool initializer instead of with every task.
+_worker_config = None
+
+def _init_worker(config):
+    global _worker_config
+    _worker_config = config
+
+def _run_trials(task, config=None):
+    """Runs a block of trials for a single SNR/snapshot setting.
+
+    Args:
+        task: A tuple ``(i_snr, i_snapshot, trial_start, trial_stop)``.
+        config: Simulation configuration. If ``None``, the configuration
+            inherited by the worker process will be used.
+
+    Returns:
+        A tuple ``(task, n_resolved, sum_err, sum_sq_err)``.
+    """
+    if config is None:
+        config = _worker_config
+    i_snr, i_snapshot, trial_start, trial_stop = task
+    array = config['array']
+    sources = config['sources']
+    estimators = config['estimators']
+    k = sources.size
+    power_source = 10**(config['snrs'][i_snr] / 10.0) * config['power_noise']
+    n_snapshots = int(config['snapshots'][i_snapshot])
+    source_signal = config['source_signal'](power_source)
+    noise_signal = config['noise_signal'](config['power_noise'])
+    locations = config['sorted_locations']
+    n_estimators = len(estimators)
+    n_resolved = np.zeros((n_estimators,), dtype=np.int_)
+    sum_err = np.zeros((n_estimators,) + locations.shape)
+    sum_sq_err = np.zeros((n_estimators,) + locations.shape)
+    # The signal generators draw samples from the global random state, which
+    # is saved here and restored afterwards.
+    saved_state = np.random.get_state()
+    try:
+        for trial in range(trial_start, trial_stop):
+            # Each trial has its own seed determined by its position in the
+            # sweep so that the results do not depend on how the trials are
+            # distributed among the workers.
+            ss = np.random.SeedSequence(config['entropy'],
+                                        spawn_key=(i_snr, i_snapshot, trial))
+            np.random.seed(ss.generate_state(4))
+            _, R = get_narrowband_snapshots(
+                array, sources, config['wavelength'], source_signal,
+                noise_signal, n_snapshots, True
+            )
+            for i, (_, f) in enumerate(estimators):
+                output = f(R, k)
+                resolved, estimates = output[0], output[1]
+                if not resolved:
+                    continue
+                est = estimates.locations
+                if est.ndim == 1:
+                    est = np.sort(est)
+                err = est - locations
+                n_resolved[i] += 1
+                sum_err[i] += err
+                sum_sq_err[i] += err * err
+    finally:
+        np.random.set_state(saved_state)
+    return task, n_resolved, sum_err, sum_sq_err
+
+def _save_checkpoint(path, state):
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, **state)
+    os.replace(tmp_path, path)
+
+def run_monte_carlo(array, sources, wavelength, estimators, snrs, snapshots,
+                    n_trials, power_noise=1.0, source_signal=None,
+                    noise_signal=None, seed=None, n_workers=None,
+                    trials_per_task=50, checkpoint=None, compute_bounds=True,
+                    start_method=None, checkpoint_interval=60.0):
+    r"""Runs Monte Carlo simulations to evaluate the performance of estimators
+    over a sweep of SNRs and numbers of snapshots.
+
+    For each combination of SNR and number of snapshots, ``n_trials``
+    independent trials are performed. In each trial, the sample covariance
+    matrix is generated with
+    :meth:`~doatools.model.snapshots.get_narrowband_snapshots` and passed to
+    every estimator. The SNR is defined as the ratio between the power of each
+    source and the noise power.
+
+    The trials are distributed among a pool of worker processes. Every trial
+    uses its own random seed, which is derived from ``seed`` and the position
+    of the trial within the sweep via :class:`~numpy.random.SeedSequence`.
+    Therefore the results are reproducible and do not depend on the number of
+    workers.
+
+    Args:
+        array (~doatools.model.arrays.ArrayDesign): Array design.
+        sources (~doatools.model.sources.SourcePlacement): Source placement.
+        wavelength (float): Wavelength of the carrier wave.
+        estimators: A list of ``(name, f)`` pairs or a dictionary mapping names
+            to ``f``, where ``f`` is a callable object that accepts the sample
+            covariance matrix and the number of sources and returns a tuple
+            whose first two elements are ``resolved`` and ``estimates``
+            (following the convention of the ``estimate`` methods of the
+            estimators). For instance,
+            ``lambda R, k: RootMUSIC1D(wavelength).estimate(R, k, array.d0)``.
+        snrs: A list of SNRs in dB.
+        snapshots: A list of numbers of snapshots.
+        n_trials (int): Number of trials for each SNR/snapshot setting.
+        power_noise (float): Noise power. Default value is 1.0.
+        source_signal: A callable object that accepts the source power and
+            returns a :class:`~doatools.model.signals.SignalGenerator` for the
+            source signals. Default value is ``None``, which uses
+            :class:`~doatools.model.signals.ComplexStochasticSignal`.
+        noise_signal: A callable object that accepts the noise power and
+            returns a :class:`~doatools.model.signals.SignalGenerator` for the
+            noise. Default value is ``None``, which uses
+            :class:`~doatools.model.signals.ComplexStochasticSignal`.
+        seed (int): Seed of the simulation. If ``None``, fresh entropy will be
+            used, unless it can be restored from the checkpoint.
+        n_workers (int): Number of worker processes. If ``None``, the number of
+            CPUs is used. If set to 1 or 0, the trials are run in the current
+            process. Unless the ``'fork'`` start method is used, the
+            estimators and the signal generator factories must be picklable
+            (e.g., lambdas are not allowed).
+        trials_per_task (int): Number of trials in each task submitted to the
+            pool. Default value is 50.
+        checkpoint (str): Path to a ``.npz`` checkpoint file. If specified, the
+            partial results are saved periodically (see
+            ``checkpoint_interval``) and when the simulation finishes or is
+            interrupted, and an existing checkpoint created with the same
+            settings is resumed.
+        compute_bounds (bool): If set to ``True`` and the sources are 1D
+            far-field sources, also computes the stochastic CRB and the
+            asymptotic MSE of MUSIC for comparison. Default value is ``True``.
+        start_method (str): Start method of the worker processes (see
+            :mod:`multiprocessing`). Default value is ``None``, which uses the
+            platform default. ``'fork'`` allows unpicklable estimators such as
+            lambdas, but is unsafe with multithreaded libraries (e.g.,
+            threaded BLAS) and on macOS.
+        checkpoint_interval (float): Minimum time in seconds between two
+            checkpoint saves while the simulation is running. Set to 0 to save
+            after every completed task. Default value is 60.
+
+    Returns:
+        MonteCarloResults: The aggregated results.
+    """
+    if isinstance(estimators, dict):
+        estimators = list(estimators.items())
+    else:
+        estimators = list(estimators)
+    names = [name for name, _ in estimators]
+    if len(set(names)) != len(names):
+        raise ValueError('Estimator names must be unique.')
+    snrs = np.asarray(snrs, dtype=np.float_).flatten()
+    snapshots = np.asarray(snapshots, dtype=np.int_).flatten()
+    if n_trials < 1:
+        raise ValueError('The number of trials must be positive.')
+    if trials_per_task < 1:
+        raise ValueError('trials_per_task must be positive.')
+    k = sources.size
+    if source_signal is None:
+        source_signal = lambda p: ComplexStochasticSignal(k, p)
+    if noise_signal is None:
+        noise_signal = lambda p: ComplexStochasticSignal(array.output_size, p)
+    locations = sources.locations
+    if locations.ndim == 1:
+        locations = np.sort(locations)
+    tasks = [(i, j, t, min(t + trials_per_task, n_trials))
+             for i in range(snrs.size) for j in range(snapshots.size)
+             for t in range(0, n_trials, trials_per_task)]
+    # Partial results of each task. They are reduced in the task order at the
+    # end so that the results do not depend on the completion order.
+    shape = (len(tasks), len(estimators))
+    n_resolved = np.zeros(shape, dtype=np.int_)
+    sum_err = np.zeros(shape + locations.shape)
+    sum_sq_err = np.zeros_like(sum_err)
+    completed = np.zeros((len(tasks),), dtype=np.bool_)
+    entropy = seed if seed is not None else np.random.SeedSequence().entropy
+    if checkpoint is not None and os.path.isfile(checkpoint):
+        with np.load(checkpoint) as data:
+            # The entropy may exceed 64 bits and is stored as a string.
+            if seed is None:
+                entropy = int(str(data['entropy']))
+            if (list(data['names']) != names or
+                    not np.array_equal(data['snrs'], snrs) or
+                    not np.array_equal(data['snapshots'], snapshots) or
+                    int(data['n_trials']) != n_trials or
+                    int(data['trials_per_task']) != trials_per_task or
+                    int(str(data['entropy'])) != entropy):
+                raise ValueError(
+                    'The checkpoint was created with different settings.'
+                )
+            completed = data['completed'].copy()
+            n_resolved = data['n_resolved'].copy()
+            sum_err = data['sum_err'].copy()
+            sum_sq_err = data['sum_sq_err'].copy()
+    config = {
+        'array': array,
+        'sources': sources,
+        'wavelength': wavelength,
+        'estimators': estimators,
+        'snrs': snrs,
+        'snapshots': snapshots,
+        'power_noise': power_noise,
+        'source_signal': source_signal,
+        'noise_signal': noise_signal,
+        'sorted_locations': locations,
+        'entropy': entropy
+    }
+
+    task_indices = {task: i for i, task in enumerate(tasks)}
+    # Time of the last checkpoint save and whether there are unsaved results.
+    checkpoint_status = {'last_saved': time.monotonic(), 'dirty': False}
+
+    def save():
+        _save_checkpoint(checkpoint, {
+            'names': np.array(names), 'snrs': snrs,
+            'snapshots': snapshots, 'n_trials': n_trials,
+            'trials_per_task': trials_per_task, 'entropy': str(entropy),
+            'completed': completed, 'n_resolved': n_resolved,
+            'sum_err': sum_err, 'sum_sq_err': sum_sq_err
+        })
+        checkpoint_status['last_saved'] = time.monotonic()
+        checkpoint_status['dirty'] = False
+
+    def collect(result):
+        task, nr, se, sse = result
+        idx = task_indices[task]
+        n_resolved[idx] = nr
+        sum_err[idx] = se
+        sum_sq_err[idx] = sse
+        completed[idx] = True
+        if checkpoint is not None:
+            checkpoint_status['dirty'] = True
+            if time.monotonic() - checkpoint_status['last_saved'] >= checkpoint_interval:
+                save()
+
+    pending = [task for task, done in zip(tasks, completed) if not done]
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    try:
+        if n_workers <= 1:
+            for task in pending:
+                collect(_run_trials(task, config))
+        elif len(pending) > 0:
+            ctx = multiprocessing.get_context(start_method)
+            with ProcessPoolExecutor(n_workers, mp_context=ctx,
+                                     initializer=_init_worker,
+                                     initargs=(config,)) as executor:
+                futures = [executor.submit(_run_trials, task) for task in pending]
+                for future in as_completed(futures):
+                    collect(future.result())
+    finally:
+        # Always save the results collected since the last save, including
+        # when the simulation is interrupted.
+        if checkpoint is not None and checkpoint_status['dirty']:
+            save()
+    shape = (len(estimators), snrs.size, snapshots.size)
+    total_n_resolved = np.zeros(shape, dtype=np.int_)
+    total_sum_err = np.zeros(shape + locations.shape)
+    total_sum_sq_err = np.zeros_like(total_sum_err)
+    for idx, (i, j, _, _) in enumerate(tasks):
+        total_n_resolved[:, i, j] += n_resolved[idx]
+        total_sum_err[:, i, j] += sum_err[idx]
+        total_sum_sq_err[:, i, j] += sum_sq_err[idx]
+    # Theoretical results.
+    crb = None
+    ecov = None
+    if compute_bounds and isinstance(sources, FarField1DSourcePlacement):
+        order = np.argsort(sources.locations)
+        crb = np.zeros((snrs.size, snapshots.size, k))
+        ecov = np.zeros((snrs.size, snapshots.size, k))
+        for i, snr in enumerate(snrs):
+            power_source = 10**(snr / 10.0) * power_noise
+            for j, n in enumerate(snapshots):
+                crb[i, j] = crb_sto_farfield_1d(
+                    array, sources, wavelength, power_source, power_noise,
+                    n, return_mode='diag'
+                )[order]
+                ecov[i, j] = ecov_music_1d(
+                    array, sources, wavelength, power_source, power_noise,
+                    n, return_mode='diag'
+                )[order]
+    return MonteCarloResults(names, snrs, snapshots, n_trials,
+                             total_n_resolved, total_sum_err, total_sum_sq_err,
+                             crb, ecov)
@@ -9,7 +9,8 @@ from doatools.model.arrays import GridBasedArrayDesign
 from doatools.model.arrays import UniformLinearArray, CoPrimeArray, \
                                   NestedArray, MinimumRedundancyLinearArray, \
                                   UniformCircularArray, UniformRectangularArray
-from doatools.model.sources import FarField1DSourcePlacement
+from doatools.model.sources import FarField1DSourcePlacement, FarField2DSourcePlacement
+from doatools.model.arrays import ArrayDesign
 
 class Test1DArrayDesigns(unittest.TestCase):
 
@@ -211,6 +212,27 @@ class TestSteeringMatrix(unittest.TestCase):
     def test_with_perturbations(self):
         pass
 
+    def test_separable(self):
+        # Grid-based arrays use a separable implementation for far-field
+        # sources, which should match the generic implementation.
+        arrays = [
+            UniformRectangularArray(5, 7, [0.5, 0.4]),
+            GridBasedArrayDesign(
+                np.array([[0, 0], [1, 0], [3, 0], [0, 2], [2, 1], [1, 2]]),
+                bases=np.array([[0.5, 0.0, 0.1], [0.2, 0.4, 0.0]])
+            )
+        ]
+        sources_list = [
+            FarField1DSourcePlacement(np.linspace(-np.pi/3, np.pi/3, 5)),
+            FarField1DSourcePlacement(np.linspace(-0.9, 0.9, 5), unit='sin'),
+            FarField2DSourcePlacement([[-2.0, 0.3], [0.5, 1.2], [3.0, 0.0]])
+        ]
+        for array in arrays:
+            for sources in sources_list:
+                A = array.steering_matrix(sources, self.wavelength)
+                A_expected = ArrayDesign.steering_matrix(array, sources, self.wavelength)
+                npt.assert_allclose(A, A_expected, rtol=1e-12, atol=1e-12)
+
     def test_custom_nonisotropic_1d(self):
         # Sine response for azimuth angles (cosine for broadside angles)
         f_sr = lambda r, az, el, pol: np.sin(az)
@@ -1,8 +1,10 @@
 import unittest
-from doatools.model.arrays import UniformLinearArray
-from doatools.model.sources import FarField1DSourcePlacement, NearField2DSourcePlacement
+from doatools.model.arrays import UniformLinearArray, UniformRectangularArray
+from doatools.model.sources import FarField1DSourcePlacement, FarField2DSourcePlacement, \
+                                   NearField2DSourcePlacement
 from doatools.model.signals import ComplexStochasticSignal
-from doatools.estimation.grid import FarField1DSearchGrid, NearField2DSearchGrid
+from doatools.estimation.grid import FarField1DSearchGrid, FarField2DSearchGrid, \
+                                    NearField2DSearchGrid
 from doatools.estimation.beamforming import BartlettBeamformer, MVDRBeamformer
 import numpy as np
 import numpy.testing as npt
@@ -31,5 +33,91 @@ class TestBeamforming(unittest.TestCase):
         self.assertTrue(resolved)
         npt.assert_allclose(sources.locations, estimates.locations, rtol=1e-2)
 
+    def test_beamforming_batch(self):
+        np.random.seed(42)
+        ula = UniformLinearArray(12, self.wavelength / 2)
+        n_sources = 3
+        sources = FarField1DSourcePlacement(np.linspace(-np.pi/4, np.pi/4, n_sources))
+        signal = ComplexStochasticSignal(n_sources, 1.0)
+        noise = ComplexStochasticSignal(ula.size, 0.5)
+        A = ula.steering_matrix(sources, self.wavelength)
+        Rs = []
+        for n_snapshots in [20, 50, 100]:
+            Y = A @ signal.emit(n_snapshots) + noise.emit(n_snapshots)
+            Rs.append(Y @ Y.conj().T / n_snapshots)
+        Rs = np.stack(Rs)
+        grid = FarField1DSearchGrid(size=720)
+        for estimator in [MVDRBeamformer(ula, self.wavelength, grid),
+                          BartlettBeamformer(ula, self.wavelength, grid)]:
+            resolved, estimates, sp = estimator.estimate_batch(Rs, n_sources, True)
+            for i in range(Rs.shape[0]):
+                r, est, sp_i = estimator.estimate(Rs[i], n_sources, return_spectrum=True)
+                self.assertEqual(resolved[i], r)
+                npt.assert_allclose(sp[i], sp_i, rtol=1e-8)
+                if r:
+                    npt.assert_array_equal(estimates[i], est.locations)
+
+    def test_beamforming_fft(self):
+        np.random.seed(42)
+        ula = UniformLinearArray(12, self.wavelength / 2)
+        n_sources = 3
+        sources = FarField1DSourcePlacement(np.linspace(-np.pi/4, np.pi/4, n_sources))
+        signal = ComplexStochasticSignal(n_sources, 1.0)
+        noise = ComplexStochasticSignal(ula.size, 0.5)
+        A = ula.steering_matrix(sources, self.wavelength)
+        Rs = []
+        for n_snapshots in [20, 50, 100]:
+            Y = A @ signal.emit(n_snapshots) + noise.emit(n_snapshots)
+            Rs.append(Y @ Y.conj().T / n_snapshots)
+        Rs = np.stack(Rs)
+        for size in [721, 11]:
+            grid = FarField1DSearchGrid(start=-1, stop=1, size=size, unit='sin')
+            for cls in [MVDRBeamformer, BartlettBeamformer]:
+                est_fft = cls(ula, self.wavelength, grid)
+                est_ref = cls(ula, self.wavelength, grid, enable_fft=False)
+                self.assertIsNotNone(est_fft._spectrum_evaluator)
+                for i in range(Rs.shape[0]):
+                    _, _, sp1 = est_fft.estimate(Rs[i], n_sources, return_spectrum=True)
+                    _, _, sp2 = est_ref.estimate(Rs[i], n_sources, return_spectrum=True)
+                    npt.assert_allclose(sp1, sp2, rtol=1e-8)
+                _, _, sp1 = est_fft.estimate_batch(Rs, n_sources, True)
+                _, _, sp2 = est_ref.estimate_batch(Rs, n_sources, True)
+                npt.assert_allclose(sp1, sp2, rtol=1e-8)
+
+    def test_beamforming_separable(self):
+        ura = UniformRectangularArray(4, 6, self.wavelength / 2)
+        sources = FarField2DSourcePlacement([[-np.pi/4, np.pi/6], [np.pi/3, np.pi/4]])
+        A = ura.steering_matrix(sources, self.wavelength)
+        Rs = np.stack([A @ np.diag(p) @ A.conj().T + np.eye(ura.size)
+                       for p in ([1.0, 1.0], [2.0, 0.5])])
+        grid = FarField2DSearchGrid(size=(90, 30))
+        for cls in [MVDRBeamformer, BartlettBeamformer]:
+            est_sep = cls(ura, self.wavelength, grid)
+            est_ref = cls(ura, self.wavelength, grid, enable_separable=False)
+            self.assertIsNotNone(est_sep._spectrum_evaluator)
+            for i in range(Rs.shape[0]):
+                _, _, sp1 = est_sep.estimate(Rs[i], 2, return_spectrum=True)
+                _, _, sp2 = est_ref.estimate(Rs[i], 2, return_spectrum=True)
+                npt.assert_allclose(sp1, sp2, rtol=1e-8)
+            _, _, sp1 = est_sep.estimate_batch(Rs, 2, True)
+            _, _, sp2 = est_ref.estimate_batch(Rs, 2, True)
+            npt.assert_allclose(sp1, sp2, rtol=1e-8)
+
+    def test_beamforming_chunked(self):
+        ula = UniformLinearArray(8, self.wavelength / 2)
+        sources = FarField1DSourcePlacement([-0.5, 0.2, 0.9])
+        A = ula.steering_matrix(sources, self.wavelength)
+        R = A @ A.conj().T + 0.1 * np.eye(ula.size)
+        grid = FarField1DSearchGrid(size=10000)
+        for cls in [MVDRBeamformer, BartlettBeamformer]:
+            est = cls(ula, self.wavelength, grid)
+            est_chunked = cls(ula, self.wavelength, grid, max_atom_bytes=2**18)
+            r1, e1, sp1 = est.estimate(R, 3, return_spectrum=True)
+            r2, e2, sp2 = est_chunked.estimate(R, 3, return_spectrum=True)
+            self.assertTrue(r1 and r2)
+            npt.assert_allclose(sp2, sp1, rtol=1e-12)
+            npt.assert_array_equal(e2.locations, e1.locations)
+            self.assertIsNone(est_chunked._atom_matrix)
+
 if __name__ == '__main__':
     unittest.main()
@@ -3,6 +3,7 @@ import numpy as np
 import numpy.testing as npt
 from doatools.model.arrays import UniformLinearArray, CoPrimeArray
 from doatools.model.coarray import WeightFunction1D
+from doatools.estimation.coarray import CoarrayACMBuilder1D
 
 class TestWeightFunction(unittest.TestCase):
 
@@ -68,6 +69,44 @@ class TestWeightFunction(unittest.TestCase):
             F_expected[i, indices_expected[diff]] = 1.0 / len(indices_expected[diff])
         npt.assert_allclose(wf.get_coarray_selection_matrix(), F_expected)
         npt.assert_allclose(wf.get_coarray_selection_matrix(True), F_expected[7:, :])
+        npt.assert_allclose(
+            wf.get_coarray_selection_matrix(sparse=True).toarray(),
+            F_expected
+        )
+        npt.assert_allclose(
+            wf.get_coarray_selection_matrix(True, sparse=True).toarray(),
+            F_expected[7:, :]
+        )
+        self.assertEqual(wf.get_central_ula_size(), 15)
+        self.assertEqual(wf.get_central_ula_size(True), 8)
+        self.assertEqual(len(wf), 17)
+        self.assertEqual(wf.weight_of(8), 0)
+        self.assertListEqual(wf.indices_of(8), [])
+
+class TestCoarrayACMBuilder(unittest.TestCase):
+
+    def test_transform(self):
+        np.random.seed(42)
+        cpa = CoPrimeArray(2, 3, 0.5)
+        builder = CoarrayACMBuilder1D(cpa)
+        mv = builder.output_size
+        F = WeightFunction1D(cpa).get_coarray_selection_matrix()
+        Rs = np.random.randn(3, cpa.size, cpa.size) + \
+            1j * np.random.randn(3, cpa.size, cpa.size)
+        Ra_ss = builder.transform_batch(Rs, 'ss')
+        Ra_da = builder.transform_batch(Rs, 'da')
+        self.assertEqual(Ra_ss.shape, (3, mv, mv))
+        for i in range(Rs.shape[0]):
+            z = F @ Rs[i].flatten('F')
+            Ra_expected = np.zeros((mv, mv), dtype=np.complex_)
+            for j in range(mv):
+                Ra_expected += np.outer(z[j:j+mv], z[j:j+mv].conj())
+            Ra_expected /= mv
+            npt.assert_allclose(Ra_ss[i], Ra_expected)
+            npt.assert_allclose(builder(Rs[i], 'ss'), Ra_expected)
+            Ra_expected = np.column_stack([z[j:j+mv] for j in range(mv)])[:, ::-1]
+            npt.assert_allclose(Ra_da[i], Ra_expected)
+            npt.assert_allclose(builder(Rs[i], 'da'), Ra_expected)
 
 if __name__ == '__main__':
     unittest.main()
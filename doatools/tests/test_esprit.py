@@ -1,9 +1,9 @@
 import unittest
 import numpy as np
 import numpy.testing as npt
-from doatools.model.arrays import UniformLinearArray
-from doatools.model.sources import FarField1DSourcePlacement
-from doatools.estimation.esprit import Esprit1D
+from doatools.model.arrays import UniformLinearArray, UniformRectangularArray
+from doatools.model.sources import FarField1DSourcePlacement, FarField2DSourcePlacement
+from doatools.estimation.esprit import Esprit1D, Esprit2D
 import itertools
 
 class TestEsprit(unittest.TestCase):
@@ -37,5 +37,101 @@ class TestEsprit(unittest.TestCase):
                 npt.assert_allclose(estimates.locations, sources.locations,
                                     rtol=1e-2, atol=1e-8, err_msg=err_msg)
 
+    def test_esprit_1d_subspace_methods(self):
+        ula = UniformLinearArray(100, self.wavelength / 2.0)
+        sources = FarField1DSourcePlacement(np.linspace(-np.pi/8, np.pi/6, 4))
+        A = ula.steering_matrix(sources, self.wavelength)
+        R = A @ A.conj().T + np.eye(ula.size)
+        _, expected = Esprit1D(self.wavelength, 'full').estimate(R, sources.size)
+        npt.assert_allclose(expected.locations, sources.locations, rtol=1e-4)
+        for method in ['partial', 'lanczos', 'randomized']:
+            _, estimates = Esprit1D(self.wavelength, method).estimate(R, sources.size)
+            npt.assert_allclose(estimates.locations, expected.locations,
+                                rtol=1e-8, err_msg=method)
+
+    def test_unitary_esprit_1d(self):
+        sources = FarField1DSourcePlacement(np.linspace(-np.pi/8, np.pi/10, 3))
+        for m in [11, 12]:
+            ula = UniformLinearArray(m, self.wavelength / 2.0)
+            estimator = Esprit1D(self.wavelength)
+            A = ula.steering_matrix(sources, self.wavelength)
+            R = A @ A.conj().T + np.eye(ula.size)
+            for d, f in itertools.product(range(1, 3), ['ls', 'tls']):
+                _, estimates = estimator.estimate(R, sources.size, ula.d0, d,
+                                                  f, unitary=True)
+                npt.assert_allclose(estimates.locations, sources.locations,
+                                    rtol=1e-6, err_msg='m={0}, d={1}, f={2}'.format(m, d, f))
+            # Forward-backward averaging decorrelates two coherent sources.
+            a = A[:, 0] + A[:, 1]
+            R = np.outer(a, a.conj()) + 0.01 * np.eye(ula.size)
+            _, estimates = estimator.estimate(R, 2, unitary=True)
+            npt.assert_allclose(estimates.locations, sources.locations[:2],
+                                rtol=1e-2)
+            with self.assertRaises(ValueError):
+                estimator.estimate(R, 2, row_weights=np.arange(m - 1.0),
+                                   unitary=True)
+
+    def test_esprit_1d_batch(self):
+        np.random.seed(7)
+        ula = UniformLinearArray(12, self.wavelength / 2.0)
+        sources = FarField1DSourcePlacement(np.linspace(-np.pi/6, np.pi/5, 3))
+        A = ula.steering_matrix(sources, self.wavelength)
+        n = 50
+        Rs = []
+        for i in range(8):
+            S = (np.random.randn(sources.size, n) + 1j * np.random.randn(sources.size, n)) / np.sqrt(2)
+            N = (np.random.randn(ula.size, n) + 1j * np.random.randn(ula.size, n)) / np.sqrt(2)
+            Y = A @ S + N
+            Rs.append(Y @ Y.conj().T / n)
+        Rs = np.stack(Rs)
+        estimator = Esprit1D(self.wavelength)
+        for f, unitary, unit in itertools.product(['ls', 'tls'], [False, True], ['rad', 'deg']):
+            resolved, estimates = estimator.estimate_batch(
+                Rs, sources.size, formulation=f, unit=unit, unitary=unitary)
+            self.assertTrue(np.all(resolved))
+            for i in range(Rs.shape[0]):
+                _, expected = estimator.estimate(Rs[i], sources.size,
+                                                 formulation=f, unit=unit,
+                                                 unitary=unitary)
+                npt.assert_allclose(estimates[i], expected.locations, rtol=1e-10)
+        with self.assertRaises(ValueError):
+            estimator.estimate_batch(Rs, sources.size, unit='foo')
+
+    def test_esprit_2d(self):
+        np.random.seed(11)
+        ura = UniformRectangularArray(6, 5, [self.wavelength / 2.0, self.wavelength * 0.4])
+        # The first two sources share the same direction cosine along the
+        # x-axis, and the last two share the same one along the y-axis, so
+        # incorrect pairings would give wrong estimates.
+        u = np.array([0.3, 0.3, -0.5])
+        v = np.array([0.2, -0.6, -0.6])
+        locations = np.column_stack((np.arctan2(v, u), np.arccos(np.hypot(u, v))))
+        locations = locations[np.argsort(locations[:, 0])]
+        sources = FarField2DSourcePlacement(locations)
+        A = ura.steering_matrix(sources, self.wavelength)
+        R = A @ A.conj().T + 0.1 * np.eye(ura.size)
+        estimator = Esprit2D(self.wavelength)
+        for f, unitary in itertools.product(['ls', 'tls'], [False, True]):
+            resolved, estimates = estimator.estimate(R, sources.size, ura.shape,
+                                                     ura.d0, f, unitary=unitary)
+            self.assertTrue(resolved)
+            npt.assert_allclose(estimates.locations, sources.locations,
+                                rtol=1e-6, err_msg='formulation={0}, unitary={1}'.format(f, unitary))
+        # Sample covariance matrix
+        n = 200
+        S = (np.random.randn(sources.size, n) + 1j * np.random.randn(sources.size, n)) / np.sqrt(2)
+        N = (np.random.randn(ura.size, n) + 1j * np.random.randn(ura.size, n)) / np.sqrt(2)
+        Y = A @ S + 0.3 * N
+        R = Y @ Y.conj().T / n
+        for unitary in [False, True]:
+            resolved, estimates = estimator.estimate(R, sources.size, ura.shape,
+                                                     ura.d0, unit='deg',
+                                                     unitary=unitary)
+            self.assertTrue(resolved)
+            npt.assert_allclose(estimates.locations,
+                                np.rad2deg(sources.locations), atol=1.0)
+        with self.assertRaises(ValueError):
+            estimator.estimate(R, sources.size, (5, 5))
+
 if __name__ == '__main__':
     unittest.main()
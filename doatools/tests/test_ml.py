@@ -0,0 +1,138 @@
+import unittest
+import numpy as np
+import numpy.testing as npt
+from doatools.model.arrays import UniformLinearArray
+from doatools.model.sources import FarField1DSourcePlacement
+from doatools.model.signals import ComplexStochasticSignal
+from doatools.estimation.grid import FarField1DSearchGrid
+from doatools.estimation.ml import AMLEstimator, CMLEstimator, WSFEstimator
+from doatools.utils.math import projm
+
+class TestMLEstimators(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(42)
+        self.wavelength = 1.0
+        self.ula = UniformLinearArray(10, self.wavelength / 2)
+        self.sources = FarField1DSourcePlacement([-0.4, 0.1, 0.5])
+        A = self.ula.steering_matrix(self.sources, self.wavelength)
+        signal = ComplexStochasticSignal(self.sources.size, 1.0)
+        noise = ComplexStochasticSignal(self.ula.size, 0.1)
+        n_snapshots = 200
+        Y = A @ signal.emit(n_snapshots) + noise.emit(n_snapshots)
+        self.R = Y @ Y.conj().T / n_snapshots
+        self.estimators = [
+            AMLEstimator(self.ula, self.wavelength),
+            CMLEstimator(self.ula, self.wavelength),
+            WSFEstimator(self.ula, self.wavelength)
+        ]
+
+    def test_objective_values(self):
+        m = self.ula.size
+        k = self.sources.size
+        # The last case contains two coinciding sources.
+        for locations in [[-0.3, 0.2, 0.6], [-0.3, 0.2, 0.2]]:
+            sources0 = FarField1DSourcePlacement(locations)
+            x = sources0.locations.flatten()
+            A = self.ula.steering_matrix(sources0, self.wavelength)
+            PA = projm(A, True)
+            PPA = np.eye(m) - PA
+            H = PA @ self.R @ PA + np.trace(PPA @ self.R) / (m - k) * PPA
+            expected = [
+                np.linalg.slogdet(0.5 * (H + H.conj().T))[1],
+                np.real(np.trace(PPA @ self.R))
+            ]
+            for estimator, f in zip(self.estimators, expected):
+                estimator._estimates = sources0[:]
+                npt.assert_allclose(estimator._eval_nll(x, self.R, k), f)
+            wsf = self.estimators[2]
+            wsf._estimates = sources0[:]
+            wsf._prepare_opt_prob(sources0, self.R)
+            M = wsf._get_ap_matrix(self.R, k)
+            npt.assert_allclose(wsf._eval_nll(x, self.R, k),
+                                np.real(np.trace(PPA @ M)))
+
+    def test_gradient(self):
+        k = self.sources.size
+        for unit, scale in [('rad', 1.0), ('deg', 180.0 / np.pi)]:
+            sources0 = FarField1DSourcePlacement(
+                self.sources.locations * scale + 0.02 * scale, unit=unit)
+            x = sources0.locations.flatten()
+            for estimator in self.estimators:
+                self.assertTrue(estimator._is_gradient_available(sources0))
+                estimator._estimates = sources0[:]
+                estimator._prepare_opt_prob(sources0, self.R)
+                f, g = estimator._eval_nll_grad(x, self.R, k)
+                npt.assert_allclose(f, estimator._eval_nll(x, self.R, k))
+                h = 1e-6 * scale
+                g_fd = np.array([
+                    (estimator._eval_nll(x + h * e, self.R, k) -
+                     estimator._eval_nll(x - h * e, self.R, k)) / (2 * h)
+                    for e in np.eye(k)
+                ])
+                npt.assert_allclose(g, g_fd, rtol=1e-4, atol=1e-6)
+
+    def test_estimate(self):
+        sources0 = FarField1DSourcePlacement(self.sources.locations + 0.03)
+        for estimator in self.estimators:
+            resolved, estimates = estimator.estimate(self.R, sources0)
+            self.assertTrue(resolved)
+            # The analytic gradient should lead to the same solution as the
+            # finite difference approximation.
+            estimator._use_gradient = False
+            resolved_fd, estimates_fd = estimator.estimate(self.R, sources0)
+            self.assertTrue(resolved_fd)
+            npt.assert_allclose(estimates.locations, estimates_fd.locations,
+                                atol=1e-4)
+            npt.assert_allclose(estimates.locations, self.sources.locations,
+                                atol=1e-2)
+
+    def test_estimate_global(self):
+        grid = FarField1DSearchGrid(size=360)
+        for estimator in self.estimators:
+            resolved, estimates = estimator.estimate_global(
+                self.R, self.sources.size, grid, polish=False)
+            self.assertTrue(resolved)
+            # The AP estimates are on the grid.
+            npt.assert_allclose(estimates.locations, self.sources.locations,
+                                atol=grid.axes[0][1] - grid.axes[0][0])
+            resolved, estimates = estimator.estimate_global(
+                self.R, self.sources.size, grid)
+            self.assertTrue(resolved)
+            npt.assert_allclose(estimates.locations, self.sources.locations,
+                                atol=1e-2)
+            # The steering matrix of the grid is cached.
+            A_grid = estimator._ap_steering_matrix
+            estimator.estimate_global(self.R, self.sources.size, grid)
+            self.assertIs(estimator._ap_steering_matrix, A_grid)
+
+    def test_estimate_many(self):
+        A = self.ula.steering_matrix(self.sources, self.wavelength)
+        signal = ComplexStochasticSignal(self.sources.size, 1.0)
+        noise = ComplexStochasticSignal(self.ula.size, 0.1)
+        Rs = []
+        for _ in range(5):
+            Y = A @ signal.emit(100) + noise.emit(100)
+            Rs.append(Y @ Y.conj().T / 100)
+        Rs = np.stack(Rs)
+        sources0 = FarField1DSourcePlacement(self.sources.locations + 0.03)
+        for estimator in self.estimators:
+            expected = np.stack([
+                estimator.estimate(R, sources0)[1].locations for R in Rs
+            ])
+            estimator._estimates = None
+            for n_workers in [1, 3]:
+                resolved, estimates = estimator.estimate_many(
+                    Rs, sources0, n_workers=n_workers)
+                self.assertTrue(np.all(resolved))
+                npt.assert_allclose(estimates, expected)
+            resolved, estimates = estimator.estimate_many(
+                Rs, [sources0] * Rs.shape[0], n_workers=2)
+            npt.assert_allclose(estimates, expected)
+            # The estimator itself is not modified.
+            self.assertIsNone(estimator._estimates)
+        with self.assertRaises(ValueError):
+            estimator.estimate_many(Rs, [sources0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,18 @@
+import os
+import tempfile
 import unittest
 from doatools.model.arrays import UniformLinearArray
 from doatools.model.sources import FarField1DSourcePlacement
 from doatools.model.signals import ComplexStochasticSignal
-from doatools.estimation.grid import FarField1DSearchGrid
-from doatools.estimation.music import MUSIC, RootMUSIC1D
+from doatools.estimation.grid import FarField1DSearchGrid, FarField2DSearchGrid
+from doatools.estimation.music import MUSIC, RootMUSIC1D, _root_music_coefficients, \
+                                     _select_roots, f_music, f_music_signal
+from doatools.estimation.core import get_noise_subspace, get_signal_subspace
+from doatools.estimation.min_norm import MinNorm
+from doatools.estimation.beamforming import BartlettBeamformer
+from doatools.estimation.atom_cache import AtomMatrixCache
+from doatools.model.arrays import UniformRectangularArray
+from doatools.model.sources import FarField2DSourcePlacement
 import numpy as np
 import numpy.testing as npt
 
@@ -38,5 +47,319 @@ class TestMUSIC(unittest.TestCase):
         self.assertTrue(resolved)
         npt.assert_allclose(estimates.locations, sources.locations, rtol=1e-6, atol=1e-8)
 
+    def check_batch_consistency(self, estimator, Rs, k):
+        """Helper method to check estimate_batch against estimate."""
+        resolved, estimates, sp = estimator.estimate_batch(Rs, k, return_spectrum=True)
+        for i in range(Rs.shape[0]):
+            r, est, sp_i = estimator.estimate(Rs[i], k, return_spectrum=True)
+            self.assertEqual(resolved[i], r)
+            npt.assert_allclose(sp[i], sp_i, rtol=1e-8)
+            if r:
+                npt.assert_array_equal(estimates[i], est.locations)
+            else:
+                self.assertTrue(np.all(np.isnan(estimates[i])))
+
+    def test_music_batch(self):
+        np.random.seed(42)
+        ula = UniformLinearArray(10, self.wavelength / 2)
+        n_sources = 3
+        sources = FarField1DSourcePlacement(np.linspace(-np.pi/4, np.pi/4, n_sources))
+        signal = ComplexStochasticSignal(n_sources, 1.0)
+        noise = ComplexStochasticSignal(ula.size, 1.0)
+        A = ula.steering_matrix(sources, self.wavelength)
+        Rs = []
+        for n_snapshots in [2, 10, 50, 200]:
+            Y = A @ signal.emit(n_snapshots) + noise.emit(n_snapshots)
+            Rs.append(Y @ Y.conj().T / n_snapshots)
+        Rs = np.stack(Rs)
+        grid = FarField1DSearchGrid()
+        self.check_batch_consistency(MUSIC(ula, self.wavelength, grid), Rs, n_sources)
+        self.check_batch_consistency(MinNorm(ula, self.wavelength, grid), Rs, n_sources)
+
+    def test_root_music_batch(self):
+        np.random.seed(42)
+        ula = UniformLinearArray(10, self.wavelength / 2)
+        n_sources = 3
+        sources = FarField1DSourcePlacement(np.linspace(-np.pi/4, np.pi/4, n_sources))
+        signal = ComplexStochasticSignal(n_sources, 1.0)
+        noise = ComplexStochasticSignal(ula.size, 1.0)
+        A = ula.steering_matrix(sources, self.wavelength)
+        Rs = []
+        for n_snapshots in [2, 10, 50, 200]:
+            Y = A @ signal.emit(n_snapshots) + noise.emit(n_snapshots)
+            Rs.append(Y @ Y.conj().T / n_snapshots)
+        Rs = np.stack(Rs)
+        # The coefficients are the sums along the diagonals of En En^H.
+        En = np.linalg.eigh(Rs)[1][:, :, :-n_sources]
+        C = En[0] @ En[0].conj().T
+        m = ula.size
+        expected = [np.sum(np.diag(C, i)) for i in range(m - 1, -m, -1)]
+        npt.assert_allclose(_root_music_coefficients(En)[0], expected)
+        rmusic = RootMUSIC1D(self.wavelength)
+        for unit in ['rad', 'deg', 'sin']:
+            resolved, estimates = rmusic.estimate_batch(Rs, n_sources, unit=unit)
+            for i in range(Rs.shape[0]):
+                r, est = rmusic.estimate(Rs[i], n_sources, unit=unit)
+                self.assertEqual(resolved[i], r)
+                if r:
+                    npt.assert_allclose(estimates[i], est.locations)
+                else:
+                    self.assertTrue(np.all(np.isnan(estimates[i])))
+        with self.assertRaises(ValueError):
+            rmusic.estimate_batch(Rs, n_sources, unit='foo')
+
+    def test_root_selection(self):
+        z = np.array([[0.5, 2.0, 1j, 1j, 0.9j, -0.1],
+                      [0.5, 2.0, 3.0, 0.1, 4.0, 5.0]])
+        resolved, z_selected = _select_roots(z, 3)
+        npt.assert_array_equal(resolved, [True, False])
+        # Only one root of the pair on the unit circle is kept.
+        npt.assert_allclose(z_selected[0], [1j, 0.9j, 0.5])
+
+    def test_signal_subspace(self):
+        np.random.seed(3)
+        ula = UniformLinearArray(80, self.wavelength / 2)
+        sources = FarField1DSourcePlacement(np.linspace(-np.pi/4, np.pi/5, 4))
+        A = ula.steering_matrix(sources, self.wavelength)
+        R = A @ A.conj().T + 0.1 * np.eye(ula.size)
+        En = get_noise_subspace(R, sources.size)
+        P_ref = En @ En.conj().T
+        grid = FarField1DSearchGrid(size=720)
+        A_grid = ula.steering_matrix(grid.source_placement, self.wavelength)
+        sp_ref = f_music(A_grid, En)
+        for method in ['full', 'partial', 'lanczos', 'randomized']:
+            Es = get_signal_subspace(R, sources.size, method)
+            self.assertEqual(Es.shape, (ula.size, sources.size))
+            npt.assert_allclose(np.eye(ula.size) - Es @ Es.conj().T, P_ref,
+                                atol=1e-8, err_msg=method)
+            # Compare the spectra away from the peaks, where the values are
+            # not dominated by rounding errors.
+            sp = f_music_signal(A_grid, Es)
+            mask = sp_ref < 1e3
+            npt.assert_allclose(sp[mask], sp_ref[mask], rtol=1e-6, err_msg=method)
+        # Batch input
+        Rs = np.stack((R, 2 * R))
+        Es = get_signal_subspace(Rs, sources.size, 'partial')
+        self.assertEqual(Es.shape, (2, ula.size, sources.size))
+        with self.assertRaises(ValueError):
+            get_signal_subspace(R, sources.size, 'foo')
+        # MUSIC estimates should not depend on the method.
+        for enable_fft in [False, True]:
+            results = [
+                MUSIC(ula, self.wavelength, grid, subspace_method=method,
+                      enable_fft=enable_fft).estimate(R, sources.size)
+                for method in ['full', 'partial', 'randomized']
+            ]
+            for resolved, estimates in results:
+                self.assertTrue(resolved)
+                npt.assert_allclose(estimates.locations, results[0][1].locations)
+
+    def test_music_fft(self):
+        np.random.seed(42)
+        ula = UniformLinearArray(10, self.wavelength / 2)
+        n_sources = 3
+        sources = FarField1DSourcePlacement(np.linspace(-np.pi/4, np.pi/4, n_sources))
+        signal = ComplexStochasticSignal(n_sources, 1.0)
+        noise = ComplexStochasticSignal(ula.size, 1.0)
+        A = ula.steering_matrix(sources, self.wavelength)
+        Rs = []
+        for n_snapshots in [10, 50, 200]:
+            Y = A @ signal.emit(n_snapshots) + noise.emit(n_snapshots)
+            Rs.append(Y @ Y.conj().T / n_snapshots)
+        Rs = np.stack(Rs)
+        # 1001 and 7 grid points lead to 1000-point and 6-point FFTs,
+        # respectively. The latter is shorter than the array.
+        for size in [1001, 7]:
+            grid = FarField1DSearchGrid(start=-1, stop=1, size=size, unit='sin')
+            for cls in [MUSIC, MinNorm]:
+                est_fft = cls(ula, self.wavelength, grid)
+                est_ref = cls(ula, self.wavelength, grid, enable_fft=False)
+                self.assertIsNotNone(est_fft._spectrum_evaluator)
+                self.assertIsNone(est_ref._spectrum_evaluator)
+                for i in range(Rs.shape[0]):
+                    r1, e1, sp1 = est_fft.estimate(Rs[i], n_sources, return_spectrum=True)
+                    r2, e2, sp2 = est_ref.estimate(Rs[i], n_sources, return_spectrum=True)
+                    self.assertEqual(r1, r2)
+                    npt.assert_allclose(sp1, sp2, rtol=1e-8)
+                    if r1:
+                        npt.assert_allclose(e1.locations, e2.locations)
+                _, _, sp1 = est_fft.estimate_batch(Rs, n_sources, True)
+                _, _, sp2 = est_ref.estimate_batch(Rs, n_sources, True)
+                npt.assert_allclose(sp1, sp2, rtol=1e-8)
+        # The FFT is not applicable to grids using radians.
+        music = MUSIC(ula, self.wavelength, FarField1DSearchGrid())
+        self.assertIsNone(music._spectrum_evaluator)
+
+    def test_music_separable(self):
+        ura = UniformRectangularArray(6, 5, self.wavelength / 2)
+        # Off-grid sources so that the spectrum is well-conditioned.
+        sources = FarField2DSourcePlacement([[-0.7712, 0.5132], [1.0431, 0.7918]])
+        A = ura.steering_matrix(sources, self.wavelength)
+        Rs = np.stack([A @ np.diag(p) @ A.conj().T + np.eye(ura.size)
+                       for p in ([1.0, 1.0], [2.0, 0.5], [0.5, 3.0])])
+        grid = FarField2DSearchGrid(size=(90, 30))
+        for cls in [MUSIC, MinNorm]:
+            est_sep = cls(ura, self.wavelength, grid)
+            est_ref = cls(ura, self.wavelength, grid, enable_separable=False)
+            # The phase tables are only computed when first needed.
+            self.assertFalse(est_sep._evaluator_created)
+            self.assertIsNotNone(est_sep._spectrum_evaluator)
+            self.assertIsNone(est_ref._spectrum_evaluator)
+            for i in range(Rs.shape[0]):
+                r1, e1, sp1 = est_sep.estimate(Rs[i], 2, return_spectrum=True)
+                r2, e2, sp2 = est_ref.estimate(Rs[i], 2, return_spectrum=True)
+                self.assertTrue(r1 and r2)
+                npt.assert_allclose(sp1, sp2, rtol=1e-8)
+                npt.assert_array_equal(e1.locations, e2.locations)
+            self.check_batch_consistency(est_sep, Rs, 2)
+        # The atom matrix should never be created.
+        self.assertIsNone(est_sep._atom_matrix)
+
+    def test_music_chunked(self):
+        np.random.seed(42)
+        ula = UniformLinearArray(12, self.wavelength / 2)
+        sources = FarField1DSourcePlacement(np.linspace(-np.pi/3, np.pi/3, 4))
+        signal = ComplexStochasticSignal(sources.size, 1.0)
+        noise = ComplexStochasticSignal(ula.size, 1.0)
+        A = ula.steering_matrix(sources, self.wavelength)
+        Rs = []
+        for n_snapshots in [20, 100]:
+            Y = A @ signal.emit(n_snapshots) + noise.emit(n_snapshots)
+            Rs.append(Y @ Y.conj().T / n_snapshots)
+        Rs = np.stack(Rs)
+        grid = FarField1DSearchGrid(size=3600)
+        # The full atom matrix requires 12 * 3600 * 16 bytes.
+        max_atom_bytes = 200000
+        for cls in [MUSIC, MinNorm]:
+            est = cls(ula, self.wavelength, grid)
+            est_chunked = cls(ula, self.wavelength, grid, max_atom_bytes=max_atom_bytes)
+            for R in Rs:
+                r1, e1, sp1 = est.estimate(R, sources.size, return_spectrum=True)
+                r2, e2, sp2 = est_chunked.estimate(R, sources.size, return_spectrum=True)
+                self.assertEqual(r1, r2)
+                npt.assert_allclose(sp2, sp1, rtol=1e-12)
+                npt.assert_array_equal(e2.locations, e1.locations)
+                _, e1 = est.estimate(R, sources.size, refine_estimates=True)
+                _, e2 = est_chunked.estimate(R, sources.size, refine_estimates=True)
+                npt.assert_allclose(e2.locations, e1.locations)
+            self.check_batch_consistency(est_chunked, Rs, sources.size)
+            # Only the tiles within the budget are cached.
+            self.assertIsNone(est_chunked._atom_matrix)
+            n_cached_bytes = sum(A.nbytes for _, A in est_chunked._atom_tiles
+                                 if A is not None)
+            self.assertGreater(n_cached_bytes, 0)
+            self.assertLessEqual(n_cached_bytes, max_atom_bytes)
+        # Coarse-to-fine search in the chunked mode.
+        music = MUSIC(ula, self.wavelength, grid)
+        music_c2f = MUSIC(ula, self.wavelength, grid, coarse_decimation=20,
+                          max_atom_bytes=max_atom_bytes)
+        _, estimates = music.estimate(Rs[1], sources.size)
+        resolved, estimates_c2f = music_c2f.estimate(Rs[1], sources.size)
+        self.assertTrue(resolved)
+        npt.assert_array_equal(estimates_c2f.locations, estimates.locations)
+        self.assertIsNone(music_c2f._atom_matrix)
+
+    def test_music_atom_cache(self):
+        ula = UniformLinearArray(8, self.wavelength / 2)
+        sources = FarField1DSourcePlacement([-0.5, 0.3])
+        A = ula.steering_matrix(sources, self.wavelength)
+        R = A @ A.conj().T + np.eye(ula.size)
+        grid = FarField1DSearchGrid(size=720)
+        _, _, sp_expected = MUSIC(ula, self.wavelength, grid).estimate(R, 2, return_spectrum=True)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            music = MUSIC(ula, self.wavelength, grid, atom_cache=cache_dir)
+            _, _, sp = music.estimate(R, 2, return_spectrum=True)
+            npt.assert_allclose(sp, sp_expected)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            # Estimators sharing the same atom matrix share the same entry,
+            # which is loaded as a read-only memory map.
+            cache = AtomMatrixCache(cache_dir)
+            bartlett = BartlettBeamformer(ula, self.wavelength, grid, atom_cache=cache)
+            music = MUSIC(ula, self.wavelength, grid, atom_cache=cache)
+            self.assertEqual(bartlett._get_atom_cache_key(), music._get_atom_cache_key())
+            _, _, sp = music.estimate(R, 2, return_spectrum=True)
+            npt.assert_allclose(sp, sp_expected)
+            self.assertFalse(music._atom_matrix.flags.writeable)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            # Different wavelengths, grids, or perturbations lead to different
+            # keys.
+            keys = set([
+                music._get_atom_cache_key(),
+                MUSIC(ula, 2 * self.wavelength, grid, atom_cache=cache)._get_atom_cache_key(),
+                MUSIC(ula, self.wavelength, FarField1DSearchGrid(size=721), atom_cache=cache)._get_atom_cache_key(),
+                MUSIC(ula.get_perturbed_copy({'gain_errors': (0.1 * np.ones(8), True)}),
+                      self.wavelength, grid, atom_cache=cache)._get_atom_cache_key()
+            ])
+            self.assertEqual(len(keys), 4)
+
+    def test_music_batch_2d(self):
+        ura = UniformRectangularArray(4, 4, self.wavelength / 2)
+        sources = FarField2DSourcePlacement([[-np.pi/4, np.pi/6], [np.pi/3, np.pi/4]])
+        A = ura.steering_matrix(sources, self.wavelength)
+        Rs = np.stack([A @ np.diag(p) @ A.conj().T + np.eye(ura.size)
+                       for p in ([1.0, 1.0], [2.0, 0.5], [0.5, 3.0])])
+        grid = FarField2DSearchGrid(size=(90, 30))
+        self.check_batch_consistency(MUSIC(ura, self.wavelength, grid), Rs, 2)
+
+    def test_music_refinement_2d(self):
+        ura = UniformRectangularArray(5, 5, self.wavelength / 2)
+        sources = FarField2DSourcePlacement([[-0.7712, 0.5132], [1.0431, 0.7918]])
+        A = ura.steering_matrix(sources, self.wavelength)
+        R = A @ A.conj().T + np.eye(ura.size)
+        grid = FarField2DSearchGrid(size=(90, 30))
+        music = MUSIC(ura, self.wavelength, grid)
+        _, estimates = music.estimate(R, sources.size)
+        resolved, estimates_refined = music.estimate(R, sources.size, refine_estimates=True)
+        self.assertTrue(resolved)
+        # Reference: refine each estimate separately on its own grid.
+        En = np.linalg.eigh(R)[1][:, :-sources.size]
+        for i in range(sources.size):
+            coord = np.unravel_index(
+                np.flatnonzero(np.all(grid.source_placement.locations == estimates[i], axis=1))[0],
+                grid.shape
+            )
+            g = grid.create_refined_grid_at(coord, density=10)
+            for r in range(3):
+                v = En.conj().T @ ura.steering_matrix(g.source_placement, self.wavelength)
+                i_max = np.argmax(1.0 / np.sum(np.abs(v)**2, axis=0))
+                loc = g.source_placement[i_max]
+                g = g.create_refined_grid_at(np.unravel_index(i_max, g.shape), density=10)
+            npt.assert_allclose(estimates_refined[i], loc)
+        err = np.sum((estimates.locations - sources.locations)**2)
+        err_refined = np.sum((estimates_refined.locations - sources.locations)**2)
+        self.assertLess(err_refined, err)
+
+    def test_music_coarse_to_fine(self):
+        ula = UniformLinearArray(12, self.wavelength / 2)
+        sources = FarField1DSourcePlacement(np.linspace(-np.pi/3, np.pi/3, 4))
+        A = ula.steering_matrix(sources, self.wavelength)
+        R = A @ A.T.conj() + np.eye(ula.size)
+        grid = FarField1DSearchGrid(size=3600)
+        music = MUSIC(ula, self.wavelength, grid)
+        music_c2f = MUSIC(ula, self.wavelength, grid, coarse_decimation=20)
+        _, estimates = music.estimate(R, sources.size)
+        resolved, estimates_c2f, sp = music_c2f.estimate(R, sources.size, return_spectrum=True)
+        self.assertTrue(resolved)
+        npt.assert_array_equal(estimates_c2f.locations, estimates.locations)
+        # Only a fraction of the spectrum should be evaluated.
+        self.assertLess(np.count_nonzero(~np.isnan(sp)), grid.size // 5)
+        # Refinement should also work.
+        _, estimates = music.estimate(R, sources.size, refine_estimates=True)
+        _, estimates_c2f = music_c2f.estimate(R, sources.size, refine_estimates=True)
+        npt.assert_array_equal(estimates_c2f.locations, estimates.locations)
+
+    def test_music_coarse_to_fine_2d(self):
+        ura = UniformRectangularArray(5, 5, self.wavelength / 2)
+        sources = FarField2DSourcePlacement([[-np.pi/4, np.pi/6], [np.pi/3, np.pi/4]])
+        A = ura.steering_matrix(sources, self.wavelength)
+        R = A @ A.conj().T + np.eye(ura.size)
+        grid = FarField2DSearchGrid(size=(360, 90))
+        music = MUSIC(ura, self.wavelength, grid)
+        music_c2f = MUSIC(ura, self.wavelength, grid, coarse_decimation=(10, 5))
+        _, estimates = music.estimate(R, sources.size)
+        resolved, estimates_c2f = music_c2f.estimate(R, sources.size)
+        self.assertTrue(resolved)
+        npt.assert_array_equal(estimates_c2f.locations, estimates.locations)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
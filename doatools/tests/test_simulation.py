@@ -0,0 +1,79 @@
+import os
+import multiprocessing
+import tempfile
+import unittest
+from doatools.model.arrays import UniformLinearArray
+from doatools.model.sources import FarField1DSourcePlacement
+from doatools.estimation.music import RootMUSIC1D
+from doatools.simulation import run_monte_carlo
+import numpy as np
+import numpy.testing as npt
+
+class TestMonteCarlo(unittest.TestCase):
+
+    def setUp(self):
+        self.wavelength = 1.0
+        self.ula = UniformLinearArray(8, self.wavelength / 2)
+        self.sources = FarField1DSourcePlacement(np.array([0.3, -0.2]))
+        estimator = RootMUSIC1D(self.wavelength)
+        d0 = self.ula.d0
+        self.estimators = {
+            'RootMUSIC': lambda R, k: estimator.estimate(R, k, d0)
+        }
+        self.snrs = [0.0, 10.0]
+        self.snapshots = [50, 100]
+
+    def _run(self, **kwargs):
+        return run_monte_carlo(
+            self.ula, self.sources, self.wavelength, self.estimators,
+            self.snrs, self.snapshots, 20, seed=123, trials_per_task=7,
+            **kwargs
+        )
+
+    def test_consistency(self):
+        # The estimators are lambdas, which can only be used with 'fork'.
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            self.skipTest("The 'fork' start method is not available.")
+        r1 = self._run(n_workers=1)
+        r2 = self._run(n_workers=2, start_method='fork')
+        npt.assert_array_equal(r1.n_resolved, r2.n_resolved)
+        npt.assert_array_equal(r1.mse, r2.mse)
+        npt.assert_array_equal(r1.bias, r2.bias)
+        self.assertEqual(r1.mse.shape, (1, 2, 2, 2))
+        self.assertEqual(r1.crb.shape, (2, 2, 2))
+        self.assertEqual(r1.ecov_music.shape, (2, 2, 2))
+        # The MSEs should be close to the CRB at high SNRs.
+        res = r1['RootMUSIC']
+        npt.assert_array_equal(res['resolution_prob'], 1.0)
+        self.assertTrue(np.all(res['mse'][1] < 3 * r1.crb[1]))
+        # Changing the seed should change the results.
+        r3 = run_monte_carlo(
+            self.ula, self.sources, self.wavelength, self.estimators,
+            self.snrs, self.snapshots, 20, seed=124, n_workers=1
+        )
+        self.assertFalse(np.allclose(r1.mse, r3.mse))
+
+    def test_checkpoint(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'checkpoint.npz')
+            r1 = self._run(n_workers=1, checkpoint=path)
+            self.assertTrue(os.path.isfile(path))
+            # Saving after every task gives the same checkpoint.
+            path0 = os.path.join(tmp_dir, 'checkpoint0.npz')
+            self._run(n_workers=1, checkpoint=path0, checkpoint_interval=0)
+            with np.load(path) as d, np.load(path0) as d0:
+                self.assertTrue(np.all(d['completed']))
+                npt.assert_array_equal(d['sum_sq_err'], d0['sum_sq_err'])
+            # Resuming from a completed checkpoint reproduces the results.
+            r2 = self._run(n_workers=1, checkpoint=path)
+            npt.assert_array_equal(r1.mse, r2.mse)
+            # Resuming with different settings is not allowed.
+            with self.assertRaises(ValueError):
+                run_monte_carlo(
+                    self.ula, self.sources, self.wavelength, self.estimators,
+                    self.snrs, self.snapshots, 30, seed=123,
+                    trials_per_task=7, checkpoint=path
+                )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import numpy as np
+import numpy.testing as npt
+from doatools.model.arrays import UniformLinearArray
+from doatools.model.sources import FarField1DSourcePlacement
+from doatools.model.signals import ComplexStochasticSignal, RandomPhaseSignal
+from doatools.model.snapshots import CovarianceAccumulator, get_narrowband_snapshots, \
+                                     iter_narrowband_snapshots, get_narrowband_covariance
+
+class TestSnapshotStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.wavelength = 1.0
+        self.array = UniformLinearArray(5, self.wavelength / 2)
+        self.sources = FarField1DSourcePlacement([-0.4, 0.2, 0.5])
+        C = np.array([[2.0, 0.5, 0.0], [0.5, 1.0, 0.2], [0.0, 0.2, 1.5]])
+        self.source_signals = [
+            ComplexStochasticSignal(3, 2.0),
+            ComplexStochasticSignal(3, np.array([1.0, 2.0, 3.0])),
+            ComplexStochasticSignal(3, C),
+            RandomPhaseSignal(3, np.array([1.0, 0.5, 2.0]))
+        ]
+        self.noise_signal = ComplexStochasticSignal(self.array.size, 0.1)
+
+    def test_same_random_stream(self):
+        n = 103
+        for source_signal in self.source_signals:
+            np.random.seed(42)
+            Y_expected = get_narrowband_snapshots(
+                self.array, self.sources, self.wavelength, source_signal,
+                self.noise_signal, n)
+            state_expected = np.random.get_state()
+            for block_size, use_out in [(10, False), (10, True), (200, False)]:
+                np.random.seed(42)
+                out = np.empty((self.array.size, block_size), dtype=np.complex_) \
+                    if use_out else None
+                blocks = []
+                for Y in iter_narrowband_snapshots(
+                        self.array, self.sources, self.wavelength,
+                        source_signal, self.noise_signal, n, block_size, out):
+                    self.assertLessEqual(Y.shape[1], block_size)
+                    if use_out:
+                        self.assertTrue(np.shares_memory(Y, out))
+                    blocks.append(Y.copy())
+                npt.assert_allclose(np.hstack(blocks), Y_expected, rtol=1e-12, atol=1e-14)
+                state = np.random.get_state()
+                self.assertTrue(np.array_equal(state[1], state_expected[1]))
+                self.assertEqual(state[2:], state_expected[2:])
+
+    def test_covariance(self):
+        n = 1000
+        np.random.seed(7)
+        _, R_expected = get_narrowband_snapshots(
+            self.array, self.sources, self.wavelength, self.source_signals[0],
+            self.noise_signal, n, True)
+        np.random.seed(7)
+        R = get_narrowband_covariance(
+            self.array, self.sources, self.wavelength, self.source_signals[0],
+            self.noise_signal, n, 64)
+        npt.assert_allclose(R, R_expected, rtol=1e-10, atol=1e-12)
+        with self.assertRaises(ValueError):
+            next(iter_narrowband_snapshots(
+                self.array, self.sources, self.wavelength,
+                self.source_signals[0], None, n, 64, np.empty((2, 64), dtype=np.complex_)))
+
+class TestCovarianceAccumulator(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(5)
+        self.m = 6
+        n = 100
+        self.Y = np.random.randn(self.m, n) + 1j * np.random.randn(self.m, n)
+        # Blocks of different sizes.
+        self.splits = [1, 4, 11, 30, 31, 60, 61, 99]
+
+    def feed(self, acc, Y):
+        for Y_block in np.split(Y, self.splits, axis=1):
+            acc.update(Y_block)
+
+    def test_cumulative(self):
+        acc = CovarianceAccumulator(self.m)
+        with self.assertRaises(RuntimeError):
+            acc.get_covariance()
+        self.feed(acc, self.Y)
+        self.assertEqual(acc.n_snapshots, self.Y.shape[1])
+        R = acc.get_covariance()
+        npt.assert_allclose(R, self.Y @ self.Y.conj().T / self.Y.shape[1])
+        # A single snapshot as a vector
+        acc.update(self.Y[:, 0])
+        Y = np.hstack((self.Y, self.Y[:, :1]))
+        npt.assert_allclose(acc.get_covariance(), Y @ Y.conj().T / Y.shape[1])
+        acc.reset()
+        self.assertEqual(acc.n_snapshots, 0)
+        with self.assertRaises(ValueError):
+            acc.update(np.ones((self.m + 1, 2)))
+
+    def test_forgetting(self):
+        lam = 0.95
+        acc = CovarianceAccumulator(self.m, forgetting_factor=lam)
+        self.feed(acc, self.Y)
+        n = self.Y.shape[1]
+        w = lam ** np.arange(n - 1, -1, -1)
+        expected = (self.Y * w) @ self.Y.conj().T / np.sum(w)
+        npt.assert_allclose(acc.weight, np.sum(w))
+        npt.assert_allclose(acc.get_covariance(), expected)
+
+    def test_sliding_window(self):
+        for L in [1, 7, 30, 200]:
+            acc = CovarianceAccumulator(self.m, window_size=L)
+            for i, Y_block in enumerate(np.split(self.Y, self.splits, axis=1)):
+                acc.update(Y_block)
+                n = self.splits[i] if i < len(self.splits) else self.Y.shape[1]
+                Y_window = self.Y[:, max(0, n - L):n]
+                npt.assert_allclose(
+                    acc.get_covariance(),
+                    Y_window @ Y_window.conj().T / Y_window.shape[1],
+                    rtol=1e-10, atol=1e-12, err_msg='L={0}, n={1}'.format(L, n)
+                )
+        with self.assertRaises(ValueError):
+            CovarianceAccumulator(self.m, forgetting_factor=0.9, window_size=10)
+
+if __name__ == '__main__':
+    unittest.main()
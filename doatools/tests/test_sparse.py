@@ -0,0 +1,293 @@
+import unittest
+import numpy as np
+import numpy.testing as npt
+from doatools.model.arrays import UniformLinearArray
+from doatools.model.sources import FarField1DSourcePlacement
+from doatools.estimation.grid import FarField1DSearchGrid
+from doatools.estimation.sparse import SparseCovarianceMatching, \
+                                      GroupSparseEstimator
+from doatools.optim.l1lsq import L1RegularizedLeastSquaresProblem, \
+                                 L21RegularizedLeastSquaresProblem, \
+                                 cvx_available
+from doatools.optim.operators import KhatriRaoDictionary
+
+class TestL1RegularizedLeastSquares(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(42)
+        self.m = 20
+        self.k = 50
+        self.A = np.random.randn(self.m, self.k)
+        x = np.zeros((self.k, 1))
+        x[[3, 17, 40]] = [[1.0], [2.0], [0.5]]
+        self.b = self.A @ x + 0.1 * np.random.randn(self.m, 1)
+
+    def _objective(self, formulation, x, l):
+        if formulation == 'penalizedl1':
+            return 0.5 * np.sum((self.A @ x - self.b)**2) + l * np.sum(np.abs(x))
+        elif formulation == 'constrainedl1':
+            return np.sum((self.A @ x - self.b)**2)
+        else:
+            return np.sum(np.abs(x))
+
+    def _check_feasibility(self, formulation, x, l, nonnegative):
+        if nonnegative:
+            self.assertTrue(np.all(x >= 0))
+        if formulation == 'constrainedl1':
+            self.assertLessEqual(np.sum(np.abs(x)), l * (1 + 1e-8))
+        elif formulation == 'constrainedl2':
+            self.assertLessEqual(np.linalg.norm(self.A @ x - self.b), l * (1 + 1e-4))
+
+    @unittest.skipIf(not cvx_available, 'cvxpy is not available.')
+    def test_against_cvxpy(self):
+        params = {'penalizedl1': 1.0, 'constrainedl1': 3.0, 'constrainedl2': 0.6}
+        for formulation, l in params.items():
+            for nonnegative in [False, True]:
+                p_native = L1RegularizedLeastSquaresProblem(
+                    self.m, self.k, formulation, nonnegative, tol=1e-8)
+                p_cvxpy = L1RegularizedLeastSquaresProblem(
+                    self.m, self.k, formulation, nonnegative, backend='cvxpy')
+                x_native = p_native.solve(self.A, self.b, l)
+                x_cvxpy = p_cvxpy.solve(self.A, self.b, l, solver='ECOS')
+                self.assertEqual(x_native.shape, (self.k, 1))
+                self._check_feasibility(formulation, x_native, l, nonnegative)
+                npt.assert_allclose(
+                    self._objective(formulation, x_native, l),
+                    self._objective(formulation, x_cvxpy, l),
+                    rtol=1e-5
+                )
+                npt.assert_allclose(x_native, x_cvxpy, atol=1e-3)
+
+    def test_warm_start(self):
+        p = L1RegularizedLeastSquaresProblem(self.m, self.k, tol=1e-8,
+                                             warm_start=True)
+        x1 = p.solve(self.A, self.b, 1.0)
+        # The Lipschitz constant is cached for the same dictionary.
+        self.assertIs(p._cached_dict, self.A)
+        npt.assert_allclose(p.get_lipschitz_constant(self.A),
+                            np.linalg.norm(self.A, 2)**2)
+        x2 = p.solve(self.A, self.b, 0.9)
+        x3 = L1RegularizedLeastSquaresProblem(self.m, self.k, tol=1e-8)\
+            .solve(self.A, self.b, 0.9)
+        npt.assert_allclose(x2, x3, atol=1e-5)
+        with self.assertRaises(ValueError):
+            p.solve(self.A, self.b, 1.0, solver='ECOS')
+        with self.assertRaises(ValueError):
+            L1RegularizedLeastSquaresProblem(self.m, self.k, 'l0')
+
+    def test_path(self):
+        for formulation in ['penalizedl1', 'constrainedl1', 'constrainedl2']:
+            p = L1RegularizedLeastSquaresProblem(
+                self.m, self.k, formulation, True, tol=1e-8)
+            if formulation == 'penalizedl1':
+                l_max = p.get_max_regularization_parameter(self.A, self.b)
+                ls = l_max * np.array([1.5, 0.01, 0.5, 0.1, 0.05])
+            elif formulation == 'constrainedl1':
+                ls = np.array([0.5, 4.0, 2.0, 1.0])
+            else:
+                ls = np.array([1.0, 0.4, 3.0])
+            X = p.solve_path(self.A, self.b, ls)
+            self.assertEqual(X.shape, (len(ls), self.k, 1))
+            for x, l in zip(X, ls):
+                x_expected = L1RegularizedLeastSquaresProblem(
+                    self.m, self.k, formulation, True, tol=1e-8
+                ).solve(self.A, self.b, l)
+                npt.assert_allclose(
+                    self._objective(formulation, x, l),
+                    self._objective(formulation, x_expected, l),
+                    rtol=1e-6
+                )
+            if formulation == 'penalizedl1':
+                npt.assert_array_equal(X[0], 0.0)
+
+    def test_gram(self):
+        l_max = L1RegularizedLeastSquaresProblem(self.m, self.k)\
+            .get_max_regularization_parameter(self.A, self.b)
+        ls = l_max * np.array([0.5, 0.1, 0.02])
+        for nonnegative in [False, True]:
+            p = L1RegularizedLeastSquaresProblem(
+                self.m, self.k, 'penalizedl1', nonnegative, tol=1e-10,
+                use_gram=True)
+            npt.assert_allclose(p.get_gram_matrix(self.A), self.A.T @ self.A)
+            X = p.solve_path(self.A, self.b, ls)
+            for x, l in zip(X, ls):
+                x_expected = L1RegularizedLeastSquaresProblem(
+                    self.m, self.k, 'penalizedl1', nonnegative, tol=1e-10
+                ).solve(self.A, self.b, l)
+                npt.assert_allclose(p.solve(self.A, self.b, l), x_expected,
+                                    atol=1e-6)
+                npt.assert_allclose(x, x_expected, atol=1e-6)
+        with self.assertRaises(ValueError):
+            p.set_gram_matrix(self.A, np.eye(self.m))
+        with self.assertRaises(ValueError):
+            L1RegularizedLeastSquaresProblem(self.m, self.k, 'constrainedl1',
+                                             use_gram=True)
+
+class TestL21RegularizedLeastSquares(unittest.TestCase):
+
+    @unittest.skipIf(not cvx_available, 'cvxpy is not available.')
+    def test_against_cvxpy(self):
+        np.random.seed(42)
+        m, k, n = 10, 30, 4
+        A = np.random.randn(m, k) + 1j * np.random.randn(m, k)
+        X = np.zeros((k, n), dtype=np.complex_)
+        X[[5, 20]] = np.random.randn(2, n) + 1j * np.random.randn(2, n)
+        B = A @ X + 0.1 * (np.random.randn(m, n) + 1j * np.random.randn(m, n))
+        l = 2.0
+        f = lambda X: 0.5 * np.linalg.norm(A @ X - B)**2 + \
+            l * np.sum(np.linalg.norm(X, axis=1))
+        X_native = L21RegularizedLeastSquaresProblem(m, k, n, True, tol=1e-8)\
+            .solve(A, B, l)
+        X_cvxpy = L21RegularizedLeastSquaresProblem(m, k, n, True, 'cvxpy')\
+            .solve(A, B, l, solver='ECOS')
+        npt.assert_allclose(f(X_native), f(X_cvxpy), rtol=1e-5)
+        npt.assert_allclose(X_native, X_cvxpy, atol=1e-3)
+
+    def test_path(self):
+        np.random.seed(42)
+        m, k, n = 10, 30, 4
+        A = np.random.randn(m, k) + 1j * np.random.randn(m, k)
+        B = np.random.randn(m, n) + 1j * np.random.randn(m, n)
+        f = lambda X, l: 0.5 * np.linalg.norm(A @ X - B)**2 + \
+            l * np.sum(np.linalg.norm(X, axis=1))
+        p = L21RegularizedLeastSquaresProblem(m, k, n, True, tol=1e-8)
+        l_max = p.get_max_regularization_parameter(A, B)
+        ls = l_max * np.array([0.2, 1.0, 0.5, 0.05])
+        Xs = p.solve_path(A, B, ls)
+        self.assertEqual(Xs.shape, (len(ls), k, n))
+        npt.assert_array_equal(Xs[1], 0.0)
+        for X, l in zip(Xs, ls):
+            X_expected = L21RegularizedLeastSquaresProblem(m, k, n, True, tol=1e-8)\
+                .solve(A, B, l)
+            npt.assert_allclose(f(X, l), f(X_expected, l), rtol=1e-6)
+
+class TestKhatriRaoDictionary(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(42)
+        self.A = np.random.randn(4, 10) + 1j * np.random.randn(4, 10)
+
+    def test_products(self):
+        for append_identity in [False, True]:
+            op = KhatriRaoDictionary(self.A, append_identity)
+            Phi = op.toarray()
+            self.assertEqual(op.shape, Phi.shape)
+            x = np.random.randn(op.shape[1])
+            y = np.random.randn(op.shape[0], 2)
+            npt.assert_allclose(op @ x, Phi @ x, atol=1e-12)
+            npt.assert_allclose(op.T @ y, Phi.T @ y, atol=1e-12)
+            npt.assert_allclose(op.column_norms(), np.linalg.norm(Phi, axis=0))
+            npt.assert_allclose(op.gram(), Phi.T @ Phi, atol=1e-10)
+            indices = [1, 4, op.shape[1] - 1]
+            npt.assert_allclose(op.select_columns(indices).toarray(),
+                                Phi[:, indices])
+        with self.assertRaises(ValueError):
+            op.select_columns([10, 2])
+
+    def test_solvers(self):
+        op = KhatriRaoDictionary(self.A[:, :8], True)
+        Phi = op.toarray()
+        b = Phi[:, [2, 5, 8]] @ np.array([[1.0], [0.5], [0.2]])
+        for formulation, l in [('penalizedl1', 0.5), ('constrainedl1', 1.5)]:
+            p = L1RegularizedLeastSquaresProblem(
+                Phi.shape[0], Phi.shape[1], formulation, True, tol=1e-10)
+            npt.assert_allclose(p.get_lipschitz_constant(op),
+                                np.linalg.norm(Phi, 2)**2, rtol=1e-5)
+            x_expected = L1RegularizedLeastSquaresProblem(
+                Phi.shape[0], Phi.shape[1], formulation, True, tol=1e-10
+            ).solve(Phi, b, l)
+            npt.assert_allclose(p.solve(op, b, l), x_expected, atol=1e-6)
+            npt.assert_allclose(p.solve_path(op, b, [l])[0], x_expected,
+                                atol=1e-6)
+
+class TestSparseEstimators(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(42)
+        self.wavelength = 1.0
+        self.ula = UniformLinearArray(8, self.wavelength / 2)
+        # Sources on the grid.
+        self.grid = FarField1DSearchGrid(size=180, unit='deg')
+        self.sources = FarField1DSourcePlacement([-20.0, 10.0], unit='deg')
+        self.A = self.ula.steering_matrix(self.sources, self.wavelength)
+
+    def test_covariance_matching(self):
+        R = self.A @ self.A.conj().T + 0.1 * np.eye(self.ula.size)
+        estimator = SparseCovarianceMatching(self.ula, self.wavelength,
+                                             self.grid)
+        resolved, estimates, sp = estimator.estimate(R, 2, 0.5,
+                                                     return_spectrum=True)
+        self.assertTrue(resolved)
+        npt.assert_allclose(estimates.locations, self.sources.locations)
+        sp_path = estimator.get_spectrum_path(R, [1.0, 0.5])
+        self.assertEqual(sp_path.shape, (2,) + self.grid.shape)
+        # The powers may spread differently over adjacent grid points.
+        npt.assert_allclose(sp_path[1].sum(), sp.sum(), rtol=1e-2)
+        self.assertEqual(np.argmax(sp_path[1]), np.argmax(sp))
+
+    def test_covariance_matching_gram(self):
+        R = self.A @ self.A.conj().T + 0.1 * np.eye(self.ula.size)
+        for noise_known in [False, True]:
+            sigma = 0.1 if noise_known else None
+            e_gram = SparseCovarianceMatching(
+                self.ula, self.wavelength, self.grid, noise_known,
+                use_gram=True)
+            e_plain = SparseCovarianceMatching(
+                self.ula, self.wavelength, self.grid, noise_known,
+                use_gram=False)
+            # The Gram matrix is computed without forming the atom matrix.
+            Phi = e_plain._get_atom_matrix()
+            npt.assert_allclose(e_gram._get_gram_matrix(), Phi.T @ Phi,
+                                atol=1e-10)
+            _, estimates, sp = e_gram.estimate(R, 2, 0.5, sigma,
+                                               return_spectrum=True)
+            _, _, sp_expected = e_plain.estimate(R, 2, 0.5, sigma,
+                                                 return_spectrum=True)
+            npt.assert_allclose(estimates.locations, self.sources.locations)
+            npt.assert_allclose(sp.sum(), sp_expected.sum(), rtol=1e-2)
+
+    def test_covariance_matching_implicit(self):
+        R = self.A @ self.A.conj().T + 0.1 * np.eye(self.ula.size)
+        estimator = SparseCovarianceMatching(
+            self.ula, self.wavelength, self.grid, use_gram=False,
+            implicit_dictionary=True)
+        self.assertIsInstance(estimator._get_atom_matrix(),
+                              KhatriRaoDictionary)
+        resolved, estimates = estimator.estimate(R, 2, 0.5)
+        self.assertTrue(resolved)
+        npt.assert_allclose(estimates.locations, self.sources.locations)
+        with self.assertRaises(ValueError):
+            SparseCovarianceMatching(self.ula, self.wavelength, self.grid,
+                                     implicit_dictionary=True,
+                                     atom_cache='.')
+
+    def test_no_spectrum_evaluator(self):
+        # The sparse estimators never use the fast spectrum evaluators, which
+        # should not be created even if they are applicable.
+        R = self.A @ self.A.conj().T + 0.1 * np.eye(self.ula.size)
+        grid = FarField1DSearchGrid(start=-1, stop=1, size=161, unit='sin')
+        estimator = SparseCovarianceMatching(self.ula, self.wavelength, grid)
+        estimator.estimate(R, 2, 0.5)
+        self.assertFalse(estimator._evaluator_created)
+
+    def test_group_sparse(self):
+        n_snapshots = 20
+        S = (np.random.randn(2, n_snapshots) +
+             1j * np.random.randn(2, n_snapshots)) / np.sqrt(2)
+        N = (np.random.randn(self.ula.size, n_snapshots) +
+             1j * np.random.randn(self.ula.size, n_snapshots)) * 0.05
+        Y = self.A @ S + N
+        estimator = GroupSparseEstimator(self.ula, self.wavelength, self.grid,
+                                         n_snapshots)
+        resolved, estimates, sp = estimator.estimate(Y, 2, 1.0,
+                                                     return_spectrum=True)
+        self.assertTrue(resolved)
+        npt.assert_allclose(estimates.locations, self.sources.locations)
+        sp_path = estimator.get_spectrum_path(Y, [2.0, 1.0])
+        self.assertEqual(sp_path.shape, (2,) + self.grid.shape)
+        # The powers may spread differently over adjacent grid points.
+        npt.assert_allclose(sp_path[1].sum(), sp.sum(), rtol=1e-2)
+        self.assertEqual(np.argmax(sp_path[1]), np.argmax(sp))
+
+if __name__ == '__main__':
+    unittest.main()
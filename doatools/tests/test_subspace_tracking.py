@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+import numpy.testing as npt
+from doatools.model.arrays import UniformLinearArray
+from doatools.model.sources import FarField1DSourcePlacement
+from doatools.estimation.grid import FarField1DSearchGrid
+from doatools.estimation.music import MUSIC, RootMUSIC1D
+from doatools.estimation.min_norm import MinNorm
+from doatools.estimation.esprit import Esprit1D
+from doatools.estimation.core import get_signal_subspace
+from doatools.estimation.subspace_tracking import PASTTracker, PASTdTracker
+
+class TestSubspaceTracking(unittest.TestCase):
+
+    def setUp(self):
+        self.wavelength = 1.0
+        self.ula = UniformLinearArray(12, self.wavelength / 2)
+        self.sources = FarField1DSourcePlacement([-0.5, 0.1, 0.6])
+        self.A = self.ula.steering_matrix(self.sources, self.wavelength)
+        self.sigma = 0.09
+        self.R = self.A @ self.A.conj().T + self.sigma * np.eye(self.ula.size)
+        grid = FarField1DSearchGrid(size=1800)
+        self.estimators = [
+            ('MUSIC', MUSIC(self.ula, self.wavelength, grid).estimate),
+            ('MinNorm', MinNorm(self.ula, self.wavelength, grid).estimate),
+            ('RootMUSIC1D', RootMUSIC1D(self.wavelength).estimate),
+            ('Esprit1D', Esprit1D(self.wavelength).estimate)
+        ]
+
+    def test_exact_subspace(self):
+        # A tracker initialized with the exact signal subspace should give the
+        # same estimates as the covariance matrix.
+        k = self.sources.size
+        Es = get_signal_subspace(self.R, k, 'full')
+        tracker = PASTdTracker(self.ula.size, k, W0=Es)
+        for name, f in self.estimators:
+            resolved, estimates = f(tracker, k)
+            self.assertTrue(resolved, msg=name)
+            _, expected = f(self.R, k)
+            npt.assert_allclose(estimates.locations, expected.locations,
+                                rtol=1e-6, err_msg=name)
+
+    def test_tracking(self):
+        np.random.seed(0)
+        m, k = self.ula.size, self.sources.size
+        n = 3000
+        S = (np.random.randn(k, n) + 1j * np.random.randn(k, n)) / np.sqrt(2)
+        N = (np.random.randn(m, n) + 1j * np.random.randn(m, n)) * np.sqrt(self.sigma / 2)
+        Y = self.A @ S + N
+        Es = get_signal_subspace(self.R, k, 'full')
+        for cls in [PASTTracker, PASTdTracker]:
+            tracker = cls(m, k, 0.98)
+            for Y_block in np.split(Y, 30, axis=1):
+                tracker.update(Y_block)
+            self.assertEqual(tracker.n_snapshots, n)
+            Et = tracker.get_signal_subspace(k)
+            npt.assert_allclose(Et.conj().T @ Et, np.eye(k), atol=1e-10)
+            self.assertLess(np.linalg.norm(Et @ Et.conj().T - Es @ Es.conj().T), 0.15)
+            for name, f in self.estimators:
+                resolved, estimates = f(tracker, k)
+                self.assertTrue(resolved, msg=name)
+                npt.assert_allclose(estimates.locations, self.sources.locations,
+                                    atol=1e-2, err_msg=cls.__name__ + ', ' + name)
+
+    def test_invalid_inputs(self):
+        tracker = PASTTracker(self.ula.size, 3)
+        with self.assertRaises(ValueError):
+            tracker.get_signal_subspace(2)
+        with self.assertRaises(ValueError):
+            tracker.update(np.ones((self.ula.size + 1, 2)))
+        with self.assertRaises(ValueError):
+            Esprit1D(self.wavelength).estimate(tracker, 3, unitary=True)
+        with self.assertRaises(ValueError):
+            MUSIC(UniformLinearArray(10, self.wavelength / 2), self.wavelength,
+                  FarField1DSearchGrid()).estimate(tracker, 3)
+
+if __name__ == '__main__':
+    unittest.main()
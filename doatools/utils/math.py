@@ -31,10 +31,8 @@ def khatri_rao(a, b):
     n2, k2 = b.shape
     if k1 != k2:
         raise ValueError('Two input matrices must have the same number of columns.')
-    c = np.zeros((n1 * n2, k1), dtype=np.result_type(a.dtype, b.dtype))
-    for i in range(k1):
-        c[:,i] = np.outer(a[:,i], b[:,i]).flatten()
-    return c
+    # The i-th column is the flattened outer product of a[:,i] and b[:,i].
+    return np.einsum('ik,jk->ijk', a, b).reshape((n1 * n2, k1))
 
 def projm(A, use_pinv=False):
     """Computes the projection matrix of the input matrix.
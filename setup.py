@@ -26,13 +26,15 @@ setup(
     author='Mianzhi Wang',
     # author_email='',
     packages=find_packages(exclude=('docs',)),
-    python_requires='>=3.5',
+    python_requires='>=3.7',
     install_requires=[
-        'numpy>=1.14.0',
-        'scipy>=1.1.0',
-        'matplotlib>=2.1.0',
-        'cvxpy>=1.0.8'
+        'numpy>=1.17.0',
+        'scipy>=1.5.0',
+        'matplotlib>=2.1.0'
     ],
+    extras_require={
+        'cvxpy': ['cvxpy>=1.0.8']
+    },
     zip_safe=False,
     classifiers=[
         'Development Status :: 3 - Alpha',
@@ -40,8 +42,8 @@ setup(
         'License :: OSI Approved :: MIT License',
         'Programming Language :: Python',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
         'Topic :: Scientific/Engineering',
     ]
 )